@@ -0,0 +1,86 @@
+"""
+Benchmark: chat_many() throughput at different concurrency levels.
+
+Uses a mocked transport with a fixed per-request latency, so the numbers
+show scheduling overhead and the effect of the concurrency bound rather
+than network conditions. An unbounded asyncio.gather over chat() is
+included for comparison.
+
+    python benchmarks/bench_batch.py --requests 1000 --latency-ms 20
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from exnestai import ExnestAI, ExnestMessage
+
+
+RESPONSE = {
+    "id": "chatcmpl-bench",
+    "object": "chat.completion",
+    "created": 1700000000,
+    "model": "openai:gpt-4o-mini",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "pong"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 5, "completion_tokens": 1, "total_tokens": 6}
+}
+
+
+def make_client(latency: float, stats: dict) -> ExnestAI:
+    async def handler(request):
+        stats["active"] += 1
+        stats["peak"] = max(stats["peak"], stats["active"])
+        await asyncio.sleep(latency)
+        stats["active"] -= 1
+        return httpx.Response(200, json=RESPONSE)
+
+    return ExnestAI(api_key="bench-key", retries=0, transport=httpx.MockTransport(handler))
+
+
+def make_requests(count: int):
+    messages = [ExnestMessage(role="user", content="ping")]
+    return [{"model": "openai:gpt-4o-mini", "messages": messages, "max_tokens": 1} for _ in range(count)]
+
+
+async def bench(label: str, run, requests: int, stats: dict):
+    stats["peak"] = 0
+    start = time.perf_counter()
+    await run()
+    wall = time.perf_counter() - start
+    print(f"{label:<28} wall={wall * 1000:8.1f} ms  throughput={requests / wall:9.1f} req/s  peak in-flight={stats['peak']}")
+
+
+async def main(requests: int, latency_ms: int):
+    stats = {"active": 0, "peak": 0}
+    client = make_client(latency_ms / 1000, stats)
+    batch = make_requests(requests)
+
+    print(f"{requests} chat requests, mocked latency {latency_ms} ms\n")
+    for concurrency in (1, 8, 32, 128):
+        await bench(
+            f"chat_many(concurrency={concurrency})",
+            lambda: client.chat_many(batch, concurrency=concurrency),
+            requests,
+            stats
+        )
+    await bench(
+        "unbounded gather",
+        lambda: asyncio.gather(*[client.chat(**request) for request in batch]),
+        requests,
+        stats
+    )
+    await client.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.latency_ms))
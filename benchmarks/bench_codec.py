@@ -0,0 +1,80 @@
+"""
+Benchmark: JSON codec throughput for request bodies and stream chunks.
+
+Encodes a chat request with a long `messages` history and decodes a long
+stream of chunk payloads with every installed backend (orjson, msgspec,
+stdlib json), reporting MB/s and time per operation.
+
+    python benchmarks/bench_codec.py --messages 500 --chunks 10000
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from exnestai.codec import get_codec
+
+
+def chat_request(messages: int) -> dict:
+    history = []
+    for index in range(messages):
+        role = "user" if index % 2 == 0 else "assistant"
+        history.append({"role": role, "content": f"Message {index}: " + "lorem ipsum dolor sit amet " * 20})
+    return {"model": "openai:gpt-4o-mini", "messages": history, "max_tokens": 512, "temperature": 0.7}
+
+
+def stream_chunks(chunks: int) -> list:
+    return [
+        json.dumps({
+            "id": "chatcmpl-123",
+            "object": "chat.completion.chunk",
+            "created": 1677652288,
+            "model": "openai:gpt-4o-mini",
+            "choices": [{"index": 0, "delta": {"content": f" token{index}"}, "finish_reason": None}]
+        }).encode()
+        for index in range(chunks)
+    ]
+
+
+def bench(label: str, func, size: int, number: int) -> None:
+    seconds = min(timeit.repeat(func, number=number, repeat=5)) / number
+    print(f"  {label:<10} {seconds * 1000:9.3f} ms/op {size / seconds / 1e6:10.1f} MB/s")
+
+
+def main(messages: int, chunks: int) -> None:
+    codecs = []
+    for name in ("orjson", "msgspec", "json"):
+        try:
+            codecs.append(get_codec(name))
+        except ImportError:
+            print(f"({name} not installed, skipped)")
+
+    request = chat_request(messages)
+    request_size = len(get_codec("json").dumps(request))
+    print(f"\nEncode chat request: {messages} messages, {request_size / 1024:.0f} KB")
+    for codec in codecs:
+        bench(codec.name, lambda: codec.dumps(request), request_size, 20)
+
+    encoded = get_codec("json").dumps(request)
+    print(f"\nDecode chat request body: {request_size / 1024:.0f} KB")
+    for codec in codecs:
+        bench(codec.name, lambda: codec.loads(encoded), request_size, 20)
+
+    stream = stream_chunks(chunks)
+    stream_size = sum(len(chunk) for chunk in stream)
+    print(f"\nDecode stream: {chunks} chunks, {stream_size / 1024:.0f} KB")
+    for codec in codecs:
+        loads = codec.loads
+        bench(codec.name, lambda: [loads(chunk) for chunk in stream], stream_size, 3)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--chunks", type=int, default=10000)
+    args = parser.parse_args()
+    main(args.messages, args.chunks)
@@ -0,0 +1,94 @@
+"""
+Benchmark: cost of decoding a response dict into model dataclasses.
+
+Compares the precompiled decoder in exnestai.decoding against a naive
+reflection-based decoder that inspects fields and type hints on every
+call, and against the old shallow `ExnestChatResponse(**data)`, which
+leaves nested values as dicts.
+
+    python benchmarks/bench_decode.py --iterations 20000
+"""
+
+import argparse
+import dataclasses
+import os
+import sys
+import timeit
+from typing import Any, List, Union, get_args, get_origin, get_type_hints
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from exnestai.decoding import decode
+from exnestai.models import ExnestChatResponse, ExnestStreamChunk
+
+CHAT_RESPONSE = {
+    "id": "chatcmpl-123",
+    "object": "chat.completion",
+    "created": 1677652288,
+    "model": "openai:gpt-4o-mini",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "Hello there!"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 9, "completion_tokens": 12, "total_tokens": 21},
+    "exnest": {
+        "billing": {
+            "transaction_id": "tx_1",
+            "actual_cost_usd": "0.0001",
+            "estimated_cost_usd": "0.0002",
+            "refund_amount_usd": "0.0001",
+            "wallet_currency": "USD",
+            "deducted_amount": "0.0001"
+        },
+        "links": {"transaction": "https://exnest.app/tx/1", "apiKey": "https://exnest.app/keys/1"},
+        "processing_time_ms": 420
+    }
+}
+
+STREAM_CHUNK = {
+    "id": "chatcmpl-123",
+    "object": "chat.completion.chunk",
+    "created": 1677652288,
+    "model": "openai:gpt-4o-mini",
+    "choices": [{"index": 0, "delta": {"content": "Hel"}, "finish_reason": None}]
+}
+
+
+def reflective_decode(cls: Any, data: Any) -> Any:
+    """Typical reflection-based decoder: resolves fields and hints on every call."""
+    if data is None:
+        return None
+    origin = get_origin(cls)
+    if origin is Union:
+        members = [arg for arg in get_args(cls) if arg is not type(None)]
+        return reflective_decode(members[0], data) if len(members) == 1 else data
+    if origin in (list, List):
+        return [reflective_decode(get_args(cls)[0], item) for item in data]
+    if dataclasses.is_dataclass(cls) and isinstance(data, dict):
+        hints = get_type_hints(cls)
+        kwargs = {
+            field.name: reflective_decode(hints[field.name], data[field.name])
+            for field in dataclasses.fields(cls) if field.name in data
+        }
+        return cls(**kwargs)
+    return data
+
+
+def bench(label: str, func, iterations: int) -> None:
+    seconds = min(timeit.repeat(func, number=iterations, repeat=5))
+    print(f"{label:<44} {seconds / iterations * 1e6:8.2f} us/op")
+
+
+def main(iterations: int) -> None:
+    print(f"{iterations} iterations, best of 5\n")
+    print("Chat response (choices, message, usage, billing, links)")
+    bench("  precompiled decode()", lambda: decode(ExnestChatResponse, CHAT_RESPONSE), iterations)
+    bench("  reflection-based decoder", lambda: reflective_decode(ExnestChatResponse, CHAT_RESPONSE), iterations)
+    bench("  ExnestChatResponse(**data) (shallow)", lambda: ExnestChatResponse(**CHAT_RESPONSE), iterations)
+    print("\nStream chunk (choices, delta)")
+    bench("  precompiled decode()", lambda: decode(ExnestStreamChunk, STREAM_CHUNK), iterations)
+    bench("  reflection-based decoder", lambda: reflective_decode(ExnestStreamChunk, STREAM_CHUNK), iterations)
+    bench("  ExnestStreamChunk(**data) (shallow)", lambda: ExnestStreamChunk(**STREAM_CHUNK), iterations)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    main(parser.parse_args().iterations)
@@ -0,0 +1,181 @@
+"""
+Benchmark: HTTP/1.1 vs HTTP/2 multiplexing for concurrent chat() calls.
+
+Starts two local stand-in servers, one speaking HTTP/1.1 with keep-alive
+and one speaking cleartext HTTP/2 (h2c, prior knowledge, as there is no
+TLS/ALPN locally), then fires the same burst of concurrent chat() calls at
+each and reports wall time, latency percentiles and TCP connections opened.
+
+Requires the `h2` package: pip install exnest-ai[http2]
+
+    python benchmarks/bench_http2.py --requests 500 --latency-ms 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+import h2.config
+import h2.connection
+import h2.events
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from exnestai import ExnestAI, ExnestMessage
+
+
+RESPONSE_BODY = json.dumps({
+    "id": "chatcmpl-bench",
+    "object": "chat.completion",
+    "created": 1700000000,
+    "model": "openai:gpt-4o-mini",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "pong"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 5, "completion_tokens": 1, "total_tokens": 6}
+}).encode()
+
+
+class H2Protocol(asyncio.Protocol):
+    """Minimal h2c server answering every stream with RESPONSE_BODY after a delay."""
+
+    def __init__(self, latency: float, counters: dict):
+        self.latency = latency
+        self.counters = counters
+        self.conn = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False))
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.counters["connections"] += 1
+        self.transport = transport
+        self.conn.initiate_connection()
+        self.transport.write(self.conn.data_to_send())
+
+    def data_received(self, data):
+        for event in self.conn.receive_data(data):
+            if isinstance(event, h2.events.DataReceived):
+                self.conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+            elif isinstance(event, h2.events.StreamEnded):
+                asyncio.ensure_future(self.respond(event.stream_id))
+            elif isinstance(event, h2.events.ConnectionTerminated):
+                self.transport.close()
+        self.transport.write(self.conn.data_to_send())
+
+    async def respond(self, stream_id: int):
+        await asyncio.sleep(self.latency)
+        if self.transport.is_closing():
+            return
+        self.conn.send_headers(stream_id, [
+            (":status", "200"),
+            ("content-type", "application/json"),
+            ("content-length", str(len(RESPONSE_BODY))),
+        ])
+        self.conn.send_data(stream_id, RESPONSE_BODY, end_stream=True)
+        self.transport.write(self.conn.data_to_send())
+
+
+async def start_http1_server(latency: float, counters: dict):
+    async def handle(reader, writer):
+        counters["connections"] += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                if length:
+                    await reader.readexactly(length)
+                await asyncio.sleep(latency)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + b"Content-Length: " + str(len(RESPONSE_BODY)).encode() + b"\r\n\r\n" + RESPONSE_BODY
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+async def start_h2_server(latency: float, counters: dict):
+    loop = asyncio.get_running_loop()
+    return await loop.create_server(lambda: H2Protocol(latency, counters), "127.0.0.1", 0)
+
+
+async def run_burst(client: ExnestAI, requests: int):
+    messages = [ExnestMessage(role="user", content="ping")]
+    latencies = []
+
+    async def one():
+        start = time.perf_counter()
+        await client.chat("openai:gpt-4o-mini", messages, max_tokens=1)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(requests)])
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def percentile(values, pct):
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def report(label, wall, latencies, connections, requests):
+    print(f"{label:<10} wall={wall * 1000:8.1f} ms  "
+          f"throughput={requests / wall:8.1f} req/s  "
+          f"p50={percentile(latencies, 50) * 1000:7.1f} ms  "
+          f"p95={percentile(latencies, 95) * 1000:7.1f} ms  "
+          f"p99={percentile(latencies, 99) * 1000:7.1f} ms  "
+          f"connections={connections}")
+
+
+async def main(requests: int, latency_ms: int, max_connections: int):
+    latency = latency_ms / 1000
+    h1_counters = {"connections": 0}
+    h2_counters = {"connections": 0}
+    h1_server = await start_http1_server(latency, h1_counters)
+    h2_server = await start_h2_server(latency, h2_counters)
+    h1_port = h1_server.sockets[0].getsockname()[1]
+    h2_port = h2_server.sockets[0].getsockname()[1]
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+
+    h1_client = ExnestAI(
+        api_key="bench-key",
+        base_url=f"http://127.0.0.1:{h1_port}",
+        retries=0,
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections
+    )
+    h2_client = ExnestAI(
+        api_key="bench-key",
+        base_url=f"http://127.0.0.1:{h2_port}",
+        retries=0,
+        http2=True,
+        transport=httpx.AsyncHTTPTransport(http1=False, http2=True, limits=limits)
+    )
+
+    print(f"{requests} concurrent chat() calls, server latency {latency_ms} ms, max_connections={max_connections}\n")
+    try:
+        wall, latencies = await run_burst(h1_client, requests)
+        report("HTTP/1.1", wall, latencies, h1_counters["connections"], requests)
+        wall, latencies = await run_burst(h2_client, requests)
+        report("HTTP/2", wall, latencies, h2_counters["connections"], requests)
+    finally:
+        await h1_client.aclose()
+        await h2_client.aclose()
+        h1_server.close()
+        h2_server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--latency-ms", type=int, default=50)
+    parser.add_argument("--max-connections", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.latency_ms, args.max_connections))
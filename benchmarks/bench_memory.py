@@ -0,0 +1,83 @@
+"""
+Benchmark: memory held by decoded responses, regular vs compact models.
+
+Measures, with tracemalloc, the bytes retained per decoded chat response
+and stream chunk, and for a whole 10k-chunk stream kept in a list, using
+the regular models, the slotted variants in exnestai.compact and their
+frozen counterparts.
+
+    python benchmarks/bench_memory.py --chunks 10000
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from exnestai import models
+from exnestai.compact import compact_model
+from exnestai.decoding import decode
+
+CHAT_RESPONSE = {
+    "id": "chatcmpl-123",
+    "object": "chat.completion",
+    "created": 1677652288,
+    "model": "openai:gpt-4o-mini",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "Hello there!"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 9, "completion_tokens": 12, "total_tokens": 21}
+}
+
+
+def stream_chunk(index: int) -> dict:
+    return {
+        "id": "chatcmpl-123",
+        "object": "chat.completion.chunk",
+        "created": 1677652288,
+        "model": "openai:gpt-4o-mini",
+        "choices": [{"index": 0, "delta": {"content": f"tok{index}"}, "finish_reason": None}]
+    }
+
+
+def retained_bytes(build) -> int:
+    """Bytes still allocated after `build()` returns, while its result is alive."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del result
+    return size
+
+
+def main(chunks: int) -> None:
+    # Payloads are built up front so only the decoded objects are measured
+    responses = [dict(CHAT_RESPONSE) for _ in range(1000)]
+    stream = [stream_chunk(index) for index in range(chunks)]
+    variants = {
+        "regular": lambda cls: cls,
+        "compact (slots)": compact_model,
+        "compact (slots, frozen)": lambda cls: compact_model(cls, frozen=True),
+    }
+
+    print(f"{'':<26}{'chat response':>16}{'stream chunk':>16}{f'{chunks}-chunk stream':>20}")
+    for label, variant in variants.items():
+        chat_cls = variant(models.ExnestChatResponse)
+        chunk_cls = variant(models.ExnestStreamChunk)
+        decode(chat_cls, CHAT_RESPONSE)  # compile decoders outside the measurement
+        decode(chunk_cls, stream[0])
+
+        per_response = retained_bytes(lambda: [decode(chat_cls, data) for data in responses]) / len(responses)
+        total_stream = retained_bytes(lambda: [decode(chunk_cls, data) for data in stream])
+        print(f"{label:<26}{per_response:>14.0f} B{total_stream / chunks:>14.0f} B"
+              f"{total_stream / 1024 / 1024:>17.2f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=10000)
+    main(parser.parse_args().chunks)
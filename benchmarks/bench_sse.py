@@ -0,0 +1,102 @@
+"""
+Benchmark: parsing a long SSE stream.
+
+Feeds a synthetic stream of stream-chunk events through an httpx response
+in network-sized chunks and compares the previous line-based parsing
+(`aiter_lines()`, `startswith("data:")`, strip) with the byte-level
+SSEParser, with and without decoding the JSON payloads.
+
+    python benchmarks/bench_sse.py --events 100000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from exnestai.codec import get_codec
+from exnestai.sse import SSEParser
+
+
+def build_stream(events: int) -> bytes:
+    lines = []
+    for index in range(events):
+        payload = json.dumps({
+            "id": "chatcmpl-123",
+            "object": "chat.completion.chunk",
+            "created": 1677652288,
+            "model": "openai:gpt-4o-mini",
+            "choices": [{"index": 0, "delta": {"content": f" token{index}"}, "finish_reason": None}]
+        })
+        lines.append(f"data: {payload}\n\n")
+    lines.append("data: [DONE]\n\n")
+    return "".join(lines).encode()
+
+
+def response(stream: bytes, chunk_size: int) -> httpx.Response:
+    async def chunks():
+        for start in range(0, len(stream), chunk_size):
+            yield stream[start:start + chunk_size]
+
+    return httpx.Response(200, content=chunks())
+
+
+async def line_based(stream: bytes, chunk_size: int, loads) -> int:
+    count = 0
+    async for line in response(stream, chunk_size).aiter_lines():
+        if line.startswith("data:"):
+            data_str = line[len("data:"):].strip()
+            if data_str == "[DONE]":
+                break
+            if loads is not None:
+                loads(data_str)
+            count += 1
+    return count
+
+
+async def byte_level(stream: bytes, chunk_size: int, loads) -> int:
+    count = 0
+    parser = SSEParser()
+    async for chunk in response(stream, chunk_size).aiter_bytes():
+        for event in parser.feed(chunk):
+            if event.data.startswith(b"[DONE]"):
+                return count
+            if loads is not None:
+                loads(event.data)
+            count += 1
+    return count
+
+
+def bench(label: str, parse, stream: bytes, chunk_size: int, loads, events: int) -> None:
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        assert asyncio.run(parse(stream, chunk_size, loads)) == events
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<28} {best * 1000:8.1f} ms  {events / best / 1e6:6.2f} M events/s")
+
+
+def main(events: int, chunk_size: int) -> None:
+    stream = build_stream(events)
+    loads = get_codec().loads
+    print(f"{events} events, {len(stream) / 1024 / 1024:.1f} MB in {chunk_size}-byte chunks, best of 5\n")
+    print("Parse only")
+    bench("aiter_lines (previous)", line_based, stream, chunk_size, None, events)
+    bench("SSEParser", byte_level, stream, chunk_size, None, events)
+    print(f"\nParse and decode JSON ({get_codec().name})")
+    bench("aiter_lines (previous)", line_based, stream, chunk_size, loads, events)
+    bench("SSEParser", byte_level, stream, chunk_size, loads, events)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--chunk-size", type=int, default=4096)
+    args = parser.parse_args()
+    main(args.events, args.chunk_size)
@@ -7,7 +7,18 @@ Main export point for all ExnestAI client services and models.
 
 # Main client classes
 from .client import ExnestAI
+from .sync import ExnestAISync
 from .wrapper import ExnestWrapper
+from .retry import RetryPolicy
+from .ratelimit import RateLimiter
+from .batch import BatchResult
+from .circuit import CircuitBreakerConfig, CircuitOpenError
+from .hedging import HedgePolicy
+from .decoding import LazyResponse
+from .accumulator import StreamAccumulator
+from .streaming import ChunkStream, StreamBroadcast, Subscription, SubscriberDetachedError
+from .cache import ResponseCache, SQLiteCache
+from .catalog import ModelCatalog
 
 # Data models
 from .models import (
@@ -36,7 +47,23 @@ from .models import (
 __all__ = [
     # Classes
     "ExnestAI",
+    "ExnestAISync",
     "ExnestWrapper",
+    "RetryPolicy",
+    "RateLimiter",
+    "BatchResult",
+    "CircuitBreakerConfig",
+    "CircuitOpenError",
+    "HedgePolicy",
+    "LazyResponse",
+    "StreamAccumulator",
+    "ChunkStream",
+    "StreamBroadcast",
+    "Subscription",
+    "SubscriberDetachedError",
+    "ResponseCache",
+    "SQLiteCache",
+    "ModelCatalog",
 
     # Models
     "ExnestMessage",
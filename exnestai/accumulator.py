@@ -0,0 +1,125 @@
+"""
+Rebuild a complete chat response from stream chunks.
+"""
+
+import dataclasses
+import time
+from typing import Any, Dict, List, Optional, Type
+
+from .decoding import decode
+from .models import ExnestChatResponse, ExnestStreamChunk
+
+
+class StreamAccumulator:
+    """
+    Collects the chunks of a chat stream. Deltas are gathered per choice
+    index and joined once at the end, finish reasons and usage (when the
+    stream reports it) are kept, and `response()` returns the equivalent
+    ExnestChatResponse.
+
+    Also measures time to first token (from creation, or `start()`, to
+    the first chunk with content) and the latency between content chunks.
+    """
+
+    def __init__(self):
+        self.id: Optional[str] = None
+        self.model: Optional[str] = None
+        self.created: Optional[int] = None
+        self.usage: Any = None
+        self.chunks = 0
+        self._parts: Dict[int, List[str]] = {}
+        self._roles: Dict[int, str] = {}
+        self._finish_reasons: Dict[int, Optional[str]] = {}
+        self._started_at = time.monotonic()
+        self._first_token_at: Optional[float] = None
+        self._last_token_at: Optional[float] = None
+        self._gaps: List[float] = []
+
+    def start(self) -> None:
+        """Restart the clock, e.g. right before sending the request."""
+        self._started_at = time.monotonic()
+
+    def add(self, chunk: ExnestStreamChunk) -> ExnestStreamChunk:
+        """Record a chunk and return it, so it can be used inline in a loop."""
+        now = time.monotonic()
+        self.chunks += 1
+        self.id = self.id or chunk.id
+        self.model = self.model or chunk.model
+        self.created = self.created or chunk.created
+        if getattr(chunk, "usage", None) is not None:
+            self.usage = chunk.usage
+
+        has_content = False
+        for choice in chunk.choices or []:
+            index = choice.index or 0
+            delta = choice.delta
+            if delta is not None:
+                if delta.role:
+                    self._roles[index] = delta.role
+                if delta.content:
+                    self._parts.setdefault(index, []).append(delta.content)
+                    has_content = True
+            if choice.finish_reason is not None or index not in self._finish_reasons:
+                self._finish_reasons[index] = choice.finish_reason
+
+        if has_content:
+            if self._first_token_at is None:
+                self._first_token_at = now
+            else:
+                self._gaps.append(now - self._last_token_at)
+            self._last_token_at = now
+        return chunk
+
+    def text(self, index: int = 0) -> str:
+        """Content received so far for choice `index`."""
+        return "".join(self._parts.get(index, ()))
+
+    def response(self, cls: Type[ExnestChatResponse] = ExnestChatResponse) -> ExnestChatResponse:
+        """The accumulated stream as a chat response of type `cls`."""
+        usage = self.usage
+        if dataclasses.is_dataclass(usage):
+            usage = {field.name: getattr(usage, field.name) for field in dataclasses.fields(usage)}
+        return decode(cls, {
+            "id": self.id,
+            "created": self.created,
+            "model": self.model,
+            "usage": usage,
+            "choices": [
+                {
+                    "index": index,
+                    "message": {"role": self._roles.get(index, "assistant"), "content": self.text(index)},
+                    "finish_reason": self._finish_reasons[index]
+                }
+                for index in sorted(self._finish_reasons)
+            ]
+        })
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        """Seconds until the first content chunk, None before it arrives."""
+        if self._first_token_at is None:
+            return None
+        return self._first_token_at - self._started_at
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Chunk count and latency figures in milliseconds."""
+        def ms(seconds: Optional[float]) -> Optional[float]:
+            return round(seconds * 1000, 3) if seconds is not None else None
+
+        gaps = sorted(self._gaps)
+
+        def percentile(pct: float) -> Optional[float]:
+            return ms(gaps[min(len(gaps) - 1, int(len(gaps) * pct / 100))]) if gaps else None
+
+        return {
+            "chunks": self.chunks,
+            "timeToFirstToken": ms(self.time_to_first_token),
+            "interTokenLatency": {
+                "mean": ms(sum(gaps) / len(gaps)) if gaps else None,
+                "p50": percentile(50),
+                "p90": percentile(90),
+                "p99": percentile(99),
+                "max": ms(gaps[-1]) if gaps else None
+            },
+            "duration": ms(self._last_token_at - self._started_at) if self._last_token_at is not None else None
+        }
@@ -0,0 +1,73 @@
+"""
+Bounded-concurrency batch execution for ExnestAI requests.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Optional, Any, AsyncGenerator, Awaitable, Callable, Dict, Iterable, List
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one batch item: either a response or the error it raised."""
+    index: int
+    response: Optional[Any] = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+async def run_batch(
+    call: Callable[..., Awaitable[Any]], requests: Iterable[Dict[str, Any]], concurrency: int
+) -> AsyncGenerator[BatchResult, None]:
+    """
+    Run `call(**request)` for every request with at most `concurrency` calls
+    in flight, yielding results as they complete. Requests are pulled from
+    the iterable lazily, so large or generated batches are not materialized.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    pending = enumerate(requests)
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def worker():
+        for index, request in pending:
+            try:
+                result = BatchResult(index, response=await call(**request))
+            except Exception as e:
+                result = BatchResult(index, error=e)
+            results.put_nowait(result)
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+    done = asyncio.ensure_future(asyncio.gather(*workers))
+    try:
+        while True:
+            getter = asyncio.ensure_future(results.get())
+            await asyncio.wait([getter, done], return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                yield getter.result()
+                continue
+            getter.cancel()
+            while not results.empty():
+                yield results.get_nowait()
+            done.result()  # Surface errors raised outside of call(), e.g. by the iterable
+            return
+    finally:
+        for task in workers:
+            task.cancel()
+        done.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+async def collect_batch(
+    call: Callable[..., Awaitable[Any]], requests: Iterable[Dict[str, Any]], concurrency: int
+) -> List[BatchResult]:
+    """Run a batch and return its results in request order."""
+    results: List[BatchResult] = []
+    async for result in run_batch(call, requests, concurrency):
+        results.append(result)
+    results.sort(key=lambda result: result.index)
+    return results
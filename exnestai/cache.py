@@ -0,0 +1,302 @@
+"""
+Response caches for deterministic ExnestAI requests.
+"""
+
+import collections
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+# Share of the limits freed by one SQLiteCache eviction pass, so a full cache does not evict on every insert
+EVICTION_SLACK = 0.05
+
+
+def cache_key(url: str, body: Dict[str, Any]) -> str:
+    """
+    Canonical key for a request: a SHA-256 of the URL and the body with
+    sorted keys, so the same model, messages and parameters always hash
+    alike regardless of argument order.
+    """
+    canonical = json.dumps(body, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{url}\n{canonical}".encode()).hexdigest()
+
+
+def is_deterministic(body: Dict[str, Any]) -> bool:
+    """Whether a request asks for a reproducible answer (temperature 0)."""
+    return body.get("temperature") == 0
+
+
+class _CacheCounters:
+    """Hit, miss and eviction counters shared by the cache backends."""
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: Optional[int]):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _stats(self, entries: int, size: int) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else None,
+            "entries": entries,
+            "bytes": size,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "maxEntries": self.max_entries,
+            "maxBytes": self.max_bytes
+        }
+
+
+class ResponseCache(_CacheCounters):
+    """
+    In-memory LRU cache of response bodies. Entries expire `ttl` ms after
+    being stored (never when None); the least recently used entries are
+    evicted once more than `max_entries` are held or their bodies exceed
+    `max_bytes` in total. Bodies larger than `max_bytes` are not cached.
+
+    Pass it to `ExnestAI(cache=...)`. By default only requests with
+    `temperature=0` are cached, since other requests are expected to vary;
+    `cache=True` on a call caches it regardless and `cache=False` bypasses
+    the cache.
+
+    One instance may be shared by clients running in different threads.
+    """
+
+    blocking = False
+
+    def __init__(self, max_entries: int = 10_000, max_bytes: int = 64 * 1024 * 1024, ttl: Optional[int] = 3_600_000):
+        super().__init__(max_entries, max_bytes, ttl)
+        self.size = 0
+        self._entries: "collections.OrderedDict[str, Tuple[Optional[float], bytes, Optional[str]]]" = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """The cached body for `key`, or None on a miss."""
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str) -> Optional[Tuple[bytes, Optional[str]]]:
+        """The cached body for `key` and the model that served it, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, content, served_model = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return content, served_model
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def set(self, key: str, content: bytes, served_model: Optional[str] = None) -> None:
+        """Store a response body, evicting least recently used entries as needed."""
+        if len(content) > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl / 1000 if self.ttl is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, content, served_model)
+            self.size += len(content)
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _remove(self, key: str) -> None:
+        self.size -= len(self._entries.pop(key)[1])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current occupancy."""
+        with self._lock:
+            return self._stats(len(self._entries), self.size)
+
+
+class SQLiteCache(_CacheCounters):
+    """
+    Response cache in a SQLite database file, so cached answers survive
+    restarts and are shared by every process on the host that opens the
+    same `path`. The database runs in WAL mode: readers never wait for
+    each other or for a writer, and writers wait up to `busy_timeout` ms
+    for one another.
+
+    Bodies are stored zlib-compressed (JSON responses typically shrink
+    3-5x) and `max_bytes` bounds the compressed size. Expiry and limits
+    work as in ResponseCache, except that recency is refreshed at most
+    once per `touch_interval` ms per entry, so cache hits rarely need a
+    write. Hit/miss counters are per process; entry and byte counts cover
+    the whole file and are kept up to date by triggers, so checking the
+    limits never scans the table. Once a limit is exceeded, the least
+    recently used entries are evicted in one batch down to 5% below it.
+
+    Every call does blocking file I/O; ExnestAI runs them in the event
+    loop's default executor.
+    """
+
+    blocking = True
+
+    def __init__(
+        self, path: str, max_entries: int = 100_000, max_bytes: int = 256 * 1024 * 1024,
+        ttl: Optional[int] = 86_400_000, compression_level: int = 6, busy_timeout: int = 5000,
+        touch_interval: int = 60_000
+    ):
+        super().__init__(max_entries, max_bytes, ttl)
+        self.path = path
+        self.compression_level = compression_level
+        self.busy_timeout = busy_timeout
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, body BLOB NOT NULL, size INTEGER NOT NULL, "
+                "expires_at REAL, accessed_at REAL NOT NULL, served_model TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS totals ("
+                "id INTEGER PRIMARY KEY CHECK (id = 0), entries INTEGER NOT NULL, bytes INTEGER NOT NULL)"
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO totals SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_insert AFTER INSERT ON responses BEGIN "
+                "UPDATE totals SET entries = entries + 1, bytes = bytes + NEW.size; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_delete AFTER DELETE ON responses BEGIN "
+                "UPDATE totals SET entries = entries - 1, bytes = bytes - OLD.size; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_resize AFTER UPDATE OF size ON responses BEGIN "
+                "UPDATE totals SET bytes = bytes + NEW.size - OLD.size; END"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection; SQLite connections are not shared across threads or forks."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout / 1000, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _totals(self, conn: sqlite3.Connection) -> Tuple[int, int]:
+        return conn.execute("SELECT entries, bytes FROM totals").fetchone()
+
+    def __len__(self) -> int:
+        return self._totals(self._connection())[0]
+
+    def get(self, key: str) -> Optional[bytes]:
+        """The cached body for `key`, or None on a miss."""
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str) -> Optional[Tuple[bytes, Optional[str]]]:
+        """The cached body for `key` and the model that served it, or None on a miss."""
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT body, expires_at, accessed_at, served_model FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is not None:
+            body, expires_at, accessed_at, served_model = row
+            now = time.time()
+            if expires_at is None or expires_at > now:
+                if now - accessed_at > self.touch_interval / 1000:
+                    conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return zlib.decompress(body), served_model
+            conn.execute("DELETE FROM responses WHERE key = ? AND expires_at = ?", (key, expires_at))
+            self.expirations += 1
+        self.misses += 1
+        return None
+
+    def set(self, key: str, content: bytes, served_model: Optional[str] = None) -> None:
+        """Store a response body, evicting expired and least recently used entries as needed."""
+        body = zlib.compress(content, self.compression_level)
+        if len(body) > self.max_bytes:
+            return
+        now = time.time()
+        expires_at = now + self.ttl / 1000 if self.ttl is not None else None
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # An upsert, as the implicit delete of INSERT OR REPLACE would bypass the totals trigger
+            conn.execute(
+                "INSERT INTO responses (key, body, size, expires_at, accessed_at, served_model) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET body = excluded.body, "
+                "size = excluded.size, expires_at = excluded.expires_at, accessed_at = excluded.accessed_at, "
+                "served_model = excluded.served_model",
+                (key, body, len(body), expires_at, now, served_model)
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        self.expirations += conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,)).rowcount
+        count, size = self._totals(conn)
+        if count <= self.max_entries and size <= self.max_bytes:
+            return
+        low_entries = self.max_entries - int(self.max_entries * EVICTION_SLACK)
+        low_bytes = self.max_bytes - int(self.max_bytes * EVICTION_SLACK)
+        while count > low_entries or size > low_bytes:
+            # Enough of the oldest entries to get under both marks, judging bytes by the average entry
+            batch = max(count - low_entries, math.ceil((size - low_bytes) * count / size), 1)
+            self.evictions += conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                (batch,)
+            ).rowcount
+            count, size = self._totals(conn)
+
+    def delete(self, key: str) -> None:
+        self._connection().execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        """Close this thread's database connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of this process and the occupancy of the database."""
+        return self._stats(*self._totals(self._connection()))
@@ -0,0 +1,115 @@
+"""
+Locally cached, indexed catalog of available models.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .models import ExnestModel
+
+
+class ModelCatalog:
+    """
+    The `/models` list loaded once and indexed by model id, name and
+    provider id, so lookups such as `limits.contextWindow` or `pricing`
+    on hot paths need no request.
+
+    Entries younger than `ttl` ms are served as is. Older ones are still
+    served immediately (stale-while-revalidate) while a single background
+    refresh reloads the list; past `max_stale` ms, when set, callers wait
+    for the refresh instead. A failed background refresh keeps the stale
+    list and is retried on the next lookup.
+
+    Pass `model_catalog=True` (or a ModelCatalog with custom timings) to
+    ExnestAI to serve `get_models()`, `get_model()` and
+    `get_models_by_provider()` from it. The returned models are shared
+    between callers and should be treated as read-only.
+    """
+
+    def __init__(
+        self, load: Optional[Callable[[], Awaitable[List[ExnestModel]]]] = None, ttl: int = 300_000,
+        max_stale: Optional[int] = None
+    ):
+        self.load = load
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.loads = 0
+        self.refresh_errors = 0
+        self._models: List[ExnestModel] = []
+        self._by_id: Dict[str, ExnestModel] = {}
+        self._by_name: Dict[str, ExnestModel] = {}
+        self._by_provider: Dict[str, List[ExnestModel]] = {}
+        self._loaded_at: Optional[float] = None
+        self._refresh: Optional[asyncio.Task] = None
+
+    async def _reload(self) -> None:
+        models = await self.load()
+        by_provider: Dict[str, List[ExnestModel]] = {}
+        for model in models:
+            by_provider.setdefault(model.provider.id, []).append(model)
+        # Indexes are swapped in together so lookups never see a mix of old and new
+        self._models = list(models)
+        self._by_id = {model.id: model for model in models}
+        self._by_name = {model.name: model for model in models}
+        self._by_provider = by_provider
+        self._loaded_at = time.monotonic()
+        self.loads += 1
+
+    def _refresh_task(self) -> asyncio.Task:
+        """The refresh in flight, started if there is none, so concurrent callers share one load."""
+        loop = asyncio.get_running_loop()
+        if self._refresh is None or self._refresh.done() or self._refresh.get_loop() is not loop:
+            self._refresh = loop.create_task(self._reload())
+            self._refresh.add_done_callback(self._refreshed)
+        return self._refresh
+
+    def _refreshed(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            self.refresh_errors += 1
+
+    async def _ensure_loaded(self) -> None:
+        if self.load is None:
+            raise RuntimeError("ModelCatalog has no loader; pass it to ExnestAI(model_catalog=...)")
+        if self._loaded_at is None:
+            await asyncio.shield(self._refresh_task())
+            return
+        age = (time.monotonic() - self._loaded_at) * 1000
+        if age < self.ttl:
+            return
+        if self.max_stale is not None and age >= self.max_stale:
+            await asyncio.shield(self._refresh_task())
+        else:
+            self._refresh_task()
+
+    async def models(self) -> List[ExnestModel]:
+        """All models."""
+        await self._ensure_loaded()
+        return list(self._models)
+
+    async def get(self, model: str) -> Optional[ExnestModel]:
+        """The model with id or name `model`, or None when the catalog has no such model."""
+        await self._ensure_loaded()
+        return self._by_id.get(model) or self._by_name.get(model)
+
+    async def by_provider(self, provider: str) -> List[ExnestModel]:
+        """Models of the provider with id `provider`."""
+        await self._ensure_loaded()
+        return list(self._by_provider.get(provider, ()))
+
+    def invalidate(self) -> None:
+        """Force the next lookup to wait for a fresh list."""
+        self._loaded_at = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Catalog size, age in ms, and load and refresh error counts."""
+        age = (time.monotonic() - self._loaded_at) * 1000 if self._loaded_at is not None else None
+        return {
+            "models": len(self._models),
+            "providers": len(self._by_provider),
+            "age": round(age, 3) if age is not None else None,
+            "stale": age is not None and age >= self.ttl,
+            "loads": self.loads,
+            "refreshErrors": self.refresh_errors,
+            "refreshing": self._refresh is not None and not self._refresh.done()
+        }
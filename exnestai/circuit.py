@@ -0,0 +1,162 @@
+"""
+Circuit breakers for ExnestAI requests, keyed by endpoint and model.
+"""
+
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Tuple, Deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of sending a request while its circuit is open."""
+
+    def __init__(self, endpoint: str, model: Optional[str], retry_in: float):
+        target = f"{endpoint} ({model})" if model else endpoint
+        super().__init__(f"Circuit open for {target}, retry in {retry_in:.1f}s")
+        self.endpoint = endpoint
+        self.model = model
+        self.retry_in = retry_in
+
+
+@dataclass
+class CircuitBreakerConfig:
+    """
+    Thresholds for tripping a circuit. Over the last `window_size` calls
+    (once at least `minimum_calls` were made) the circuit opens when the
+    failure rate reaches `failure_rate_threshold`, or when calls slower than
+    `slow_call_duration` ms reach `slow_call_rate_threshold`. After
+    `open_duration` ms it half-opens and lets `half_open_probes` requests
+    through; the circuit closes if they all succeed and reopens otherwise.
+    """
+    failure_rate_threshold: float = 0.5
+    slow_call_duration: Optional[int] = None
+    slow_call_rate_threshold: float = 1.0
+    minimum_calls: int = 10
+    window_size: int = 20
+    open_duration: int = 30000
+    half_open_probes: int = 1
+
+    def __post_init__(self):
+        if not 0 < self.failure_rate_threshold <= 1 or not 0 < self.slow_call_rate_threshold <= 1:
+            raise ValueError("Rate thresholds must be between 0 and 1")
+        if self.minimum_calls < 1 or self.window_size < self.minimum_calls:
+            raise ValueError("window_size must be at least minimum_calls, which must be at least 1")
+        if self.half_open_probes < 1:
+            raise ValueError("half_open_probes must be at least 1")
+
+
+class CircuitBreaker:
+    """A single circuit tracking the outcome of recent calls."""
+
+    def __init__(self, config: CircuitBreakerConfig):
+        self.config = config
+        self.state = CLOSED
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=config.window_size)  # (failed, slow)
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self.times_opened = 0
+
+    def retry_in(self) -> float:
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.config.open_duration / 1000 - time.monotonic())
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now. Admits probes when half-open."""
+        if self.state == OPEN:
+            if self.retry_in() > 0:
+                return False
+            self.state = HALF_OPEN
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+        if self.state == HALF_OPEN:
+            if self._probes_in_flight >= self.config.half_open_probes - self._probe_successes:
+                return False
+            self._probes_in_flight += 1
+        return True
+
+    def record(self, failed: bool, latency: float) -> None:
+        """Record the outcome of an allowed call; `latency` is in seconds."""
+        slow = self.config.slow_call_duration is not None and latency * 1000 >= self.config.slow_call_duration
+
+        if self.state == HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if failed or slow:
+                self._open()
+            else:
+                self._probe_successes += 1
+                if self._probe_successes >= self.config.half_open_probes:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+            return
+        if self.state == OPEN:
+            return
+
+        self._outcomes.append((failed, slow))
+        if len(self._outcomes) < self.config.minimum_calls:
+            return
+        if self.failure_rate >= self.config.failure_rate_threshold or (
+            self.config.slow_call_duration is not None and self.slow_call_rate >= self.config.slow_call_rate_threshold
+        ):
+            self._open()
+
+    def release(self) -> None:
+        """Give back a half-open probe slot for a call that never completed."""
+        if self.state == HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.times_opened += 1
+
+    @property
+    def failure_rate(self) -> float:
+        return sum(failed for failed, _ in self._outcomes) / len(self._outcomes) if self._outcomes else 0.0
+
+    @property
+    def slow_call_rate(self) -> float:
+        return sum(slow for _, slow in self._outcomes) / len(self._outcomes) if self._outcomes else 0.0
+
+    def get_state(self) -> Dict[str, Any]:
+        if self.state == OPEN and self.retry_in() == 0:
+            state = HALF_OPEN  # Half-opens on the next request
+        else:
+            state = self.state
+        return {
+            "state": state,
+            "calls": len(self._outcomes),
+            "failureRate": self.failure_rate,
+            "slowCallRate": self.slow_call_rate,
+            "retryIn": self.retry_in(),
+            "timesOpened": self.times_opened,
+        }
+
+
+class CircuitBreakerRegistry:
+    """Creates and holds one circuit per (endpoint, model) pair."""
+
+    def __init__(self, config: Optional[CircuitBreakerConfig] = None):
+        self.config = config or CircuitBreakerConfig()
+        self._breakers: Dict[Tuple[str, Optional[str]], CircuitBreaker] = {}
+
+    def get(self, endpoint: str, model: Optional[str] = None) -> CircuitBreaker:
+        key = (endpoint, model)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = CircuitBreaker(self.config)
+        return breaker
+
+    def get_states(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Circuit states as {endpoint: {model: state}}; "*" stands for no model."""
+        states: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for (endpoint, model), breaker in self._breakers.items():
+            states.setdefault(endpoint, {})[model or "*"] = breaker.get_state()
+        return states
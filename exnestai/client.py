@@ -1,8 +1,13 @@
 
 import httpx
 import asyncio
-import json
-from typing import Optional, List, Dict, Any, AsyncGenerator, Union
+import contextlib
+import dataclasses
+import os
+import threading
+import time
+import weakref
+from typing import Optional, List, Dict, Any, AsyncGenerator, Awaitable, Callable, Union, Iterable, Tuple
 from .models import (
     ExnestMessage,
     ExnestChatResponse,
@@ -10,7 +15,48 @@ from .models import (
     ExnestStreamChunk,
     ExnestResponse,
     ExnestModel,
-    EBCDecisionContext
+    EBCDecisionContext,
+    Error
+)
+from .transport import HostLimitedTransport, InFlightTracker
+from .retry import RetryPolicy, IDEMPOTENT_METHODS
+from .ratelimit import RateLimiter
+from .batch import BatchResult, run_batch, collect_batch
+from .circuit import CircuitBreakerConfig, CircuitBreakerRegistry, CircuitOpenError
+from .hedging import HedgePolicy, HedgeBudget
+from .metrics import LatencyHistogram
+from .decoding import decode
+from .compact import compact_model
+from .codec import JSONCodec, get_codec
+from .accumulator import StreamAccumulator
+from .streaming import ChunkStream, StreamBroadcast
+from .cache import ResponseCache, SQLiteCache, cache_key, is_deterministic
+from .coalesce import RequestCoalescer
+from .catalog import ModelCatalog
+from .core import (
+    require_h2,
+    check_raw,
+    total_tokens,
+    request_headers,
+    chat_body,
+    completion_body,
+    ebc_body,
+    retry_after,
+    retry_delay,
+    fallback_chain,
+    should_fail_over,
+    build_response,
+    models_params,
+    models_from,
+    model_from,
+    StreamDecoder,
+    StreamResume
+)
+
+# update_config() options that require building a new httpx client
+_TRANSPORT_OPTIONS = (
+    "base_url", "timeout", "max_connections", "max_keepalive_connections",
+    "keepalive_expiry", "max_connections_per_host", "http2"
 )
 
 class ExnestAI:
@@ -21,121 +67,784 @@ class ExnestAI:
         timeout: int = 30000,
         retries: int = 3,
         retry_delay: int = 1000,
-        debug: bool = False
+        debug: bool = False,
+        max_connections: Optional[int] = 100,
+        max_keepalive_connections: Optional[int] = 20,
+        keepalive_expiry: Optional[int] = 5000,
+        max_connections_per_host: Optional[int] = None,
+        http2: bool = False,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        circuit_breaker: Optional[CircuitBreakerConfig] = None,
+        hedging: Optional[HedgePolicy] = None,
+        compact_models: bool = False,
+        json_codec: Union[str, JSONCodec, None] = None,
+        cache: Union[ResponseCache, SQLiteCache, None] = None,
+        coalesce: bool = False,
+        model_catalog: Union[bool, ModelCatalog] = False
     ):
         if not api_key:
             raise ValueError("API key is required")
+        if http2 and transport is None:
+            require_h2()
+        if max_connections_per_host is not None and max_connections_per_host < 1:
+            raise ValueError("max_connections_per_host must be at least 1")
 
         self.api_key = api_key
         self.base_url = base_url
         self.timeout = timeout / 1000  # Convert ms to seconds for httpx
-        self.retries = retries
-        self.retry_delay = retry_delay / 1000  # Convert ms to seconds
+        self.retry_policy = retry_policy or RetryPolicy(max_retries=retries, base_delay=retry_delay)
+        self.retries = self.retry_policy.max_retries
+        self.retry_delay = self.retry_policy.base_delay / 1000  # Convert ms to seconds
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self._circuits = CircuitBreakerRegistry(circuit_breaker) if circuit_breaker else None
+        self.hedging = hedging
+        self.compact_models = compact_models
+        self.codec = get_codec(json_codec)
+        self.cache = cache
+        self._coalescer = RequestCoalescer() if coalesce else None
+        self.model_catalog = self._bind_catalog(model_catalog)
+        self._hedge_budget = HedgeBudget()
+        self._latency: Dict[Tuple[str, Optional[str]], LatencyHistogram] = {}
         self.debug = debug
-        self._client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout)
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry / 1000 if keepalive_expiry is not None else None
+        self.max_connections_per_host = max_connections_per_host
+        self.http2 = http2
+        self._custom_transport = transport
+        self._requests = InFlightTracker()
+        self._retire_tasks = set()
+        self._closed = False
+        # httpx clients are created on first use, one per event loop and process
+        self._pid = os.getpid()
+        self._pool_lock = threading.Lock()
+        self._loop_clients = weakref.WeakKeyDictionary()
+        self._unbound: Optional[Tuple[httpx.AsyncClient, HostLimitedTransport]] = None
+        # Every httpx client not closed yet, current or retired, with its transport and a
+        # weak reference to the loop owning its connections (None while unbound)
+        self._owners: Dict[httpx.AsyncClient, Tuple[HostLimitedTransport, Optional[weakref.ref]]] = {}
+
+    async def __aenter__(self) -> "ExnestAI":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+    async def aclose(self, timeout: Optional[int] = None) -> None:
+        """
+        Close the client. New requests are rejected immediately, in-flight
+        requests and streams get up to `timeout` ms (default: the request
+        timeout) to finish before all connections are closed.
+        """
+        if self._closed:
+            return
+        self._closed = True
+
+        deadline = timeout / 1000 if timeout is not None else self.timeout
+        try:
+            await asyncio.wait_for(self._requests.wait_idle(), deadline)
+        except asyncio.TimeoutError:
+            if self.debug:
+                print(f"[ExnestAI] Closing with {self._requests.count} request(s) still in flight")
+
+        current = asyncio.get_running_loop()
+        with self._pool_lock:
+            owners, self._owners = self._owners, {}
+        for task in list(self._retire_tasks):
+            if isinstance(task, asyncio.Task) and task.get_loop() is not current:
+                with contextlib.suppress(RuntimeError):  # its loop is already closed
+                    task.get_loop().call_soon_threadsafe(task.cancel)
+            else:
+                task.cancel()
+
+        # Connections can only be closed on the loop that opened them: clients
+        # of other running loops are closed there, and waited for here
+        elsewhere = []
+        for client, (_, owner_ref) in owners.items():
+            owner = owner_ref() if owner_ref is not None else None
+            if owner is None or owner is current:
+                await client.aclose()
+            elif owner.is_running():
+                elsewhere.append(asyncio.wrap_future(asyncio.run_coroutine_threadsafe(client.aclose(), owner)))
+            elif self.debug:
+                print("[ExnestAI] Cannot close a client whose event loop is no longer running")
+        if elsewhere:
+            await asyncio.wait(elsewhere, timeout=deadline)
+
+        if self._loop_clients.get(current) is None:
+            # Never used on this loop: rather than building a pool only to close it, leave a
+            # closed stand-in without one, so `_client` reports the client as closed
+            transport = HostLimitedTransport(httpx.AsyncBaseTransport())
+            stand_in = httpx.AsyncClient(transport=transport, trust_env=False)
+            await stand_in.aclose()
+            self._loop_clients[current] = (stand_in, transport)
+
+    def _retire_client(self, client: httpx.AsyncClient, transport: HostLimitedTransport) -> None:
+        """
+        Close a replaced httpx client once its in-flight requests finish,
+        so hot-swapping the transport neither drops nor leaks connections.
+        The client is drained and closed on the loop that owns it; until
+        then it stays registered, so `aclose()` still closes it.
+        """
+        owner_ref = self._owners.get(client, (None, None))[1]
+        owner = owner_ref() if owner_ref is not None else None
+        if owner is None or not owner.is_running():
+            return  # No loop to drain on; closed by aclose()
+
+        async def close_when_idle():
+            await transport.requests.wait_idle()
+            await client.aclose()
+            with self._pool_lock:
+                self._owners.pop(client, None)
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if owner is running:
+            task = owner.create_task(close_when_idle())
+        else:
+            # A concurrent future, which unlike a task may be cancelled from any thread
+            task = asyncio.run_coroutine_threadsafe(close_when_idle(), owner)
+        self._retire_tasks.add(task)
+        task.add_done_callback(self._retire_tasks.discard)
+
+    def _model(self, cls: type) -> type:
+        """Class to decode responses into: its slotted variant when `compact_models` is set."""
+        return compact_model(cls) if self.compact_models else cls
+
+    def _build_client(self) -> Tuple[httpx.AsyncClient, HostLimitedTransport]:
+        """
+        Build an httpx client with the configured pool limits. With
+        http2=True, requests to HTTPS hosts negotiate HTTP/2 and multiplex
+        over shared connections. A custom transport, when given, replaces
+        the default pooled one.
+        """
+        inner = self._custom_transport or httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry
+            ),
+            http2=self.http2
+        )
+        transport = HostLimitedTransport(inner, self.max_connections_per_host)
+        return httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, transport=transport), transport
+
+    def _current(self) -> Tuple[httpx.AsyncClient, HostLimitedTransport]:
+        """
+        The httpx client and transport for the running event loop, built
+        on first use. Pooled connections belong to the loop that opened
+        them, so each loop gets its own pool, and a client created outside
+        any loop (e.g. at import time) is handed to the first loop using it.
+
+        After a fork, the child starts with fresh pools instead of sharing
+        the parent's sockets, so a client created before gunicorn or
+        multiprocessing forks its workers stays safe to use in each of them.
+        """
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid = pid
+            # A parent thread may have held the lock while forking
+            self._pool_lock = threading.Lock()
+            self._loop_clients = weakref.WeakKeyDictionary()
+            self._unbound = None
+            self._owners = {}  # the parent's to close
+            self._retire_tasks = set()
+            self._requests = InFlightTracker()
+            if self.debug:
+                print(f"[ExnestAI] Fork detected, opening new connections in process {pid}")
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        else:
+            current = self._loop_clients.get(loop)
+            if current is not None:
+                return current
+
+        # Loops in other threads may race for the unbound client; only one may adopt it
+        with self._pool_lock:
+            if loop is None:
+                if self._unbound is None:
+                    self._unbound = self._build_client()
+                    self._owners[self._unbound[0]] = (self._unbound[1], None)
+                return self._unbound
+            current = self._loop_clients.get(loop)
+            if current is None:
+                self._release_dead_pools()
+                current, self._unbound = self._unbound or self._build_client(), None
+                self._loop_clients[loop] = current
+                self._owners[current[0]] = (current[1], weakref.ref(loop))
+            return current
+
+    def _release_dead_pools(self) -> None:
+        """
+        Forget the httpx clients of closed event loops, e.g. of earlier
+        `asyncio.run()` calls, and close their sockets directly, as
+        `aclose()` can no longer run without their loop. Called with
+        `_pool_lock` held, whenever a new loop gets its client.
+        """
+        for client, (transport, owner_ref) in list(self._owners.items()):
+            if owner_ref is None:
+                continue
+            owner = owner_ref()
+            if owner is None or owner.is_closed():
+                del self._owners[client]
+                if owner is not None:
+                    self._loop_clients.pop(owner, None)
+                transport.close_sockets()
+
+    @property
+    def _client(self) -> httpx.AsyncClient:
+        return self._current()[0]
+
+    @property
+    def _transport(self) -> HostLimitedTransport:
+        return self._current()[1]
 
     async def _execute_request(
-        self, method: str, endpoint: str, body: Optional[Dict[str, Any]] = None, params: Optional[Dict[str, Any]] = None
+        self, method: str, endpoint: str, body: Optional[Dict[str, Any]] = None, params: Optional[Dict[str, Any]] = None,
+        idempotent: Optional[bool] = None, retry_policy: Optional[RetryPolicy] = None
     ) -> Dict[str, Any]:
-        last_error = None
-        headers = {
-            "Content-Type": "application/json",
-            "User-Agent": "ExnestAI-Python-Client/1.0.0",
-            "Authorization": f"Bearer {self.api_key}"
-        }
+        content = await self._execute_raw_request(method, endpoint, body, params, idempotent, retry_policy)
+        return self.codec.loads(content)
+
+    async def _execute_raw_request(
+        self, method: str, endpoint: str, body: Optional[Dict[str, Any]] = None, params: Optional[Dict[str, Any]] = None,
+        idempotent: Optional[bool] = None, retry_policy: Optional[RetryPolicy] = None
+    ) -> bytes:
+        """Send a request with retries, rate limiting and circuit breaking, returning the undecoded body."""
+        if self._closed:
+            raise RuntimeError("ExnestAI client has been closed")
+
+        headers = request_headers(self.api_key)
 
-        for attempt in range(self.retries + 1):
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+
+        self._requests.enter()
+        try:
+            return await self._request_with_retries(
+                method, endpoint, body, params, headers, idempotent, retry_policy or self.retry_policy
+            )
+        finally:
+            self._requests.exit()
+
+    async def _request_with_retries(
+        self, method: str, endpoint: str, body: Optional[Dict[str, Any]], params: Optional[Dict[str, Any]],
+        headers: Dict[str, str], idempotent: bool, policy: RetryPolicy
+    ) -> bytes:
+        reserved = self.rate_limiter.estimate(body)
+        model = body.get("model") if body else None
+        attempt = 0
+        delay = None
+        while True:
             try:
+                waited = await self.rate_limiter.acquire(reserved)
                 if self.debug:
-                    print(f"[ExnestAI] Attempt {attempt + 1}/{self.retries + 1} - {method} {endpoint}")
-
-                response = await self._client.request(
-                    method,
-                    endpoint,
-                    json=body,
-                    params=params,
-                    headers=headers
-                )
+                    if waited:
+                        print(f"[ExnestAI] Waited {waited:.3f}s for rate limit")
+                    print(f"[ExnestAI] Attempt {attempt + 1}/{policy.max_retries + 1} - {method} {endpoint}")
+
+                start = time.monotonic()
+                async with self._circuit(endpoint, model) as record:
+                    response = await self._client.request(
+                        method,
+                        endpoint,
+                        content=self.codec.dumps(body) if body is not None else None,
+                        params=params,
+                        headers=headers
+                    )
+                    record(response)
+                self.rate_limiter.observe_headers(response.headers)
                 response.raise_for_status() # Raise an exception for bad status codes (4xx or 5xx)
-                result = response.json()
+                self._record_latency(endpoint, model, time.monotonic() - start)
+                content = response.content
 
                 if self.debug:
                     print(f"[ExnestAI] Response status: {response.status_code}")
-                    print(f"[ExnestAI] Response body: {result}")
+                    print(f"[ExnestAI] Response body: {content.decode(errors='replace')}")
 
-                return result
+                used = total_tokens(content)
+                if used is not None:
+                    self.rate_limiter.reconcile(reserved, used)
+                return content
 
+            except (CircuitOpenError, asyncio.CancelledError):
+                # Cancelled requests, such as the losing side of a hedge, give their tokens back
+                self.rate_limiter.reconcile(reserved, 0)
+                raise
             except (httpx.RequestError, httpx.HTTPStatusError) as e:
-                last_error = e
+                self.rate_limiter.reconcile(reserved, 0)
                 if self.debug:
                     print(f"[ExnestAI] Attempt {attempt + 1} failed: {e}")
-                if attempt < self.retries:
-                    await asyncio.sleep(self.retry_delay * (attempt + 1))
-        
-        raise last_error # Re-raise the last error if all retries fail
+
+                wait, delay = self._retry_wait(e, attempt, idempotent, policy, delay)
+                await asyncio.sleep(wait)
+                attempt += 1
+
+    def _retry_wait(
+        self, error: Exception, attempt: int, idempotent: bool, policy: RetryPolicy, previous_delay: Optional[float]
+    ) -> Tuple[float, Optional[float]]:
+        """
+        `retry_delay()` for a failed attempt. A Retry-After also pauses
+        every request sharing the rate limiter, never longer than this
+        client would wait itself.
+        """
+        wait = retry_after(error, policy)
+        if wait is not None:
+            self.rate_limiter.block_for(min(wait, policy.max_retry_after / 1000))
+        return retry_delay(error, attempt, idempotent, policy, previous_delay, self.debug)
 
     async def _execute_stream_request(
-        self, endpoint: str, body: Dict[str, Any]
+        self, endpoint: str, body: Dict[str, Any], resume: bool = False
     ) -> AsyncGenerator[ExnestStreamChunk, None]:
-        headers = {
-            "Content-Type": "application/json",
-            "User-Agent": "ExnestAI-Python-Client/1.0.0",
-            "Authorization": f"Bearer {self.api_key}",
-            "Accept": "text/event-stream"
-        }
+        """
+        Stream `body` from `endpoint`. Failures before the first chunk are
+        retried under the retry policy. With `resume`, a connection lost
+        after partial output is recovered by requesting a continuation of
+        the text received so far, so the caller sees one uninterrupted
+        stream instead of losing (and paying again for) the whole answer.
+        """
         body['stream'] = True
+        progress = StreamResume(body, resume)
+        request_body = body
+        attempt = 0
+        delay = None
+        while True:
+            started = False
+            try:
+                # Closed explicitly so a closed or abandoned stream releases its connection at once
+                chunks = self._stream_attempt(endpoint, request_body)
+                try:
+                    async for chunk in chunks:
+                        started = True
+                        progress.record(chunk)
+                        yield chunk
+                finally:
+                    await chunks.aclose()
+                return
+            except (httpx.RequestError, httpx.HTTPStatusError) as e:
+                if self.debug:
+                    print(f"[ExnestAI] Stream attempt {attempt + 1} failed: {e}")
+                if started and not progress.enabled:
+                    raise
+                wait, delay = self._retry_wait(e, attempt, False, self.retry_policy, delay)
+                await asyncio.sleep(wait)
+                attempt += 1
+                request_body = progress.next_body(self.debug)
 
-        async with self._client.stream("POST", endpoint, json=body, headers=headers) as response:
-            response.raise_for_status()
-            async for line in response.aiter_lines():
-                if line.startswith("data:"):
-                    data_str = line[len("data:"):].strip()
-                    if data_str == "[DONE]":
+    async def _stream_attempt(self, endpoint: str, body: Dict[str, Any]) -> AsyncGenerator[ExnestStreamChunk, None]:
+        """A single streaming request, without retries."""
+        headers = request_headers(self.api_key, stream=True)
+
+        if self._closed:
+            raise RuntimeError("ExnestAI client has been closed")
+
+        reserved = self.rate_limiter.estimate(body)
+        settled = False
+        self._requests.enter()
+        try:
+            await self.rate_limiter.acquire(reserved)
+            async with contextlib.AsyncExitStack() as stack:
+                async with self._circuit(endpoint, body.get("model")) as record:
+                    response = await stack.enter_async_context(
+                        self._client.stream("POST", endpoint, content=self.codec.dumps(body), headers=headers)
+                    )
+                    record(response)
+                self.rate_limiter.observe_headers(response.headers)
+                response.raise_for_status()
+                decoder = StreamDecoder(self._model(ExnestStreamChunk), self.codec.loads, self.debug)
+                # aiter_bytes rather than aiter_raw, so compressed streams are decoded
+                async for raw_chunk in response.aiter_bytes():
+                    for chunk_data, chunk in decoder.feed(raw_chunk):
+                        if not settled and chunk_data.get("usage"):
+                            settled = self._settle_tokens(reserved, chunk_data)
+                        yield chunk
+                    if decoder.done:
                         return
-                    try:
-                        chunk_data = json.loads(data_str)
-                        yield ExnestStreamChunk(**chunk_data)
-                    except json.JSONDecodeError:
-                        if self.debug:
-                            print(f"[ExnestAI] Failed to parse stream chunk: {data_str}")
-
-    async def completion(self, model: str, prompt: str, **kwargs) -> ExnestCompletionResponse:
-        body = {
-            "model": model,
-            "prompt": prompt,
-            **kwargs
-        }
-        response_data = await self._execute_request("POST", "/completions", body)
-        return ExnestCompletionResponse(**response_data)
-
-    async def chat(self, model: str, messages: List[ExnestMessage], **kwargs) -> ExnestChatResponse:
-        body = {
-            "model": model,
-            "messages": [msg.__dict__ for msg in messages],
-            **kwargs
-        }
-        response_data = await self._execute_request("POST", "/chat/completions", body)
-        return ExnestChatResponse(**response_data)
-
-    async def stream_completion(self, model: str, prompt: str, **kwargs) -> AsyncGenerator[ExnestStreamChunk, None]:
-        body = {
-            "model": model,
-            "prompt": prompt,
-            **kwargs
-        }
-        async for chunk in self._execute_stream_request("/completions", body):
-            yield chunk
-
-    async def stream(self, model: str, messages: List[ExnestMessage], **kwargs) -> AsyncGenerator[ExnestStreamChunk, None]:
-        body = {
-            "model": model,
-            "messages": [msg.__dict__ for msg in messages],
-            **kwargs
+        except (httpx.RequestError, httpx.HTTPStatusError, CircuitOpenError):
+            if not settled:
+                self.rate_limiter.reconcile(reserved, 0)
+                settled = True
+            raise
+        finally:
+            self._requests.exit()
+
+    @contextlib.asynccontextmanager
+    async def _circuit(self, endpoint: str, model: Optional[str]):
+        """
+        Guard one request with the circuit breaker for its endpoint and
+        model. Fails fast with CircuitOpenError while the circuit is open;
+        otherwise records the outcome: network errors and 5xx responses
+        count as failures, latency is measured until response headers.
+        """
+        if self._circuits is None:
+            yield lambda response: None
+            return
+
+        breaker = self._circuits.get(endpoint, model)
+        if not breaker.allow():
+            raise CircuitOpenError(endpoint, model, breaker.retry_in())
+
+        start = time.monotonic()
+        recorded = False
+
+        def record(response: httpx.Response) -> None:
+            nonlocal recorded
+            recorded = True
+            previous = breaker.state
+            breaker.record(response.status_code >= 500, time.monotonic() - start)
+            if self.debug and breaker.state != previous:
+                print(f"[ExnestAI] Circuit for {endpoint} ({model}) is now {breaker.state}")
+
+        try:
+            yield record
+        except httpx.RequestError:
+            if not recorded:
+                recorded = True
+                breaker.record(True, time.monotonic() - start)
+                if self.debug:
+                    print(f"[ExnestAI] Circuit for {endpoint} ({model}) is now {breaker.state}")
+            raise
+        finally:
+            if not recorded:
+                breaker.release()
+
+    def get_circuit_states(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        Circuit breaker state per endpoint and model, e.g.
+        {"/chat/completions": {"openai:gpt-4o-mini": {"state": "open", ...}}}.
+        Empty when circuit breaking is disabled.
+        """
+        return self._circuits.get_states() if self._circuits else {}
+
+    def _record_latency(self, endpoint: str, model: Optional[str], latency: float) -> None:
+        histogram = self._latency.get((endpoint, model))
+        if histogram is None:
+            histogram = self._latency[(endpoint, model)] = LatencyHistogram()
+        histogram.record(latency)
+
+    def get_latency_stats(self) -> Dict[str, Any]:
+        """
+        Latency percentiles (ms) of successful requests per endpoint and
+        model, plus hedging counters, e.g.
+        {"endpoints": {"/chat/completions": {"openai:gpt-4o-mini": {"p95": ...}}},
+         "hedges": {"sent": 3, "denied": 1}}.
+        """
+        endpoints: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for (endpoint, model), histogram in self._latency.items():
+            endpoints.setdefault(endpoint, {})[model or "*"] = histogram.get_stats()
+        return {
+            "endpoints": endpoints,
+            "hedges": {"sent": self._hedge_budget.hedges_sent, "denied": self._hedge_budget.hedges_denied}
         }
-        async for chunk in self._execute_stream_request("/chat/completions", body):
-            yield chunk
 
-    async def responses(self, model: str, input_str: str, max_tokens: int = 200) -> ExnestChatResponse:
+    async def _execute_hedged(
+        self, endpoint: str, body: Dict[str, Any], policy: HedgePolicy, retry_policy: Optional[RetryPolicy]
+    ) -> Tuple[bytes, str]:
+        """
+        POST `body`, sending a hedge if no answer arrives within the policy's
+        delay. Returns the first successful response and the model that
+        produced it; the slower request is cancelled.
+        """
+        model = body["model"]
+        delay = policy.get_delay(self._latency.get((endpoint, model)))
+        self._hedge_budget.on_request(policy.max_hedge_ratio)
+
+        primary = asyncio.ensure_future(self._execute_raw_request("POST", endpoint, body, retry_policy=retry_policy))
+        served_by = {primary: model}
+        # Whatever ends this call, including the caller being cancelled, no request is left running
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not self._hedge_budget.try_spend():
+                return await primary, model
+
+            hedge_model = policy.model or model
+            hedge_endpoint = policy.base_url.rstrip("/") + endpoint if policy.base_url else endpoint
+            if self.debug:
+                print(f"[ExnestAI] No response after {delay:.3f}s, hedging to {hedge_model} via {hedge_endpoint}")
+            hedge = asyncio.ensure_future(
+                self._execute_raw_request(
+                    "POST", hedge_endpoint, {**body, "model": hedge_model}, retry_policy=retry_policy
+                )
+            )
+            served_by[hedge] = hedge_model
+
+            pending = {primary, hedge}
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result(), served_by[task]
+                    if error is None or task is primary:
+                        error = task.exception()
+            raise error
+        finally:
+            unfinished = [task for task in served_by if not task.done()]
+            for task in unfinished:
+                task.cancel()
+            await asyncio.gather(*unfinished, return_exceptions=True)
+
+    def _settle_tokens(self, reserved: int, result: Any) -> bool:
+        """
+        Reconcile a rate limiter reservation with the usage reported in a
+        response. Returns False, keeping the reservation, when none is given.
+        """
+        usage = result.get("usage") if isinstance(result, dict) else None
+        if not isinstance(usage, dict) or usage.get("total_tokens") is None:
+            return False
+        self.rate_limiter.reconcile(reserved, usage["total_tokens"])
+        return True
+
+    async def _with_fallback(self, model: Union[str, List[str]], send):
+        """
+        Call `send(model, retry_policy)` for each model in a fallback chain
+        until one succeeds. A model falls through to the next on retryable
+        errors, timeouts and open circuits; other errors are raised as is.
+        Every model but the last gets a single attempt, so a provider
+        incident costs one failed request rather than a full retry cycle.
+        """
+        chain = fallback_chain(model, self.retry_policy)
+        for position, (name, retry_policy) in enumerate(chain):
+            is_last = position == len(chain) - 1
+            try:
+                response = await send(name, retry_policy)
+            except Exception as e:
+                if is_last or not should_fail_over(e, self.retry_policy):
+                    raise
+                if self.debug:
+                    print(f"[ExnestAI] {name} failed ({e}), falling back to {chain[position + 1][0]}")
+                continue
+            if not isinstance(response, bytes) and response.served_model is None:
+                response.served_model = name
+            return response
+
+    def _cache_key(self, endpoint: str, body: Dict[str, Any], cache: Optional[bool]) -> Optional[str]:
+        """Cache key for a request, or None when it should not use the response cache."""
+        if self.cache is None or not (cache or (cache is None and is_deterministic(body))):
+            return None
+        return cache_key(f"{self.base_url}{endpoint}", body)
+
+    async def _cache_call(self, method: Callable[..., Any], *args: Any) -> Any:
+        """Call a response cache method, off the event loop when the cache does blocking I/O."""
+        if getattr(self.cache, "blocking", False):
+            return await asyncio.get_running_loop().run_in_executor(None, method, *args)
+        return method(*args)
+
+    async def _shared_post(
+        self, endpoint: str, body: Dict[str, Any], cache: Optional[bool],
+        fetch: Callable[[], Awaitable[Tuple[bytes, Optional[str]]]], options: Any = None
+    ) -> Tuple[bytes, Optional[str]]:
+        """
+        Run `fetch()` for a POST of `body`, unless the response cache has
+        the answer or, with coalescing, an identical request is already in
+        flight, in which case its result is shared. Only requests with
+        equal `options`, the settings that change how `fetch()` sends the
+        request, are coalesced; the cache ignores them.
+        """
+        if self._closed:
+            raise RuntimeError("ExnestAI client has been closed")
+
+        key = self._cache_key(endpoint, body, cache)
+        if key is not None:
+            entry = await self._cache_call(self.cache.get_entry, key)
+            if entry is not None:
+                if self.debug:
+                    print(f"[ExnestAI] Cache hit - POST {endpoint}")
+                # The stored model, which differs from the requested one when a hedge answered
+                return entry
+
+        async def fetch_and_store() -> Tuple[bytes, Optional[str]]:
+            result = await fetch()
+            if key is not None:
+                await self._cache_call(self.cache.set, key, *result)
+            return result
+
+        if self._coalescer is None:
+            return await fetch_and_store()
+        url = f"{self.base_url}{endpoint}"
+        if options is not None:
+            url = f"{url}\n{options!r}"
+        return await self._coalescer.run(cache_key(url, body), fetch_and_store)
+
+    async def _send_post(
+        self, endpoint: str, body: Dict[str, Any], hedge: Union[bool, HedgePolicy], retry_policy: Optional[RetryPolicy],
+        cache: Optional[bool] = None
+    ) -> Tuple[bytes, str]:
+        """
+        POST `body`, hedged when requested, going through the response
+        cache and request coalescing. Returns the response body and the
+        model that served it.
+        """
+        async def fetch() -> Tuple[bytes, str]:
+            if not hedge:
+                return await self._execute_raw_request("POST", endpoint, body, retry_policy=retry_policy), body["model"]
+            policy = hedge if isinstance(hedge, HedgePolicy) else self.hedging or HedgePolicy()
+            return await self._execute_hedged(endpoint, body, policy, retry_policy)
+
+        return await self._shared_post(endpoint, body, cache, fetch, (hedge, retry_policy))
+
+    def _build_response(self, cls: type, content: bytes, raw: Union[bool, str], served_model: Optional[str] = None):
+        """The response body as raw bytes, a LazyResponse or a decoded `cls`, depending on `raw`."""
+        return build_response(self._model(cls), content, raw, served_model, self.codec.loads)
+
+    async def _post_ebc(
+        self, endpoint: str, body: Dict[str, Any], raw: Union[bool, str], cache: Optional[bool] = None
+    ) -> ExnestChatResponse:
+        if raw or self._coalescer is not None or self._cache_key(endpoint, body, cache) is not None:
+            async def fetch() -> Tuple[bytes, None]:
+                return await self._execute_raw_request("POST", endpoint, body), None
+
+            content, _ = await self._shared_post(endpoint, body, cache, fetch)
+            return self._build_response(ExnestChatResponse, content, raw)
+        return decode(self._model(ExnestChatResponse), await self._execute_request("POST", endpoint, body))
+
+    async def completion(
+        self, model: Union[str, List[str]], prompt: str, hedge: Union[bool, HedgePolicy] = False,
+        raw: Union[bool, str] = False, cache: Optional[bool] = None, **kwargs
+    ) -> ExnestCompletionResponse:
+        """
+        Text completion. `model` may be a list of models to fail over
+        through; `response.served_model` tells which one answered. Pass
+        `hedge=True` (or a HedgePolicy) to hedge slow requests,
+        `raw=True` or `raw="lazy"` to skip decoding, and `cache` to
+        override response caching (see `chat()`).
+        """
+        check_raw(raw)
+
+        async def send(name: str, retry_policy: Optional[RetryPolicy]) -> ExnestCompletionResponse:
+            body = completion_body(name, prompt, kwargs)
+            content, served = await self._send_post("/completions", body, hedge, retry_policy, cache)
+            return self._build_response(ExnestCompletionResponse, content, raw, served)
+
+        return await self._with_fallback(model, send)
+
+    async def chat(
+        self, model: Union[str, List[str]], messages: List[ExnestMessage], hedge: Union[bool, HedgePolicy] = False,
+        raw: Union[bool, str] = False, cache: Optional[bool] = None, **kwargs
+    ) -> ExnestChatResponse:
+        """
+        Chat completion. `model` may be a list of models to fail over
+        through; `response.served_model` tells which one answered. Pass
+        `hedge=True` (or a HedgePolicy) for latency-critical calls: a
+        duplicate is sent when the first attempt is slower than usual.
+
+        With `raw=True` (or `raw="bytes"`) the undecoded response body is
+        returned, for pipelines that only forward it. `raw="lazy"` returns
+        a LazyResponse that parses fields on first access.
+
+        When the client has a response cache, requests with
+        `temperature=0` are answered from it; `cache=True` caches any
+        request and `cache=False` bypasses the cache for this call.
+        """
+        check_raw(raw)
+
+        async def send(name: str, retry_policy: Optional[RetryPolicy]) -> ExnestChatResponse:
+            body = chat_body(name, messages, kwargs)
+            content, served = await self._send_post("/chat/completions", body, hedge, retry_policy, cache)
+            return self._build_response(ExnestChatResponse, content, raw, served)
+
+        return await self._with_fallback(model, send)
+
+    def stream_completion(
+        self, model: str, prompt: str, resume: bool = False, read_ahead: int = 0, **kwargs
+    ) -> ChunkStream:
+        """Stream a text completion. See `stream()` for `resume` and `read_ahead`."""
+        body = completion_body(model, prompt, kwargs)
+        return ChunkStream(self._execute_stream_request("/completions", body, resume), read_ahead)
+
+    def stream(
+        self, model: str, messages: List[ExnestMessage], collect: Union[bool, StreamAccumulator] = False,
+        resume: bool = False, read_ahead: int = 0, **kwargs
+    ) -> Union[ChunkStream, Awaitable[ExnestChatResponse]]:
+        """
+        Stream a chat completion, yielding chunks as they arrive. Errors
+        before the first chunk are retried like other requests. With
+        `resume=True`, a connection dropped mid-stream is recovered by
+        asking the model to continue from the text already received.
+
+        The returned ChunkStream releases its connection when exhausted,
+        cancelled or closed; use it with `async with` when you may stop
+        early. `read_ahead` buffers up to that many chunks in the
+        background for consumers slower than the network.
+
+        With `collect=True`, returns an awaitable for the complete
+        ExnestChatResponse instead. Pass a StreamAccumulator as `collect`
+        to also read its time-to-first-token and inter-token latency.
+        """
+        body = chat_body(model, messages, kwargs)
+        chunks = self._execute_stream_request("/chat/completions", body, resume)
+        if collect is False:
+            return ChunkStream(chunks, read_ahead)
+        accumulator = StreamAccumulator() if collect is True else collect
+        return self._collect_stream(chunks, accumulator)
+
+    def broadcast(
+        self, model: str, messages: List[ExnestMessage], max_queue: int = 64, policy: str = "block",
+        resume: bool = False, **kwargs
+    ) -> StreamBroadcast:
+        """
+        Stream a chat completion once and share it between several
+        consumers. Call `subscribe()` on the result for each consumer,
+        optionally with its own `max_queue` and `policy` ("block", "drop"
+        or "detach"), then iterate the subscriptions concurrently.
+        """
+        body = chat_body(model, messages, kwargs)
+        return StreamBroadcast(self._execute_stream_request("/chat/completions", body, resume), max_queue, policy)
+
+    async def _collect_stream(
+        self, chunks: AsyncGenerator[ExnestStreamChunk, None], accumulator: StreamAccumulator
+    ) -> ExnestChatResponse:
+        accumulator.start()
+        async for chunk in chunks:
+            accumulator.add(chunk)
+        if self.debug:
+            print(f"[ExnestAI] Stream collected: {accumulator.get_stats()}")
+        return accumulator.response(self._model(ExnestChatResponse))
+
+    async def chat_many(
+        self, requests: Iterable[Dict[str, Any]], concurrency: int = 8
+    ) -> List[BatchResult]:
+        """
+        Run many chat requests with at most `concurrency` in flight.
+        Each request is a dict of `chat()` arguments (model, messages and
+        options). Results come back in request order; a failed item holds
+        its exception in `error` instead of aborting the batch.
+        """
+        return await collect_batch(self.chat, requests, concurrency)
+
+    def chat_many_as_completed(
+        self, requests: Iterable[Dict[str, Any]], concurrency: int = 8
+    ) -> AsyncGenerator[BatchResult, None]:
+        """
+        Like `chat_many()`, but yields each result as soon as it completes.
+        Use `result.index` to match it to its request.
+        """
+        return run_batch(self.chat, requests, concurrency)
+
+    async def completion_many(
+        self, requests: Iterable[Dict[str, Any]], concurrency: int = 8
+    ) -> List[BatchResult]:
+        """
+        Run many completion requests with at most `concurrency` in flight.
+        Each request is a dict of `completion()` arguments (model, prompt
+        and options). Results come back in request order.
+        """
+        return await collect_batch(self.completion, requests, concurrency)
+
+    def completion_many_as_completed(
+        self, requests: Iterable[Dict[str, Any]], concurrency: int = 8
+    ) -> AsyncGenerator[BatchResult, None]:
+        """Like `completion_many()`, but yields each result as soon as it completes."""
+        return run_batch(self.completion, requests, concurrency)
+
+    async def responses(self, model: Union[str, List[str]], input_str: str, max_tokens: int = 200) -> ExnestChatResponse:
         """
         Simple response method for single-turn conversations
         """
@@ -144,92 +853,89 @@ class ExnestAI:
         
         return await self.chat(model, [ExnestMessage(role="user", content=input_str)], max_tokens=max_tokens)
 
-    async def deep_think(self, messages: List[ExnestMessage], **kwargs) -> ExnestChatResponse:
+    async def deep_think(
+        self, messages: List[ExnestMessage], raw: Union[bool, str] = False, cache: Optional[bool] = None, **kwargs
+    ) -> ExnestChatResponse:
         """
         EBC Deep Think Analysis
         Performs advanced reasoning and decision making
         """
-        body = {
-            "messages": [msg.__dict__ for msg in messages],
-            **kwargs
-        }
-        response_data = await self._execute_request("POST", "/ebc/deep-think", body)
-        return ExnestChatResponse(**response_data)
+        check_raw(raw)
+        body = ebc_body(messages, kwargs)
+        return await self._post_ebc("/ebc/deep-think", body, raw, cache)
 
     async def structured_decision(
-        self, messages: List[ExnestMessage], context: EBCDecisionContext, **kwargs
+        self, messages: List[ExnestMessage], context: EBCDecisionContext, raw: Union[bool, str] = False,
+        cache: Optional[bool] = None, **kwargs
     ) -> ExnestChatResponse:
         """
         EBC Structured Decision Making
         Performs structured analysis based on decision context
         """
-        body = {
-            "messages": [msg.__dict__ for msg in messages],
-            "context": context.__dict__,
-            **kwargs
-        }
-        response_data = await self._execute_request("POST", "/decision-making/session", body)
-        return ExnestChatResponse(**response_data)
+        check_raw(raw)
+        body = ebc_body(messages, kwargs, context)
+        return await self._post_ebc("/decision-making/session", body, raw, cache)
 
-    async def delegate(self, messages: List[ExnestMessage], **kwargs) -> ExnestChatResponse:
+    async def delegate(
+        self, messages: List[ExnestMessage], raw: Union[bool, str] = False, cache: Optional[bool] = None, **kwargs
+    ) -> ExnestChatResponse:
         """
         EBC Task Delegation
         Quick reasoning for task delegation and action dispatch
         """
-        body = {
-            "messages": [msg.__dict__ for msg in messages],
-            **kwargs
-        }
-        response_data = await self._execute_request("POST", "/ebc/delegate", body)
-        return ExnestChatResponse(**response_data)
+        check_raw(raw)
+        body = ebc_body(messages, kwargs)
+        return await self._post_ebc("/ebc/delegate", body, raw, cache)
+
+    def _bind_catalog(self, catalog: Union[bool, ModelCatalog]) -> Optional[ModelCatalog]:
+        if catalog is True:
+            catalog = ModelCatalog()
+        if not catalog:
+            return None
+        if catalog.load is None:
+            catalog.load = self._load_catalog
+        return catalog
+
+    async def _load_catalog(self) -> List[ExnestModel]:
+        models = await self._request_models()
+        if not isinstance(models, list):
+            raise ValueError("Unexpected /models response: expected a list of models")
+        return models
 
     async def get_models(self, openai_compatible: bool = False) -> Union[List[ExnestModel], Dict[str, Any]]:
-        params = {}
-        if openai_compatible:
-            params["openai_compatible"] = "true"
-            
-        response_data = await self._execute_request("GET", "/models", params=params)
-        
-        # Handle v1 response wrapper if not openai compatible
-        if not openai_compatible and isinstance(response_data, dict) and "data" in response_data:
-             if "models" in response_data["data"]:
-                 response_data = response_data["data"]["models"]
-        
-        if isinstance(response_data, list):
-            return [ExnestModel(**model_data) for model_data in response_data]
-        return response_data
+        """All available models, served from the model catalog when enabled."""
+        if self.model_catalog is not None and not openai_compatible:
+            return await self.model_catalog.models()
+        return await self._request_models(openai_compatible)
 
-    async def get_model(self, model_name: str, openai_compatible: bool = False) -> Union[ExnestModel, Dict[str, Any]]:
-        params = {}
-        if openai_compatible:
-            params["openai_compatible"] = "true"
+    async def _request_models(self, openai_compatible: bool = False) -> Union[List[ExnestModel], Dict[str, Any]]:
+        response_data = await self._execute_request("GET", "/models", params=models_params(openai_compatible))
+        return models_from(response_data, self._model(ExnestModel), openai_compatible)
 
-        response_data = await self._execute_request("GET", f"/models/{model_name}", params=params)
-        
-        # Handle v1 response wrapper
-        if not openai_compatible and isinstance(response_data, dict) and "data" in response_data:
-            response_data = response_data["data"]
+    async def get_model(self, model_name: str, openai_compatible: bool = False) -> Union[ExnestModel, Dict[str, Any]]:
+        """
+        One model by id. With the model catalog enabled it is looked up
+        locally; models missing from the catalog are still requested.
+        """
+        if self.model_catalog is not None and not openai_compatible:
+            model = await self.model_catalog.get(model_name)
+            if model is not None:
+                return model
 
-        if openai_compatible:
-             return response_data
-             
-        return ExnestModel(**response_data)
+        response_data = await self._execute_request(
+            "GET", f"/models/{model_name}", params=models_params(openai_compatible)
+        )
+        return model_from(response_data, self._model(ExnestModel), openai_compatible)
 
     async def get_models_by_provider(self, provider: str, openai_compatible: bool = False) -> Union[List[ExnestModel], Dict[str, Any]]:
-        params = {}
-        if openai_compatible:
-            params["openai_compatible"] = "true"
+        """Models of one provider, served from the model catalog when enabled."""
+        if self.model_catalog is not None and not openai_compatible:
+            return await self.model_catalog.by_provider(provider)
 
-        response_data = await self._execute_request("GET", f"/models/provider/{provider}", params=params)
-        
-        # Handle v1 response wrapper
-        if not openai_compatible and isinstance(response_data, dict) and "data" in response_data:
-             if "models" in response_data["data"]:
-                 response_data = response_data["data"]["models"]
-
-        if isinstance(response_data, list):
-            return [ExnestModel(**model_data) for model_data in response_data]
-        return response_data
+        response_data = await self._execute_request(
+            "GET", f"/models/provider/{provider}", params=models_params(openai_compatible)
+        )
+        return models_from(response_data, self._model(ExnestModel), openai_compatible)
 
     def get_config(self) -> Dict[str, Any]:
         return {
@@ -237,24 +943,108 @@ class ExnestAI:
             "timeout": self.timeout * 1000,
             "retries": self.retries,
             "retryDelay": self.retry_delay * 1000,
+            "retryPolicy": {
+                "maxRetries": self.retry_policy.max_retries,
+                "baseDelay": self.retry_policy.base_delay,
+                "maxDelay": self.retry_policy.max_delay,
+                "multiplier": self.retry_policy.multiplier,
+                "jitter": self.retry_policy.jitter,
+                "retryStatuses": sorted(self.retry_policy.retry_statuses),
+                "retryNonIdempotent": self.retry_policy.retry_non_idempotent,
+                "respectRetryAfter": self.retry_policy.respect_retry_after,
+                "maxRetryAfter": self.retry_policy.max_retry_after
+            },
             "debug": self.debug,
+            "maxConnections": self.max_connections,
+            "maxKeepaliveConnections": self.max_keepalive_connections,
+            "keepaliveExpiry": self.keepalive_expiry * 1000 if self.keepalive_expiry is not None else None,
+            "maxConnectionsPerHost": self.max_connections_per_host,
+            "http2": self.http2,
+            "compactModels": self.compact_models,
+            "jsonCodec": self.codec.name,
+            "cache": self.cache is not None,
+            "coalesce": self._coalescer is not None,
+            "modelCatalog": self.model_catalog is not None,
             "apiKey": f"****{self.api_key[-4:]}"
         }
 
+    def get_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Response cache hits, misses and occupancy, or None without a cache."""
+        return self.cache.get_stats() if self.cache is not None else None
+
+    def get_coalescing_stats(self) -> Optional[Dict[str, Any]]:
+        """Upstream calls made and calls saved by request coalescing, or None when it is off."""
+        return self._coalescer.get_stats() if self._coalescer is not None else None
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """
+        Connection pool occupancy: open/idle/active connections, queued and
+        in-flight requests, and the configured limits, for pool sizing.
+        """
+        stats = self._transport.get_stats()
+        stats["limits"] = {
+            "maxConnections": self.max_connections,
+            "maxKeepaliveConnections": self.max_keepalive_connections,
+            "keepaliveExpiry": self.keepalive_expiry * 1000 if self.keepalive_expiry is not None else None,
+            "maxConnectionsPerHost": self.max_connections_per_host
+        }
+        return stats
+
     def update_config(self, **kwargs):
+        """
+        Update client settings. Changes that affect the transport (base URL,
+        timeout, pool limits, HTTP/2) swap in a new httpx client; the old one
+        keeps serving its in-flight requests and is closed once they finish.
+        """
         if "api_key" in kwargs: self.api_key = kwargs["api_key"]
         if "base_url" in kwargs: self.base_url = kwargs["base_url"]
         if "timeout" in kwargs: self.timeout = kwargs["timeout"] / 1000
-        if "retries" in kwargs: self.retries = kwargs["retries"]
-        if "retry_delay" in kwargs: self.retry_delay = kwargs["retry_delay"] / 1000
+        if "retry_policy" in kwargs: self.retry_policy = kwargs["retry_policy"]
+        if "retries" in kwargs:
+            self.retry_policy = dataclasses.replace(self.retry_policy, max_retries=kwargs["retries"])
+        if "retry_delay" in kwargs:
+            self.retry_policy = dataclasses.replace(self.retry_policy, base_delay=kwargs["retry_delay"])
+        self.retries = self.retry_policy.max_retries
+        self.retry_delay = self.retry_policy.base_delay / 1000
         if "debug" in kwargs: self.debug = kwargs["debug"]
-        self._client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout)
+        if "rate_limiter" in kwargs: self.rate_limiter = kwargs["rate_limiter"]
+        if "compact_models" in kwargs: self.compact_models = kwargs["compact_models"]
+        if "json_codec" in kwargs: self.codec = get_codec(kwargs["json_codec"])
+        if "cache" in kwargs: self.cache = kwargs["cache"]
+        if "model_catalog" in kwargs: self.model_catalog = self._bind_catalog(kwargs["model_catalog"])
+        if "coalesce" in kwargs:
+            if not kwargs["coalesce"]:
+                self._coalescer = None
+            elif self._coalescer is None:
+                self._coalescer = RequestCoalescer()
+        if "max_connections" in kwargs: self.max_connections = kwargs["max_connections"]
+        if "max_keepalive_connections" in kwargs: self.max_keepalive_connections = kwargs["max_keepalive_connections"]
+        if "keepalive_expiry" in kwargs:
+            expiry = kwargs["keepalive_expiry"]
+            self.keepalive_expiry = expiry / 1000 if expiry is not None else None
+        if "max_connections_per_host" in kwargs: self.max_connections_per_host = kwargs["max_connections_per_host"]
+        if "http2" in kwargs:
+            if kwargs["http2"] and self._custom_transport is None:
+                require_h2()
+            self.http2 = kwargs["http2"]
+
+        if any(key in kwargs for key in _TRANSPORT_OPTIONS):
+            # Every loop picks up the new settings on its next request
+            with self._pool_lock:
+                retired = list(self._loop_clients.values())
+                if self._unbound is not None:
+                    retired.append(self._unbound)
+                self._loop_clients = weakref.WeakKeyDictionary()
+                self._unbound = None
+            for old_client, old_transport in retired:
+                self._retire_client(old_client, old_transport)
 
     async def test_connection(self) -> ExnestResponse:
         try:
             return await self.chat("openai:gpt-3.5-turbo", [ExnestMessage(role="user", content="Hello")], max_tokens=5)
         except Exception as e:
-            return ExnestChatResponse(error={"message": str(e), "type": "client_error", "code": "connection_error"})
+            error = self._model(Error)(message=str(e), type="client_error", code="connection_error")
+            return self._model(ExnestChatResponse)(error=error)
 
     async def health_check(self) -> Dict[str, Any]:
         test_result = await self.test_connection()
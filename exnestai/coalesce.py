@@ -0,0 +1,50 @@
+"""
+Coalescing of identical in-flight requests.
+"""
+
+import asyncio
+import weakref
+from typing import Any, Awaitable, Callable, Dict
+
+
+class RequestCoalescer:
+    """
+    Singleflight for requests: while a call for a key is in flight, other
+    callers with the same key wait for its result instead of sending
+    their own request. The shared call runs in its own task, so a caller
+    that is cancelled does not cancel it for the others.
+
+    Keys only match within one event loop; each loop has its own table.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight = weakref.WeakKeyDictionary()
+
+    async def run(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Result of `fetch()`, shared with every concurrent caller using `key`."""
+        in_flight: Dict[str, asyncio.Task] = self._in_flight.setdefault(asyncio.get_running_loop(), {})
+        task = in_flight.get(key)
+        if task is None:
+            self.calls += 1
+            task = in_flight[key] = asyncio.ensure_future(fetch())
+            task.add_done_callback(lambda done: self._finish(in_flight, key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    @staticmethod
+    def _finish(in_flight: Dict[str, asyncio.Task], key: str, task: asyncio.Task) -> None:
+        if in_flight.get(key) is task:
+            del in_flight[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here in case every waiter was cancelled
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Upstream calls made, calls saved by joining one in flight, and calls in flight now."""
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "inFlight": sum(len(in_flight) for in_flight in self._in_flight.values())
+        }
@@ -0,0 +1,95 @@
+"""
+JSON encoding and decoding for request bodies, responses and stream chunks.
+
+The fastest available backend is picked automatically: orjson, then
+msgspec, then the standard library. All backends produce compact UTF-8
+bytes and raise ValueError on invalid input.
+"""
+
+import json
+from typing import Any, Callable, Optional, Union
+
+JSONInput = Union[bytes, bytearray, memoryview, str]
+
+
+class JSONCodec:
+    """A named pair of `dumps` (object to bytes) and `loads` (bytes or str to object)."""
+
+    __slots__ = ("name", "dumps", "loads")
+
+    def __init__(self, name: str, dumps: Callable[[Any], bytes], loads: Callable[[JSONInput], Any]):
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+
+    def __repr__(self) -> str:
+        return f"JSONCodec({self.name!r})"
+
+
+def _stdlib_codec() -> JSONCodec:
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), allow_nan=False)
+
+    def dumps(obj: Any) -> bytes:
+        return encoder.encode(obj).encode("utf-8")
+
+    return JSONCodec("json", dumps, json.loads)
+
+
+def _orjson_codec() -> JSONCodec:
+    import orjson
+
+    def dumps(obj: Any) -> bytes:
+        # Like json.dumps, accept non-string keys such as logit_bias token ids
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    return JSONCodec("orjson", dumps, orjson.loads)
+
+
+def _msgspec_codec() -> JSONCodec:
+    import msgspec
+    return JSONCodec("msgspec", msgspec.json.Encoder().encode, msgspec.json.Decoder().decode)
+
+
+_BACKENDS = {
+    "orjson": _orjson_codec,
+    "msgspec": _msgspec_codec,
+    "json": _stdlib_codec,
+}
+
+
+_default: Optional[JSONCodec] = None
+
+
+def default_codec() -> JSONCodec:
+    """The fastest installed codec, selected on first use."""
+    global _default
+    if _default is None:
+        for factory in _BACKENDS.values():
+            try:
+                _default = factory()
+                break
+            except ImportError:
+                continue
+    return _default
+
+
+def get_codec(codec: Union[str, JSONCodec, None] = None) -> JSONCodec:
+    """
+    Return a JSON codec. `codec` may be a JSONCodec, a backend name
+    ("orjson", "msgspec" or "json") or None for the fastest installed
+    backend.
+    """
+    if codec is None:
+        return default_codec()
+    if isinstance(codec, JSONCodec):
+        return codec
+    factory = _BACKENDS.get(codec)
+    if factory is None:
+        raise ValueError(f"Unknown JSON codec {codec!r}, expected one of {', '.join(_BACKENDS)}")
+    try:
+        return factory()
+    except ImportError:
+        raise ImportError(
+            f"The {codec!r} JSON codec requires the '{codec}' package. "
+            f"Install it with `pip install exnest-ai[{codec}]`."
+        ) from None
@@ -0,0 +1,110 @@
+"""
+Compact variants of the models in models.py.
+
+Each class here has the same name, fields, defaults and behavior as its
+counterpart in models.py, but stores its attributes in `__slots__` instead
+of a per-instance `__dict__`, cutting the memory held by large numbers of
+stream chunks or responses by about a third. Nested fields are typed with the
+compact classes, so decoding builds compact objects all the way down.
+
+Frozen (immutable, hashable) variants are available through
+`compact_model(cls, frozen=True)`.
+"""
+
+import dataclasses
+from typing import Any, Dict, List, Tuple, Type, TypeVar, Union, get_args, get_origin, get_type_hints
+
+from . import models
+
+T = TypeVar("T")
+
+_VARIANTS: Dict[Tuple[type, bool], type] = {}
+
+
+def _substitute(tp: Any, frozen: bool) -> Any:
+    """Replace model classes inside a type annotation with their compact variants."""
+    if isinstance(tp, type) and dataclasses.is_dataclass(tp) and tp.__module__ == models.__name__:
+        return compact_model(tp, frozen)
+    origin = get_origin(tp)
+    args = get_args(tp)
+    if origin is Union:
+        return Union[tuple(_substitute(arg, frozen) for arg in args)]
+    if origin is list and args:
+        return List[_substitute(args[0], frozen)]
+    if origin is dict and len(args) == 2:
+        return Dict[args[0], _substitute(args[1], frozen)]
+    return tp
+
+
+def _copy_field(field: dataclasses.Field) -> dataclasses.Field:
+    return dataclasses.field(
+        default=field.default,
+        default_factory=field.default_factory,
+        init=field.init,
+        repr=field.repr,
+        hash=field.hash,
+        compare=field.compare,
+        metadata=field.metadata
+    )
+
+
+def _add_slots(cls: type) -> type:
+    """Recreate dataclass `cls` with `__slots__` for its own fields."""
+    inherited = {name for base in cls.__mro__[1:] for name in getattr(base, "__slots__", ())}
+    field_names = [field.name for field in dataclasses.fields(cls)]
+    namespace = dict(cls.__dict__)
+    namespace["__slots__"] = tuple(name for name in field_names if name not in inherited)
+    for name in field_names:
+        namespace.pop(name, None)
+    namespace.pop("__dict__", None)
+    namespace.pop("__weakref__", None)
+    slotted = type(cls)(cls.__name__, cls.__bases__, namespace)
+    slotted.__qualname__ = cls.__qualname__
+    return slotted
+
+
+def compact_model(cls: Type[T], frozen: bool = False) -> Type[T]:
+    """Return the slotted (optionally frozen) variant of model class `cls`."""
+    key = (cls, frozen)
+    variant = _VARIANTS.get(key)
+    if variant is not None:
+        return variant
+
+    base = next((b for b in cls.__bases__ if dataclasses.is_dataclass(b)), None)
+    bases = (compact_model(base, frozen),) if base is not None else ()
+    hints = get_type_hints(cls)
+    own_fields = [
+        (field.name, _substitute(hints[field.name], frozen), _copy_field(field))
+        for field in dataclasses.fields(cls)
+        if field.name in cls.__dict__.get("__annotations__", {})
+    ]
+    name = f"Frozen{cls.__name__}" if frozen else cls.__name__
+    variant = dataclasses.make_dataclass(
+        name, own_fields, bases=bases, frozen=frozen, namespace={"__doc__": cls.__doc__}
+    )
+    variant.__module__ = __name__
+    variant = _add_slots(variant)
+    _VARIANTS[key] = variant
+    return variant
+
+
+ExnestMessage = compact_model(models.ExnestMessage)
+Billing = compact_model(models.Billing)
+Links = compact_model(models.Links)
+ExnestErrorDetails = compact_model(models.ExnestErrorDetails)
+ExnestMetadata = compact_model(models.ExnestMetadata)
+Error = compact_model(models.Error)
+Usage = compact_model(models.Usage)
+ExnestBaseResponse = compact_model(models.ExnestBaseResponse)
+ChatChoice = compact_model(models.ChatChoice)
+ExnestChatResponse = compact_model(models.ExnestChatResponse)
+CompletionChoice = compact_model(models.CompletionChoice)
+ExnestCompletionResponse = compact_model(models.ExnestCompletionResponse)
+Delta = compact_model(models.Delta)
+StreamChoice = compact_model(models.StreamChoice)
+ExnestStreamChunk = compact_model(models.ExnestStreamChunk)
+Provider = compact_model(models.Provider)
+Pricing = compact_model(models.Pricing)
+Limits = compact_model(models.Limits)
+ExnestModel = compact_model(models.ExnestModel)
+EBCDecisionContext = compact_model(models.EBCDecisionContext)
@@ -0,0 +1,252 @@
+"""
+Request building, retry decisions and response decoding shared by
+ExnestAI and ExnestAISync.
+
+Nothing here does I/O: each client only adds its own transport calls and
+sleeps around these helpers, so both behave the same by construction.
+"""
+
+import dataclasses
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import httpx
+
+from .models import ExnestMessage, EBCDecisionContext
+from .retry import RetryPolicy
+from .ratelimit import parse_retry_after, estimate_tokens
+from .circuit import CircuitOpenError
+from .decoding import decode, LazyResponse
+from .sse import SSEParser
+
+USER_AGENT = "ExnestAI-Python-Client/1.0.0"
+
+_RAW_MODES = (False, True, "bytes", "lazy")
+
+_TOTAL_TOKENS = re.compile(rb'"total_tokens"\s*:\s*(\d+)')
+
+
+def require_h2() -> None:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        raise ImportError(
+            "HTTP/2 support requires the 'h2' package. Install it with `pip install exnest-ai[http2]`."
+        ) from None
+
+
+def check_raw(raw: Union[bool, str]) -> None:
+    if raw not in _RAW_MODES:
+        raise ValueError(f"raw must be True, False, 'bytes' or 'lazy', got {raw!r}")
+
+
+def total_tokens(content: bytes) -> Optional[int]:
+    """`usage.total_tokens` of a JSON response body, found without parsing the whole body."""
+    start = content.rfind(b'"usage"')
+    match = _TOTAL_TOKENS.search(content, start) if start != -1 else None
+    return int(match.group(1)) if match else None
+
+
+def as_dict(value: Any) -> Dict[str, Any]:
+    """Request body dict for a message or context, whether a model instance or a plain dict."""
+    if isinstance(value, dict):
+        return value
+    return {field.name: getattr(value, field.name) for field in dataclasses.fields(value)}
+
+
+def request_headers(api_key: str, stream: bool = False) -> Dict[str, str]:
+    headers = {
+        "Content-Type": "application/json",
+        "User-Agent": USER_AGENT,
+        "Authorization": f"Bearer {api_key}"
+    }
+    if stream:
+        headers["Accept"] = "text/event-stream"
+    return headers
+
+
+def chat_body(model: str, messages: List[ExnestMessage], options: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "model": model,
+        "messages": [as_dict(msg) for msg in messages],
+        **options
+    }
+
+
+def completion_body(model: str, prompt: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "model": model,
+        "prompt": prompt,
+        **options
+    }
+
+
+def ebc_body(
+    messages: List[ExnestMessage], options: Dict[str, Any], context: Optional[EBCDecisionContext] = None
+) -> Dict[str, Any]:
+    body = {"messages": [as_dict(msg) for msg in messages]}
+    if context is not None:
+        body["context"] = as_dict(context)
+    body.update(options)
+    return body
+
+
+def continuation_body(body: Dict[str, Any], text: str) -> Dict[str, Any]:
+    """Request body asking the model to continue after the partial output `text`."""
+    body = dict(body)
+    if "messages" in body:
+        body["messages"] = [*body["messages"], {"role": "assistant", "content": text}]
+    else:
+        body["prompt"] = body.get("prompt", "") + text
+    if body.get("max_tokens"):
+        body["max_tokens"] = max(1, body["max_tokens"] - estimate_tokens(text))
+    return body
+
+
+def retry_after(error: Exception, policy: RetryPolicy) -> Optional[float]:
+    """Seconds the server asked to wait before retrying `error`, if it did and the policy respects it."""
+    if isinstance(error, httpx.HTTPStatusError) and policy.respect_retry_after:
+        return parse_retry_after(error.response.headers)
+    return None
+
+
+def retry_delay(
+    error: Exception, attempt: int, idempotent: bool, policy: RetryPolicy, previous_delay: Optional[float],
+    debug: bool = False
+) -> Tuple[float, Optional[float]]:
+    """
+    Decide on retrying after a failed attempt: re-raises `error` when it
+    should not be retried, otherwise returns the seconds to wait and the
+    backoff delay to pass as `previous_delay` next time. A Retry-After is
+    waited exactly, unless it exceeds `policy.max_retry_after`.
+    """
+    wait = retry_after(error, policy)
+    if not policy.should_retry(error, attempt, idempotent):
+        raise error
+    if wait is not None:
+        if wait * 1000 > policy.max_retry_after:
+            raise error
+        if debug:
+            print(f"[ExnestAI] Retrying in {wait:.3f}s (Retry-After)")
+        return wait, previous_delay
+    delay = policy.get_delay(attempt, previous_delay)
+    if debug:
+        print(f"[ExnestAI] Retrying in {delay:.3f}s")
+    return delay, delay
+
+
+def fallback_chain(model: Union[str, List[str]], policy: RetryPolicy) -> List[Tuple[str, Optional[RetryPolicy]]]:
+    """
+    Models to try in order, each with the retry policy to use for it:
+    every model but the last gets a single attempt, so a provider incident
+    costs one failed request rather than a full retry cycle. None means
+    the client's own policy.
+    """
+    models = [model] if isinstance(model, str) else list(model)
+    if not models:
+        raise ValueError("At least one model is required")
+    single_attempt = dataclasses.replace(policy, max_retries=0)
+    return [(name, single_attempt) for name in models[:-1]] + [(models[-1], None)]
+
+
+def should_fail_over(error: Exception, policy: RetryPolicy) -> bool:
+    """Whether a model in a fallback chain should give way to the next after `error`."""
+    return isinstance(error, (CircuitOpenError, httpx.TimeoutException)) or policy.is_retryable(error)
+
+
+def build_response(cls: type, content: bytes, raw: Union[bool, str], served_model: Optional[str], loads):
+    """
+    Turn a response body into what the caller asked for: the raw bytes
+    (`raw=True` or `"bytes"`), a LazyResponse (`"lazy"`) or, by default,
+    a fully decoded `cls`.
+    """
+    if raw is True or raw == "bytes":
+        return content
+    if raw == "lazy":
+        return LazyResponse(content, cls, served_model, loads)
+    response = decode(cls, loads(content))
+    response.served_model = served_model
+    return response
+
+
+def models_params(openai_compatible: bool) -> Dict[str, str]:
+    return {"openai_compatible": "true"} if openai_compatible else {}
+
+
+def models_from(response_data: Any, cls: type, openai_compatible: bool) -> Union[List[Any], Dict[str, Any]]:
+    """Models of a `/models` listing, unwrapped from the v1 response wrapper unless OpenAI compatible."""
+    if not openai_compatible and isinstance(response_data, dict) and "data" in response_data:
+        if "models" in response_data["data"]:
+            response_data = response_data["data"]["models"]
+
+    if isinstance(response_data, list):
+        return [decode(cls, model_data) for model_data in response_data]
+    return response_data
+
+
+def model_from(response_data: Any, cls: type, openai_compatible: bool) -> Any:
+    """The model of a `/models/{id}` response; OpenAI compatible responses are returned as is."""
+    if openai_compatible:
+        return response_data
+    if isinstance(response_data, dict) and "data" in response_data:
+        response_data = response_data["data"]
+    return decode(cls, response_data)
+
+
+class StreamDecoder:
+    """
+    Decodes the SSE bytes of a streaming response into chunks of
+    `chunk_type`. Undecodable events are skipped; `done` is set once the
+    `[DONE]` event arrives.
+    """
+
+    def __init__(self, chunk_type: type, loads, debug: bool = False):
+        self.chunk_type = chunk_type
+        self.loads = loads
+        self.debug = debug
+        self.done = False
+        self._parser = SSEParser()
+
+    def feed(self, raw_chunk: bytes) -> Iterator[Tuple[Dict[str, Any], Any]]:
+        """The parsed JSON and decoded chunk of each complete event in `raw_chunk`."""
+        for event in self._parser.feed(raw_chunk):
+            data = event.data
+            if data.startswith(b"[DONE]"):
+                self.done = True
+                return
+            try:
+                chunk_data = self.loads(data)
+                chunk = decode(self.chunk_type, chunk_data)
+            except ValueError:
+                if self.debug:
+                    print(f"[ExnestAI] Failed to parse stream chunk: {data.decode(errors='replace')}")
+                continue
+            yield chunk_data, chunk
+
+
+class StreamResume:
+    """
+    Bookkeeping for resuming a stream: records the text received on the
+    first choice and builds the continuation request after a drop. Only
+    single-choice requests can be resumed.
+    """
+
+    def __init__(self, body: Dict[str, Any], resume: bool):
+        self.body = body
+        self.enabled = resume and body.get("n", 1) == 1
+        self._received: List[str] = []
+
+    def record(self, chunk: Any) -> None:
+        if not self.enabled:
+            return
+        for choice in chunk.choices or ():
+            if not choice.index and choice.delta is not None and choice.delta.content:
+                self._received.append(choice.delta.content)
+
+    def next_body(self, debug: bool = False) -> Dict[str, Any]:
+        """Body for the next attempt: the original one, or a continuation once text was received."""
+        if not self._received:
+            return self.body
+        if debug:
+            print(f"[ExnestAI] Resuming stream after {sum(map(len, self._received))} characters")
+        return continuation_body(self.body, "".join(self._received))
@@ -0,0 +1,197 @@
+"""
+Fast decoding of API response dicts into the nested dataclasses in models.py.
+
+A decoder is compiled once per dataclass: field types are resolved ahead of
+time and a specialized function is generated that builds the whole object
+tree in a single pass, with no per-call reflection. Unknown keys are
+ignored and missing fields fall back to their defaults (None for required
+fields), so additions to the API never break decoding.
+"""
+
+import dataclasses
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, TypeVar, Union, get_args, get_origin, get_type_hints
+
+from .codec import default_codec
+
+T = TypeVar("T")
+
+_MISSING = object()
+_DECODERS: Dict[type, Callable[[Any], Any]] = {}
+# Placeholders of decoders being compiled, seen only by the thread holding _COMPILING
+_PENDING: Dict[type, Callable[[Any], Any]] = {}
+_COMPILING = threading.RLock()
+_FIELD_DECODERS: Dict[type, Dict[str, Tuple[Optional[Callable[[Any], Any]], Callable[[], Any]]]] = {}
+
+
+def _converter(tp: Any) -> Optional[Callable[[Any], Any]]:
+    """Converter for values of type `tp`, or None when they pass through as is."""
+    if isinstance(tp, type) and dataclasses.is_dataclass(tp):
+        return get_decoder(tp)
+
+    origin = get_origin(tp)
+    args = get_args(tp)
+    if origin is Union:
+        members = [arg for arg in args if arg is not type(None)]
+        # Ambiguous unions cannot be decided from the data, leave them raw
+        return _converter(members[0]) if len(members) == 1 else None
+    if origin in (list, List) and args:
+        item = _converter(args[0])
+        if item is None:
+            return None
+        return lambda value: [item(element) for element in value] if isinstance(value, list) else value
+    if origin in (dict, Dict) and len(args) == 2:
+        item = _converter(args[1])
+        if item is None:
+            return None
+        return lambda value: {key: item(element) for key, element in value.items()} if isinstance(value, dict) else value
+    return None
+
+
+def _compile(cls: type) -> Callable[[Any], Any]:
+    hints = get_type_hints(cls)
+    namespace: Dict[str, Any] = {"_cls": cls, "_MISSING": _MISSING, "_dict": dict}
+    lines = [
+        "def decode(data):",
+        "    if not isinstance(data, _dict):",
+        "        return data",
+        "    get = data.get",
+    ]
+    arguments = []
+    for index, field in enumerate(dataclasses.fields(cls)):
+        if not field.init:
+            continue
+        name = f"v{index}"
+        convert = _converter(hints.get(field.name, Any))
+        if field.default is not dataclasses.MISSING:
+            namespace[f"_default{index}"] = field.default
+            fallback = f"_default{index}"
+        elif field.default_factory is not dataclasses.MISSING:
+            namespace[f"_factory{index}"] = field.default_factory
+            fallback = f"_factory{index}()"
+        else:
+            fallback = "None"
+
+        lines.append(f"    {name} = get({field.name!r}, _MISSING)")
+        lines.append(f"    if {name} is _MISSING:")
+        lines.append(f"        {name} = {fallback}")
+        if convert is not None:
+            namespace[f"_convert{index}"] = convert
+            lines.append(f"    elif {name} is not None:")
+            lines.append(f"        {name} = _convert{index}({name})")
+        arguments.append(f"{field.name}={name}")
+    lines.append(f"    return _cls({', '.join(arguments)})")
+
+    exec("\n".join(lines), namespace)
+    return namespace["decode"]
+
+
+def get_decoder(cls: Type[T]) -> Callable[[Any], T]:
+    """Return the compiled decoder for dataclass `cls`, compiling it on first use."""
+    decoder = _DECODERS.get(cls)
+    if decoder is None:
+        with _COMPILING:
+            decoder = _DECODERS.get(cls) or _PENDING.get(cls)
+            if decoder is None:
+                # Placeholder so self-referencing types resolve to the final decoder,
+                # waiting for it if another thread is still compiling it
+                _PENDING[cls] = lambda data: get_decoder(cls)(data)
+                try:
+                    decoder = _DECODERS[cls] = _compile(cls)
+                finally:
+                    del _PENDING[cls]
+    return decoder
+
+
+def decode(cls: Type[T], data: Any) -> T:
+    """
+    Decode a parsed JSON object into `cls`, building nested dataclasses
+    (choices, messages, usage, metadata, ...) along the way. Values that
+    are not dicts, including instances that are already decoded, are
+    returned unchanged.
+    """
+    return get_decoder(cls)(data)
+
+
+def _field_decoders(cls: type) -> Dict[str, Tuple[Optional[Callable[[Any], Any]], Callable[[], Any]]]:
+    """Per-field converter and default factory of dataclass `cls`."""
+    decoders = _FIELD_DECODERS.get(cls)
+    if decoders is None:
+        hints = get_type_hints(cls)
+        decoders = {}
+        for field in dataclasses.fields(cls):
+            if field.default is not dataclasses.MISSING:
+                default = lambda value=field.default: value
+            elif field.default_factory is not dataclasses.MISSING:
+                default = field.default_factory
+            else:
+                default = lambda: None
+            decoders[field.name] = (_converter(hints.get(field.name, Any)), default)
+        _FIELD_DECODERS[cls] = decoders
+    return decoders
+
+
+class LazyResponse:
+    """
+    Read-only view over the raw bytes of a response. Nothing is parsed
+    until a field is read; the JSON is then parsed once and each field is
+    decoded into `cls` types on first access only. Forwarding `content`
+    never parses at all.
+    """
+
+    __slots__ = ("content", "served_model", "_cls", "_loads", "_data", "_values")
+
+    def __init__(
+        self, content: bytes, cls: type, served_model: Optional[str] = None,
+        loads: Optional[Callable[[bytes], Any]] = None
+    ):
+        self.content = content
+        self.served_model = served_model
+        self._cls = cls
+        self._loads = loads or default_codec().loads
+        self._data: Any = _MISSING
+        self._values: Dict[str, Any] = {}
+
+    def json(self) -> Any:
+        """The parsed response body."""
+        # A body of `null` parses to None, so a sentinel marks "not parsed yet"
+        if self._data is _MISSING:
+            self._data = self._loads(self.content)
+        return self._data
+
+    def to_model(self) -> Any:
+        """Decode the whole response into `cls`."""
+        model = decode(self._cls, self.json())
+        model.served_model = self.served_model
+        return model
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            # Private and dunder lookups, e.g. by copy and pickle on an instance whose slots are unset
+            raise AttributeError(name)
+        values = self._values
+        if name in values:
+            return values[name]
+        fields = _field_decoders(self._cls)
+        if name not in fields:
+            raise AttributeError(f"{self._cls.__name__!r} response has no attribute {name!r}")
+
+        data = self.json()
+        convert, default = fields[name]
+        value = data.get(name, _MISSING) if isinstance(data, dict) else _MISSING
+        if value is _MISSING:
+            value = default()
+        elif convert is not None and value is not None:
+            value = convert(value)
+        values[name] = value
+        return value
+
+    def __reduce__(self):
+        # Copies and pickles carry the bytes only and parse again on first access
+        return type(self), (self.content, self._cls, self.served_model, self._loads)
+
+    def __bytes__(self) -> bytes:
+        return self.content
+
+    def __repr__(self) -> str:
+        return f"LazyResponse({self._cls.__name__}, {len(self.content)} bytes)"
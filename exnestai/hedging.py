@@ -0,0 +1,74 @@
+"""
+Hedged requests: send a backup request when the first one is slow.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from .metrics import LatencyHistogram
+
+
+@dataclass
+class HedgePolicy:
+    """
+    When to send a hedge. If the first attempt has not answered after the
+    `percentile` latency observed for the same endpoint and model (at least
+    `min_delay` ms, or `initial_delay` ms until `min_samples` requests were
+    seen), a duplicate is sent, optionally to another `model` or
+    `base_url`. The first success wins and the other request is cancelled.
+
+    Hedges are capped at `max_hedge_ratio` of all requests so a slow
+    backend does not get twice the load.
+    """
+    percentile: float = 95.0
+    min_delay: int = 50
+    initial_delay: int = 1000
+    min_samples: int = 20
+    max_hedge_ratio: float = 0.1
+    model: Optional[str] = None
+    base_url: Optional[str] = None
+
+    def __post_init__(self):
+        if not 0 < self.percentile < 100:
+            raise ValueError("percentile must be between 0 and 100")
+        if not 0 <= self.max_hedge_ratio <= 1:
+            raise ValueError("max_hedge_ratio must be between 0 and 1")
+
+    def get_delay(self, histogram: Optional[LatencyHistogram]) -> float:
+        """Seconds to wait for the first attempt before hedging."""
+        if histogram is None or histogram.count < self.min_samples:
+            delay = self.initial_delay / 1000
+        else:
+            delay = histogram.percentile(self.percentile)
+        return max(self.min_delay / 1000, delay)
+
+
+class HedgeBudget:
+    """
+    Token budget capping hedges to a fraction of requests: every hedgeable
+    request earns `ratio` tokens (up to `burst`) and every hedge spends one.
+    The first request also grants a head start of `ratio * burst` tokens,
+    at most one, so the first slow request can be hedged while a ratio of
+    0 never allows a hedge.
+    """
+
+    def __init__(self, burst: float = 10.0):
+        self.burst = burst
+        self.tokens = 0.0
+        self.hedges_sent = 0
+        self.hedges_denied = 0
+        self._started = False
+
+    def on_request(self, ratio: float) -> None:
+        if not self._started:
+            self._started = True
+            self.tokens = min(1.0, ratio * self.burst)
+        self.tokens = min(self.burst, self.tokens + ratio)
+
+    def try_spend(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            self.hedges_sent += 1
+            return True
+        self.hedges_denied += 1
+        return False
@@ -0,0 +1,58 @@
+"""
+Latency tracking for ExnestAI requests.
+"""
+
+import math
+from typing import Optional, Dict, Any, List
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram. Buckets grow by `growth` from
+    `min_latency` seconds, so percentiles are accurate to about
+    (growth - 1) relative error at any scale. Once more than `max_samples`
+    have been recorded all counts are halved, letting percentiles follow
+    recent latency rather than the whole history.
+    """
+
+    def __init__(self, min_latency: float = 0.001, max_latency: float = 600.0, growth: float = 1.1,
+                 max_samples: int = 2000):
+        self.min_latency = min_latency
+        self.growth = growth
+        self.max_samples = max_samples
+        self._log_growth = math.log(growth)
+        self._counts: List[float] = [0.0] * (self._bucket(max_latency) + 1)
+        self.count = 0.0
+
+    def _bucket(self, latency: float) -> int:
+        if latency <= self.min_latency:
+            return 0
+        return int(math.ceil(math.log(latency / self.min_latency) / self._log_growth))
+
+    def record(self, latency: float) -> None:
+        """Record a latency in seconds."""
+        self._counts[min(self._bucket(latency), len(self._counts) - 1)] += 1
+        self.count += 1
+        if self.count > self.max_samples:
+            self._counts = [count / 2 for count in self._counts]
+            self.count /= 2
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Latency in seconds at percentile `pct` (0-100), None when empty."""
+        if not self.count:
+            return None
+        target = self.count * pct / 100
+        seen = 0.0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if count and seen >= target:
+                return self.min_latency * self.growth ** index
+        return self.min_latency * self.growth ** (len(self._counts) - 1)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Sample count and common percentiles in milliseconds."""
+        def ms(pct: float) -> Optional[float]:
+            value = self.percentile(pct)
+            return round(value * 1000, 3) if value is not None else None
+
+        return {"count": int(self.count), "p50": ms(50), "p90": ms(90), "p95": ms(95), "p99": ms(99)}
@@ -56,6 +56,7 @@ class ExnestBaseResponse:
     usage: Optional[Usage] = None
     exnest: Optional[ExnestMetadata] = None
     error: Optional[Error] = None
+    served_model: Optional[str] = None  # Set by the client: the requested model that answered
 
 @dataclass
 class ChatChoice:
@@ -97,6 +98,7 @@ class ExnestStreamChunk:
     created: int
     model: str
     choices: List[StreamChoice]
+    usage: Optional[Usage] = None  # Sent with the final chunk when the stream reports usage
 
 @dataclass
 class Provider:
@@ -0,0 +1,289 @@
+"""
+Client-side rate limiting for ExnestAI requests.
+
+Parses `Retry-After` and `x-ratelimit-*` response headers and paces later
+requests so they wait for quota locally instead of hitting a 429.
+"""
+
+import asyncio
+import re
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Any, Mapping
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+# Plain numbers above this are epoch timestamps rather than second counts
+_EPOCH_THRESHOLD = 1_000_000_000
+
+
+@dataclass
+class RateLimitInfo:
+    """Quota reported by the gateway. Reset values are seconds from now."""
+    limit_requests: Optional[int] = None
+    remaining_requests: Optional[int] = None
+    reset_requests: Optional[float] = None
+    limit_tokens: Optional[int] = None
+    remaining_tokens: Optional[int] = None
+    reset_tokens: Optional[float] = None
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a reset duration in seconds. Accepts plain seconds ("1.5"),
+    epoch timestamps, and Go-style durations ("20ms", "6m0s", "1h2m").
+    """
+    if value is None:
+        return None
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        parts = _DURATION_PART.findall(value)
+        if not parts or "".join(num + unit for num, unit in parts) != value:
+            return None
+        return sum(float(num) * _DURATION_UNITS[unit] for num, unit in parts)
+
+    if seconds > _EPOCH_THRESHOLD:
+        seconds -= time.time()
+    return max(0.0, seconds)
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """
+    Seconds to wait according to `retry-after-ms` or `Retry-After`, which
+    may hold either a number of seconds or an HTTP date.
+    """
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms is not None:
+        try:
+            return max(0.0, float(retry_after_ms) / 1000)
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if retry_after is None:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def _parse_int(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def parse_rate_limit_headers(headers: Mapping[str, str]) -> Optional[RateLimitInfo]:
+    """
+    Read quota headers. Understands the per-dimension `x-ratelimit-*-requests`
+    and `x-ratelimit-*-tokens` headers as well as the generic
+    `x-ratelimit-{limit,remaining,reset}` and `ratelimit-*` forms, which are
+    treated as request quotas. Returns None when no quota header is present.
+    """
+    def first(*names: str) -> Optional[str]:
+        for name in names:
+            if name in headers:
+                return headers[name]
+        return None
+
+    info = RateLimitInfo(
+        limit_requests=_parse_int(first("x-ratelimit-limit-requests", "x-ratelimit-limit", "ratelimit-limit")),
+        remaining_requests=_parse_int(
+            first("x-ratelimit-remaining-requests", "x-ratelimit-remaining", "ratelimit-remaining")
+        ),
+        reset_requests=parse_duration(first("x-ratelimit-reset-requests", "x-ratelimit-reset", "ratelimit-reset")),
+        limit_tokens=_parse_int(first("x-ratelimit-limit-tokens")),
+        remaining_tokens=_parse_int(first("x-ratelimit-remaining-tokens")),
+        reset_tokens=parse_duration(first("x-ratelimit-reset-tokens")),
+    )
+    if info == RateLimitInfo():
+        return None
+    return info
+
+
+class _TokenBucket:
+    """Token bucket refilled continuously at `per_minute` tokens per minute."""
+
+    def __init__(self, per_minute: int):
+        if per_minute <= 0:
+            raise ValueError("Rate limits must be positive")
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay_for(self, amount: float, now: float) -> float:
+        self.refill(now)
+        # Oversized requests wait for a full bucket and then run into debt
+        needed = min(amount, self.capacity)
+        return 0.0 if self.tokens >= needed else (needed - self.tokens) / self.rate
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for English text, about four characters per token."""
+    return (len(text) + 3) // 4
+
+
+class RateLimiter:
+    """
+    Shared client-side limiter. Pass one instance to several clients using
+    the same API key so they pace against the same quota.
+
+    With `requests_per_minute` and/or `tokens_per_minute`, requests draw
+    from token buckets. Each request reserves its `max_tokens` (or
+    `default_completion_tokens`) plus an estimate of its prompt tokens, and
+    the reservation is reconciled against the `usage` returned. Callers are
+    served first come, first served, so large requests are not starved:
+    each one takes its tokens when it arrives, running the buckets into
+    debt that later callers wait behind, and then sleeps until its turn.
+
+    Quota observed from response headers is consumed locally as well: once
+    the reported remaining requests or tokens are used up, callers wait for
+    the reported reset instead of being rejected by the gateway. A
+    `Retry-After` pauses every caller until it has elapsed.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        default_completion_tokens: int = 256
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.default_completion_tokens = default_completion_tokens
+        self._request_bucket = _TokenBucket(requests_per_minute) if requests_per_minute else None
+        self._token_bucket = _TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        # Guards reservations, never held across an await, so any loop or thread may acquire
+        self._lock = threading.Lock()
+        self._blocked_until = 0.0
+        self._remaining_requests: Optional[int] = None
+        self._requests_reset_at = 0.0
+        self._remaining_tokens: Optional[int] = None
+        self._tokens_reset_at = 0.0
+
+    def estimate(self, body: Optional[Dict[str, Any]]) -> int:
+        """Tokens to reserve for a request body: prompt estimate plus max_tokens."""
+        if not body:
+            return 0
+        prompt = 0
+        for message in body.get("messages") or []:
+            content = message.get("content") if isinstance(message, dict) else getattr(message, "content", None)
+            prompt += 4 + estimate_tokens(content if isinstance(content, str) else str(content or ""))
+        if isinstance(body.get("prompt"), str):
+            prompt += estimate_tokens(body["prompt"])
+        completion = body.get("max_tokens") or self.default_completion_tokens
+        return prompt + completion
+
+    def _pause(self, now: float) -> float:
+        """Seconds requests are held back by a Retry-After or exhausted header quota."""
+        delay = self._blocked_until - now
+        if self._remaining_requests is not None and self._remaining_requests <= 0 and now < self._requests_reset_at:
+            delay = max(delay, self._requests_reset_at - now)
+        if self._remaining_tokens is not None and self._remaining_tokens <= 0 and now < self._tokens_reset_at:
+            delay = max(delay, self._tokens_reset_at - now)
+        return max(0.0, delay)
+
+    def _delay(self, now: float, tokens: int = 0) -> float:
+        """Seconds until a request may be sent, or 0 when it may go now."""
+        delay = self._pause(now)
+        if self._request_bucket is not None:
+            delay = max(delay, self._request_bucket.delay_for(1, now))
+        if self._token_bucket is not None and tokens:
+            delay = max(delay, self._token_bucket.delay_for(tokens, now))
+        return max(0.0, delay)
+
+    async def acquire(self, tokens: int = 0) -> float:
+        """
+        Wait until a request reserving `tokens` may be sent, in arrival
+        order. Returns the seconds waited.
+
+        The wait is computed and the quota reserved under the lock; the
+        sleep happens outside it, so callers never block one another.
+        """
+        with self._lock:
+            now = time.monotonic()
+            delay = self._delay(now, tokens)
+            send_at = now + delay
+            if self._remaining_requests is not None and send_at < self._requests_reset_at:
+                self._remaining_requests -= 1
+            if self._remaining_tokens is not None and send_at < self._tokens_reset_at:
+                self._remaining_tokens -= tokens
+            if self._request_bucket is not None:
+                self._request_bucket.tokens -= 1
+            if self._token_bucket is not None:
+                self._token_bucket.tokens -= tokens
+
+        waited = 0.0
+        while delay > 0:
+            await asyncio.sleep(delay)
+            waited += delay
+            # A Retry-After seen while sleeping holds this request back as well
+            with self._lock:
+                delay = self._pause(time.monotonic())
+        return waited
+
+    def reconcile(self, reserved: int, actual: int) -> None:
+        """
+        Settle a reservation against the tokens actually used: unused tokens
+        go back to the bucket, overruns are charged as debt.
+        """
+        if self._token_bucket is not None:
+            with self._lock:
+                self._token_bucket.refill(time.monotonic())
+                self._token_bucket.tokens = min(self._token_bucket.capacity, self._token_bucket.tokens + reserved - actual)
+
+    def block_for(self, seconds: float) -> None:
+        """Hold back every request for `seconds`, e.g. after a Retry-After."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def observe(self, info: Optional[RateLimitInfo]) -> None:
+        """Update the local view of the quota from parsed response headers."""
+        if info is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if info.remaining_requests is not None:
+                self._remaining_requests = info.remaining_requests
+                self._requests_reset_at = now + (info.reset_requests or 0.0)
+            if info.remaining_tokens is not None:
+                self._remaining_tokens = info.remaining_tokens
+                self._tokens_reset_at = now + (info.reset_tokens or 0.0)
+
+    def observe_headers(self, headers: Mapping[str, str]) -> None:
+        self.observe(parse_rate_limit_headers(headers))
+
+    def get_state(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            for bucket in (self._request_bucket, self._token_bucket):
+                if bucket is not None:
+                    bucket.refill(now)
+            blocked_for = self._delay(now)
+        return {
+            "requestsPerMinute": self.requests_per_minute,
+            "tokensPerMinute": self.tokens_per_minute,
+            "availableRequests": self._request_bucket.tokens if self._request_bucket else None,
+            "availableTokens": self._token_bucket.tokens if self._token_bucket else None,
+            "remainingRequests": self._remaining_requests if now < self._requests_reset_at else None,
+            "remainingTokens": self._remaining_tokens if now < self._tokens_reset_at else None,
+            "resetRequestsIn": max(0.0, self._requests_reset_at - now),
+            "resetTokensIn": max(0.0, self._tokens_reset_at - now),
+            "blockedFor": blocked_for,
+        }
@@ -0,0 +1,94 @@
+"""
+Retry policy for ExnestAI requests.
+"""
+
+import random
+from dataclasses import dataclass, field
+from typing import Optional, FrozenSet
+
+import httpx
+
+# Methods that can be repeated without changing the outcome
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+# Statuses worth retrying: timeouts, rate limits and transient gateway errors
+DEFAULT_RETRY_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+JITTER_MODES = ("none", "full", "equal", "decorrelated")
+
+# Errors raised before the request reached the server, always safe to retry
+_NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Exponential backoff with jitter. The delay before retry n is
+    `base_delay * multiplier ** n` capped at `max_delay` (both in ms), then
+    randomized according to `jitter`:
+
+    - "none": the exponential delay as is
+    - "full": uniform between 0 and the exponential delay
+    - "equal": half the exponential delay plus up to half again
+    - "decorrelated": uniform between base_delay and 3x the previous delay
+
+    Only network errors and responses with a status in `retry_statuses`
+    are retried. Non-idempotent requests (POST, which covers every chat,
+    completion and EBC call) are retried as well by default; with
+    `retry_non_idempotent=False` they are retried only after connection
+    failures and 429 responses, where the server never processed the
+    request, so a timed-out generation is never sent (and billed) twice.
+
+    When a failed response carries `Retry-After`, the client waits exactly
+    that long instead of the backoff delay, unless it exceeds
+    `max_retry_after` (ms), in which case the error is raised right away.
+    """
+    max_retries: int = 3
+    base_delay: int = 1000
+    max_delay: int = 30000
+    multiplier: float = 2.0
+    jitter: str = "full"
+    retry_statuses: FrozenSet[int] = DEFAULT_RETRY_STATUSES
+    retry_non_idempotent: bool = True
+    respect_retry_after: bool = True
+    max_retry_after: int = 60000
+    _rng: random.Random = field(default_factory=random.Random, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.max_retries < 0:
+            raise ValueError("max_retries must not be negative")
+        if self.jitter not in JITTER_MODES:
+            raise ValueError(f"jitter must be one of {', '.join(JITTER_MODES)}")
+        self.retry_statuses = frozenset(self.retry_statuses)
+
+    def is_retryable(self, error: Exception, idempotent: bool = True) -> bool:
+        if isinstance(error, httpx.HTTPStatusError):
+            status = error.response.status_code
+            if status not in self.retry_statuses:
+                return False
+            return idempotent or self.retry_non_idempotent or status == 429
+        if isinstance(error, _NOT_SENT_ERRORS):
+            return True
+        if isinstance(error, httpx.RequestError):
+            return idempotent or self.retry_non_idempotent
+        return False
+
+    def should_retry(self, error: Exception, attempt: int, idempotent: bool = True) -> bool:
+        """Whether a request that failed on `attempt` (0-based) should be tried again."""
+        return attempt < self.max_retries and self.is_retryable(error, idempotent)
+
+    def get_delay(self, attempt: int, previous_delay: Optional[float] = None) -> float:
+        """Delay in seconds before retrying after `attempt` (0-based)."""
+        base = self.base_delay / 1000
+        cap = self.max_delay / 1000
+
+        if self.jitter == "decorrelated":
+            previous = previous_delay if previous_delay else base
+            return min(cap, self._rng.uniform(base, previous * 3))
+
+        delay = min(cap, base * self.multiplier ** attempt)
+        if self.jitter == "full":
+            return self._rng.uniform(0, delay)
+        if self.jitter == "equal":
+            return delay / 2 + self._rng.uniform(0, delay / 2)
+        return delay
@@ -0,0 +1,113 @@
+"""
+Incremental Server-Sent Events parser working directly on bytes.
+
+Follows the event stream format of the HTML specification: LF, CR and
+CRLF line endings (also when split across chunks), multi-line `data:`
+fields, `event:`, `id:` and `retry:` fields, comments and a leading BOM.
+Event data stays as bytes so it can go straight to the JSON codec.
+"""
+
+from itertools import repeat
+from typing import List, NamedTuple, Optional
+
+_BOM = b"\xef\xbb\xbf"
+
+
+class SSEEvent(NamedTuple):
+    """A dispatched event. `data` is the raw payload, multiple data lines joined by LF."""
+    data: bytes
+    event: str = "message"
+    id: Optional[str] = None
+    retry: Optional[int] = None
+
+
+_new_event = tuple.__new__
+
+
+class SSEParser:
+    """
+    Feed it byte chunks as they arrive; each call returns the events
+    completed by that chunk. An event left unterminated at the end of the
+    stream is discarded, as the specification requires.
+    """
+
+    def __init__(self):
+        self._buffer = b""
+        self._data: List[bytes] = []
+        self._event: Optional[str] = None
+        self._skip_lf = False
+        self._started = False
+        self.last_event_id: Optional[str] = None
+        self.retry: Optional[int] = None
+
+    def feed(self, chunk: bytes) -> List[SSEEvent]:
+        if not self._started:
+            if not chunk:
+                return []
+            self._started = True
+            if chunk.startswith(_BOM):
+                chunk = chunk[len(_BOM):]
+        if self._skip_lf:
+            self._skip_lf = False
+            if chunk[:1] == b"\n":
+                chunk = chunk[1:]
+
+        buffer = self._buffer + chunk if self._buffer else chunk
+        if b"\r" in buffer:
+            # A trailing CR ends a line; drop the LF if the next chunk starts with one
+            self._skip_lf = buffer.endswith(b"\r")
+            buffer = buffer.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+
+        end = buffer.rfind(b"\n\n") + 2
+        if end == 1:
+            self._buffer = buffer
+            return []
+        complete, self._buffer = buffer[:end], buffer[end:]
+
+        # Fast path: nothing but single-line `data: ` events, as LLM streams
+        # send them. Every LF is then part of an event terminator, and the
+        # events are split and built without per-line Python work.
+        if not self._data and self._event is None and complete.startswith(b"data: "):
+            payloads = complete[6:-2].split(b"\n\ndata: ")
+            if complete.count(b"\n") == 2 * len(payloads):
+                fields = zip(payloads, repeat("message"), repeat(self.last_event_id), repeat(self.retry))
+                return list(map(_new_event, repeat(SSEEvent), fields))
+
+        events: List[SSEEvent] = []
+        for line in complete[:-1].split(b"\n"):
+            if not line:
+                event = self._dispatch()
+                if event is not None:
+                    events.append(event)
+            elif line.startswith(b"data:"):
+                self._data.append(line[6:] if line[5:6] == b" " else line[5:])
+            else:
+                self._field(line)
+        return events
+
+    def _field(self, line: bytes) -> None:
+        if line[:1] == b":":
+            return  # comment
+        name, colon, value = line.partition(b":")
+        if colon and value[:1] == b" ":
+            value = value[1:]
+        if name == b"data":
+            self._data.append(value)
+        elif name == b"event":
+            self._event = value.decode("utf-8", "replace")
+        elif name == b"id":
+            if b"\0" not in value:
+                self.last_event_id = value.decode("utf-8", "replace")
+        elif name == b"retry":
+            if value.isdigit():
+                self.retry = int(value)
+
+    def _dispatch(self) -> Optional[SSEEvent]:
+        data, event = self._data, self._event
+        self._event = None
+        if not data:
+            return None
+        self._data = []
+        payload = data[0] if len(data) == 1 else b"\n".join(data)
+        return SSEEvent(payload, event or "message", self.last_event_id, self.retry)
+
@@ -0,0 +1,309 @@
+"""
+Stream handles with an explicit close contract, optional read-ahead and
+fan-out to several consumers.
+"""
+
+import asyncio
+import collections
+from typing import Any, AsyncGenerator, AsyncIterable, Deque, Dict, List, Optional
+
+_END = object()
+
+
+class _Failure:
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class ChunkStream:
+    """
+    Async iterator over the chunks of one streaming request, owning its
+    HTTP response. The connection is released as soon as the stream is
+    exhausted, closed with `aclose()` (or by leaving `async with`), or the
+    task reading it is cancelled, rather than whenever the abandoned
+    generator happens to be garbage collected.
+
+    With `read_ahead` > 0, a background task keeps up to that many chunks
+    buffered so a consumer that is briefly slower than the network does
+    not stall the connection. Once the buffer is full the task stops
+    reading, and backpressure reaches the server through TCP flow control.
+    The task holds no reference to the stream, so a read-ahead stream that
+    is dropped without being closed still stops it and frees the
+    connection when it is garbage collected.
+    """
+
+    def __init__(self, source: AsyncGenerator[Any, None], read_ahead: int = 0):
+        if read_ahead < 0:
+            raise ValueError("read_ahead must be >= 0")
+        self._source = source
+        self._read_ahead = read_ahead
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._done = False
+
+    def __aiter__(self) -> "ChunkStream":
+        return self
+
+    async def __aenter__(self) -> "ChunkStream":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+    async def __anext__(self) -> Any:
+        if self._done:
+            raise StopAsyncIteration
+        try:
+            if not self._read_ahead:
+                return await self._source.__anext__()
+            return await self._next_buffered()
+        except StopAsyncIteration:
+            self._done = True
+            raise
+        except BaseException:
+            # Errors and cancellation end the stream and free the connection now
+            self._done = True
+            if self._task is not None:
+                self._task.cancel()
+                await asyncio.gather(self._task, return_exceptions=True)
+            raise
+
+    async def _next_buffered(self) -> Any:
+        if self._task is None:
+            self._queue = asyncio.Queue(self._read_ahead)
+            self._task = asyncio.ensure_future(self._produce(self._source, self._queue))
+        item = await self._queue.get()
+        if item is _END:
+            raise StopAsyncIteration
+        if isinstance(item, _Failure):
+            raise item.error
+        return item
+
+    @staticmethod
+    async def _produce(source: AsyncGenerator[Any, None], queue: asyncio.Queue) -> None:
+        # Static so the task does not keep an abandoned stream alive
+        try:
+            async for chunk in source:
+                await queue.put(chunk)
+            await queue.put(_END)
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            await queue.put(_Failure(e))
+        finally:
+            await source.aclose()
+
+    @property
+    def buffered(self) -> int:
+        """Chunks read ahead and waiting for the consumer."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def aclose(self) -> None:
+        """Stop the stream and release its connection."""
+        self._done = True
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        else:
+            await self._source.aclose()
+
+    def __del__(self) -> None:
+        task = getattr(self, "_task", None)  # unset when __init__ rejected its arguments
+        # A stream that was closed has cancelled its task already; cancelling again would cut its cleanup short
+        if task is not None and not self._done and not task.done():
+            try:
+                task.cancel()
+            except RuntimeError:  # its loop is already closed
+                pass
+
+
+class SubscriberDetachedError(RuntimeError):
+    """Raised to a `detach` subscriber that fell too far behind its broadcast."""
+
+
+_POLICIES = ("block", "drop", "detach")
+
+
+class Subscription:
+    """
+    One consumer of a StreamBroadcast: an async iterator over the chunks
+    broadcast after it subscribed. At most `max_queue` chunks wait for it;
+    when it falls behind further, `policy` decides what happens:
+
+    - "block": the broadcast waits for it, pacing every subscriber and
+      ultimately the upstream connection.
+    - "drop": new chunks are skipped for this subscriber (see `dropped`).
+    - "detach": it is unsubscribed; after draining its queue it gets
+      SubscriberDetachedError while the others carry on.
+    """
+
+    def __init__(self, broadcast: "StreamBroadcast", max_queue: int, policy: str):
+        if max_queue < 1:
+            raise ValueError("max_queue must be >= 1")
+        if policy not in _POLICIES:
+            raise ValueError(f"policy must be one of {', '.join(_POLICIES)}, got {policy!r}")
+        self.max_queue = max_queue
+        self.policy = policy
+        self.dropped = 0
+        self.detached = False
+        self._broadcast = broadcast
+        self._items: Deque[Any] = collections.deque()
+        self._readable = asyncio.Event()
+        self._writable = asyncio.Event()
+        self._writable.set()
+        self._closed = False
+
+    def __aiter__(self) -> "Subscription":
+        return self
+
+    async def __aenter__(self) -> "Subscription":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+    async def __anext__(self) -> Any:
+        self._broadcast.start()
+        while not self._items:
+            self._readable.clear()
+            await self._readable.wait()
+        item = self._items[0]
+        if item is _END:
+            raise StopAsyncIteration
+        if isinstance(item, _Failure):
+            raise item.error
+        self._items.popleft()
+        self._writable.set()
+        return item
+
+    async def _put(self, item: Any) -> None:
+        while len(self._items) >= self.max_queue and not self._closed:
+            if self.policy == "drop":
+                self.dropped += 1
+                return
+            if self.policy == "detach":
+                self.detached = True
+                self._close()
+                self._finish(_Failure(SubscriberDetachedError(
+                    f"Subscriber fell more than {self.max_queue} chunks behind and was detached"
+                )))
+                return
+            self._writable.clear()
+            await self._writable.wait()
+        if not self._closed:
+            self._items.append(item)
+            self._readable.set()
+
+    def _finish(self, marker: Any) -> None:
+        # End markers bypass the bound so a full queue still terminates
+        self._items.append(marker)
+        self._readable.set()
+
+    def _close(self) -> None:
+        self._closed = True
+        self._writable.set()
+        self._broadcast._unsubscribe(self)
+
+    async def aclose(self) -> None:
+        """Unsubscribe. The upstream stream is closed once nobody is subscribed."""
+        if not self._closed:
+            self._close()
+            self._finish(_END)
+        await self._broadcast._close_if_unused()
+
+
+class StreamBroadcast:
+    """
+    Fans one upstream stream out to several consumers without requesting
+    it twice, e.g. a UI websocket, a log sink and a moderation check.
+
+    Subscribe every consumer first, then iterate the subscriptions
+    concurrently: reading starts with the first iteration (or `start()`).
+    The upstream stream is closed when it ends, on `aclose()`, or once all
+    subscribers have unsubscribed.
+    """
+
+    def __init__(self, source: AsyncIterable[Any], max_queue: int = 64, policy: str = "block"):
+        self._source = source
+        self.max_queue = max_queue
+        self.policy = policy
+        self.chunks = 0
+        self._subscribers: List[Subscription] = []
+        self._task: Optional[asyncio.Task] = None
+        self._finished = False
+
+    def subscribe(self, max_queue: Optional[int] = None, policy: Optional[str] = None) -> Subscription:
+        """Add a consumer, with its own queue bound and slow-consumer policy."""
+        subscription = Subscription(self, max_queue or self.max_queue, policy or self.policy)
+        if self._finished:
+            subscription._finish(_END)
+        else:
+            self._subscribers.append(subscription)
+        return subscription
+
+    def start(self) -> None:
+        """Start reading the upstream stream, if not already started."""
+        if self._task is None and not self._finished:
+            self._task = asyncio.ensure_future(self._pump())
+
+    async def __aenter__(self) -> "StreamBroadcast":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+    async def _pump(self) -> None:
+        end: Any = _END
+        try:
+            async for chunk in self._source:
+                self.chunks += 1
+                for subscription in list(self._subscribers):
+                    await subscription._put(chunk)
+                if not self._subscribers:
+                    break
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            end = _Failure(e)
+        finally:
+            self._finished = True
+            for subscription in self._subscribers:
+                subscription._finish(end)
+            self._subscribers.clear()
+            close = getattr(self._source, "aclose", None)
+            if close is not None:
+                await close()
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        if subscription in self._subscribers:
+            self._subscribers.remove(subscription)
+
+    async def _close_if_unused(self) -> None:
+        if not self._subscribers:
+            await self.aclose()
+
+    async def aclose(self) -> None:
+        """Stop the broadcast, ending every subscription and closing the upstream stream."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        elif not self._finished:
+            self._finished = True
+            close = getattr(self._source, "aclose", None)
+            if close is not None:
+                await close()
+        for subscription in self._subscribers:
+            subscription._finish(_END)
+        self._subscribers.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Chunks broadcast so far and the state of each active subscriber."""
+        return {
+            "chunks": self.chunks,
+            "subscribers": [
+                {"policy": s.policy, "queued": len(s._items), "dropped": s.dropped}
+                for s in self._subscribers
+            ]
+        }
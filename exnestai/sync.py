@@ -0,0 +1,429 @@
+"""
+Synchronous ExnestAI client for code that does not run an event loop.
+"""
+
+import contextlib
+import dataclasses
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set, Union
+
+import httpx
+
+from .models import (
+    ExnestMessage,
+    ExnestChatResponse,
+    ExnestCompletionResponse,
+    ExnestStreamChunk,
+    ExnestModel,
+    ExnestResponse,
+    EBCDecisionContext,
+    Error
+)
+from .retry import RetryPolicy, IDEMPOTENT_METHODS
+from .compact import compact_model
+from .codec import JSONCodec, get_codec
+from .accumulator import StreamAccumulator
+from .core import (
+    require_h2,
+    check_raw,
+    request_headers,
+    chat_body,
+    completion_body,
+    ebc_body,
+    retry_delay,
+    fallback_chain,
+    should_fail_over,
+    build_response,
+    models_params,
+    models_from,
+    model_from,
+    StreamDecoder,
+    StreamResume
+)
+
+_TRANSPORT_OPTIONS = ("base_url", "timeout", "max_connections", "max_keepalive_connections", "keepalive_expiry", "http2")
+
+
+class ExnestAISync:
+    """
+    Blocking counterpart of ExnestAI for WSGI apps, Celery tasks and
+    scripts. Calling the async client through `asyncio.run` sets up a new
+    event loop and new connections on every call; this client keeps one
+    `httpx.Client` whose connection pool is reused across calls and is
+    safe to share between threads, so create one per process.
+
+    The request surface matches ExnestAI (chat, completion, streaming,
+    EBC and model endpoints, fallback chains, `raw` responses, retries,
+    stream resumption, `update_config()` and health checks). Rate
+    limiting, circuit breakers, hedging, batching, broadcasting, caching
+    and coalescing are only available on the async client.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://api.exnest.app/v1",
+        timeout: int = 30000,
+        retries: int = 3,
+        retry_delay: int = 1000,
+        debug: bool = False,
+        max_connections: Optional[int] = 100,
+        max_keepalive_connections: Optional[int] = 20,
+        keepalive_expiry: Optional[int] = 5000,
+        http2: bool = False,
+        transport: Optional[httpx.BaseTransport] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        compact_models: bool = False,
+        json_codec: Union[str, JSONCodec, None] = None
+    ):
+        if not api_key:
+            raise ValueError("API key is required")
+        if http2 and transport is None:
+            require_h2()
+
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout / 1000  # Convert ms to seconds for httpx
+        self.retry_policy = retry_policy or RetryPolicy(max_retries=retries, base_delay=retry_delay)
+        self.retries = self.retry_policy.max_retries
+        self.retry_delay = self.retry_policy.base_delay / 1000  # Convert ms to seconds
+        self.compact_models = compact_models
+        self.codec = get_codec(json_codec)
+        self.debug = debug
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry / 1000 if keepalive_expiry is not None else None
+        self.http2 = http2
+        self._custom_transport = transport
+        self._closed = False
+        self._lock = threading.Lock()
+        # Requests running on each httpx client, and replaced clients to close once theirs finish
+        self._in_flight: Dict[httpx.Client, int] = {}
+        self._retired: Set[httpx.Client] = set()
+        self._client = self._build_client()
+
+    def _build_client(self) -> httpx.Client:
+        return httpx.Client(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            transport=self._custom_transport or httpx.HTTPTransport(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry
+                ),
+                http2=self.http2
+            )
+        )
+
+    @contextlib.contextmanager
+    def _use_client(self) -> Iterator[httpx.Client]:
+        """The current httpx client, kept open until the block exits even if `update_config()` replaces it."""
+        with self._lock:
+            client = self._client
+            self._in_flight[client] = self._in_flight.get(client, 0) + 1
+        try:
+            yield client
+        finally:
+            with self._lock:
+                self._in_flight[client] -= 1
+                idle = not self._in_flight[client]
+                if idle:
+                    del self._in_flight[client]
+                retired = idle and client in self._retired
+                self._retired.discard(client)
+            if retired:
+                client.close()
+
+    def __enter__(self) -> "ExnestAISync":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the client and its pooled connections."""
+        if self._closed:
+            return
+        self._closed = True
+        with self._lock:
+            clients = [self._client, *self._retired]
+            self._retired.clear()
+        for client in clients:
+            client.close()
+
+    def _model(self, cls: type) -> type:
+        return compact_model(cls) if self.compact_models else cls
+
+    def _execute_request(
+        self, method: str, endpoint: str, body: Optional[Dict[str, Any]] = None, params: Optional[Dict[str, Any]] = None,
+        retry_policy: Optional[RetryPolicy] = None
+    ) -> Dict[str, Any]:
+        return self.codec.loads(self._execute_raw_request(method, endpoint, body, params, retry_policy))
+
+    def _execute_raw_request(
+        self, method: str, endpoint: str, body: Optional[Dict[str, Any]] = None, params: Optional[Dict[str, Any]] = None,
+        retry_policy: Optional[RetryPolicy] = None
+    ) -> bytes:
+        """Send a request with retries, returning the undecoded body."""
+        if self._closed:
+            raise RuntimeError("ExnestAI client has been closed")
+
+        policy = retry_policy or self.retry_policy
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        content = self.codec.dumps(body) if body is not None else None
+        headers = request_headers(self.api_key)
+        attempt = 0
+        delay = None
+        while True:
+            try:
+                if self.debug:
+                    print(f"[ExnestAI] Attempt {attempt + 1}/{policy.max_retries + 1} - {method} {endpoint}")
+                with self._use_client() as client:
+                    response = client.request(method, endpoint, content=content, params=params, headers=headers)
+                response.raise_for_status()
+                if self.debug:
+                    print(f"[ExnestAI] Response status: {response.status_code}")
+                    print(f"[ExnestAI] Response body: {response.content.decode(errors='replace')}")
+                return response.content
+            except (httpx.RequestError, httpx.HTTPStatusError) as e:
+                if self.debug:
+                    print(f"[ExnestAI] Attempt {attempt + 1} failed: {e}")
+                wait, delay = retry_delay(e, attempt, idempotent, policy, delay, self.debug)
+                time.sleep(wait)
+                attempt += 1
+
+    def _execute_stream_request(self, endpoint: str, body: Dict[str, Any], resume: bool = False) -> Iterator[ExnestStreamChunk]:
+        """Stream `body` from `endpoint`, with the retry and resume behaviour of `ExnestAI.stream()`."""
+        body['stream'] = True
+        progress = StreamResume(body, resume)
+        request_body = body
+        attempt = 0
+        delay = None
+        while True:
+            started = False
+            try:
+                # Closed explicitly so an abandoned iterator releases its connection at once
+                with contextlib.closing(self._stream_attempt(endpoint, request_body)) as chunks:
+                    for chunk in chunks:
+                        started = True
+                        progress.record(chunk)
+                        yield chunk
+                return
+            except (httpx.RequestError, httpx.HTTPStatusError) as e:
+                if self.debug:
+                    print(f"[ExnestAI] Stream attempt {attempt + 1} failed: {e}")
+                if started and not progress.enabled:
+                    raise
+                wait, delay = retry_delay(e, attempt, False, self.retry_policy, delay, self.debug)
+                time.sleep(wait)
+                attempt += 1
+                request_body = progress.next_body(self.debug)
+
+    def _stream_attempt(self, endpoint: str, body: Dict[str, Any]) -> Iterator[ExnestStreamChunk]:
+        """A single streaming request, without retries."""
+        if self._closed:
+            raise RuntimeError("ExnestAI client has been closed")
+
+        headers = request_headers(self.api_key, stream=True)
+        with self._use_client() as client, \
+                client.stream("POST", endpoint, content=self.codec.dumps(body), headers=headers) as response:
+            response.raise_for_status()
+            decoder = StreamDecoder(self._model(ExnestStreamChunk), self.codec.loads, self.debug)
+            for raw_chunk in response.iter_bytes():
+                for _, chunk in decoder.feed(raw_chunk):
+                    yield chunk
+                if decoder.done:
+                    return
+
+    def _build_response(self, cls: type, content: bytes, raw: Union[bool, str], served_model: Optional[str] = None):
+        """The response body as raw bytes, a LazyResponse or a decoded `cls`, depending on `raw`."""
+        return build_response(self._model(cls), content, raw, served_model, self.codec.loads)
+
+    def _with_fallback(self, model: Union[str, List[str]], send):
+        """Call `send(model, retry_policy)` along a fallback chain, like `ExnestAI._with_fallback()`."""
+        chain = fallback_chain(model, self.retry_policy)
+        for position, (name, retry_policy) in enumerate(chain):
+            try:
+                return send(name, retry_policy)
+            except Exception as e:
+                if position == len(chain) - 1 or not should_fail_over(e, self.retry_policy):
+                    raise
+                if self.debug:
+                    print(f"[ExnestAI] {name} failed ({e}), falling back to {chain[position + 1][0]}")
+
+    def completion(
+        self, model: Union[str, List[str]], prompt: str, raw: Union[bool, str] = False, **kwargs
+    ) -> ExnestCompletionResponse:
+        """Text completion. See `ExnestAI.completion()`."""
+        check_raw(raw)
+
+        def send(name: str, retry_policy: Optional[RetryPolicy]) -> ExnestCompletionResponse:
+            body = completion_body(name, prompt, kwargs)
+            content = self._execute_raw_request("POST", "/completions", body, retry_policy=retry_policy)
+            return self._build_response(ExnestCompletionResponse, content, raw, name)
+
+        return self._with_fallback(model, send)
+
+    def chat(
+        self, model: Union[str, List[str]], messages: List[ExnestMessage], raw: Union[bool, str] = False, **kwargs
+    ) -> ExnestChatResponse:
+        """Chat completion. See `ExnestAI.chat()`."""
+        check_raw(raw)
+
+        def send(name: str, retry_policy: Optional[RetryPolicy]) -> ExnestChatResponse:
+            body = chat_body(name, messages, kwargs)
+            content = self._execute_raw_request("POST", "/chat/completions", body, retry_policy=retry_policy)
+            return self._build_response(ExnestChatResponse, content, raw, name)
+
+        return self._with_fallback(model, send)
+
+    def responses(self, model: Union[str, List[str]], input_str: str, max_tokens: int = 200) -> ExnestChatResponse:
+        """
+        Simple response method for single-turn conversations
+        """
+        if not input_str:
+            raise ValueError("Input must be a non-empty string")
+
+        return self.chat(model, [ExnestMessage(role="user", content=input_str)], max_tokens=max_tokens)
+
+    def stream_completion(self, model: str, prompt: str, resume: bool = False, **kwargs) -> Iterator[ExnestStreamChunk]:
+        """Stream a text completion. See `stream()`."""
+        body = completion_body(model, prompt, kwargs)
+        return self._execute_stream_request("/completions", body, resume)
+
+    def stream(
+        self, model: str, messages: List[ExnestMessage], collect: Union[bool, StreamAccumulator] = False,
+        resume: bool = False, **kwargs
+    ) -> Union[Iterator[ExnestStreamChunk], ExnestChatResponse]:
+        """
+        Stream a chat completion as a regular iterator of chunks. The
+        connection goes back to the pool when the iterator is exhausted or
+        closed; call `close()` on it when you stop reading early. `collect`
+        and `resume` work as in `ExnestAI.stream()`.
+        """
+        body = chat_body(model, messages, kwargs)
+        chunks = self._execute_stream_request("/chat/completions", body, resume)
+        if collect is False:
+            return chunks
+        accumulator = StreamAccumulator() if collect is True else collect
+        accumulator.start()
+        for chunk in chunks:
+            accumulator.add(chunk)
+        return accumulator.response(self._model(ExnestChatResponse))
+
+    def _post_ebc(self, endpoint: str, body: Dict[str, Any], raw: Union[bool, str]) -> ExnestChatResponse:
+        check_raw(raw)
+        return self._build_response(ExnestChatResponse, self._execute_raw_request("POST", endpoint, body), raw)
+
+    def deep_think(self, messages: List[ExnestMessage], raw: Union[bool, str] = False, **kwargs) -> ExnestChatResponse:
+        """
+        EBC Deep Think Analysis
+        Performs advanced reasoning and decision making
+        """
+        body = ebc_body(messages, kwargs)
+        return self._post_ebc("/ebc/deep-think", body, raw)
+
+    def structured_decision(
+        self, messages: List[ExnestMessage], context: EBCDecisionContext, raw: Union[bool, str] = False, **kwargs
+    ) -> ExnestChatResponse:
+        """
+        EBC Structured Decision Making
+        Performs structured analysis based on decision context
+        """
+        body = ebc_body(messages, kwargs, context)
+        return self._post_ebc("/decision-making/session", body, raw)
+
+    def delegate(self, messages: List[ExnestMessage], raw: Union[bool, str] = False, **kwargs) -> ExnestChatResponse:
+        """
+        EBC Task Delegation
+        Quick reasoning for task delegation and action dispatch
+        """
+        body = ebc_body(messages, kwargs)
+        return self._post_ebc("/ebc/delegate", body, raw)
+
+    def _list_models(self, endpoint: str, openai_compatible: bool) -> Union[List[ExnestModel], Dict[str, Any]]:
+        response_data = self._execute_request("GET", endpoint, params=models_params(openai_compatible))
+        return models_from(response_data, self._model(ExnestModel), openai_compatible)
+
+    def get_models(self, openai_compatible: bool = False) -> Union[List[ExnestModel], Dict[str, Any]]:
+        return self._list_models("/models", openai_compatible)
+
+    def get_model(self, model_name: str, openai_compatible: bool = False) -> Union[ExnestModel, Dict[str, Any]]:
+        response_data = self._execute_request("GET", f"/models/{model_name}", params=models_params(openai_compatible))
+        return model_from(response_data, self._model(ExnestModel), openai_compatible)
+
+    def get_models_by_provider(self, provider: str, openai_compatible: bool = False) -> Union[List[ExnestModel], Dict[str, Any]]:
+        return self._list_models(f"/models/provider/{provider}", openai_compatible)
+
+    def get_config(self) -> Dict[str, Any]:
+        return {
+            "baseUrl": self.base_url,
+            "timeout": self.timeout * 1000,
+            "retries": self.retries,
+            "retryDelay": self.retry_delay * 1000,
+            "debug": self.debug,
+            "maxConnections": self.max_connections,
+            "maxKeepaliveConnections": self.max_keepalive_connections,
+            "keepaliveExpiry": self.keepalive_expiry * 1000 if self.keepalive_expiry is not None else None,
+            "http2": self.http2,
+            "compactModels": self.compact_models,
+            "jsonCodec": self.codec.name,
+            "apiKey": f"****{self.api_key[-4:]}"
+        }
+
+    def update_config(self, **kwargs):
+        """
+        Update client settings. Changes that affect the transport (base URL,
+        timeout, pool limits, HTTP/2) swap in a new httpx client; the old one
+        keeps serving its in-flight requests and is closed once they finish.
+        """
+        if "api_key" in kwargs: self.api_key = kwargs["api_key"]
+        if "base_url" in kwargs: self.base_url = kwargs["base_url"]
+        if "timeout" in kwargs: self.timeout = kwargs["timeout"] / 1000
+        if "retry_policy" in kwargs: self.retry_policy = kwargs["retry_policy"]
+        if "retries" in kwargs:
+            self.retry_policy = dataclasses.replace(self.retry_policy, max_retries=kwargs["retries"])
+        if "retry_delay" in kwargs:
+            self.retry_policy = dataclasses.replace(self.retry_policy, base_delay=kwargs["retry_delay"])
+        self.retries = self.retry_policy.max_retries
+        self.retry_delay = self.retry_policy.base_delay / 1000
+        if "debug" in kwargs: self.debug = kwargs["debug"]
+        if "compact_models" in kwargs: self.compact_models = kwargs["compact_models"]
+        if "json_codec" in kwargs: self.codec = get_codec(kwargs["json_codec"])
+        if "max_connections" in kwargs: self.max_connections = kwargs["max_connections"]
+        if "max_keepalive_connections" in kwargs: self.max_keepalive_connections = kwargs["max_keepalive_connections"]
+        if "keepalive_expiry" in kwargs:
+            expiry = kwargs["keepalive_expiry"]
+            self.keepalive_expiry = expiry / 1000 if expiry is not None else None
+        if "http2" in kwargs:
+            if kwargs["http2"] and self._custom_transport is None:
+                require_h2()
+            self.http2 = kwargs["http2"]
+
+        if any(key in kwargs for key in _TRANSPORT_OPTIONS) and not self._closed:
+            with self._lock:
+                old, self._client = self._client, self._build_client()
+                if self._custom_transport is not None:
+                    old = None  # its transport now serves the new client
+                elif old in self._in_flight:
+                    self._retired.add(old)
+                    old = None
+            if old is not None:
+                old.close()
+
+    def test_connection(self) -> ExnestResponse:
+        try:
+            return self.chat("openai:gpt-3.5-turbo", [ExnestMessage(role="user", content="Hello")], max_tokens=5)
+        except Exception as e:
+            error = self._model(Error)(message=str(e), type="client_error", code="connection_error")
+            return self._model(ExnestChatResponse)(error=error)
+
+    def health_check(self) -> Dict[str, Any]:
+        test_result = self.test_connection()
+        return {
+            "status": "healthy" if not test_result.error else "unhealthy",
+            "timestamp": time.monotonic(),
+            "config": self.get_config()
+        }
@@ -0,0 +1,174 @@
+"""
+Transport helpers for the ExnestAI client.
+
+Wraps the underlying httpx transport to enforce per-host concurrency limits
+and to report connection pool occupancy.
+"""
+
+import asyncio
+from typing import Optional, Dict, Any, Callable, AsyncIterator, List
+import httpx
+
+
+class InFlightTracker:
+    """Counts in-flight operations and lets callers wait until none remain."""
+
+    def __init__(self):
+        self.count = 0
+        self._waiters: List[asyncio.Future] = []
+
+    def enter(self) -> None:
+        self.count += 1
+
+    def exit(self) -> None:
+        self.count -= 1
+        if self.count == 0:
+            for waiter in self._waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+            self._waiters.clear()
+
+    async def wait_idle(self) -> None:
+        while self.count:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            await waiter
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response stream that runs a release callback exactly once when closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+        self._released = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._released:
+                self._released = True
+                self._release()
+
+
+class HostLimitedTransport(httpx.AsyncBaseTransport):
+    """
+    Transport wrapper that caps concurrent requests per host and tracks
+    in-flight requests. A request holds its slot until the response body
+    is closed, so on HTTP/1.1 the cap equals the connections per host.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_connections_per_host: Optional[int] = None):
+        if max_connections_per_host is not None and max_connections_per_host < 1:
+            raise ValueError("max_connections_per_host must be at least 1")
+
+        self.transport = transport
+        self.max_connections_per_host = max_connections_per_host
+        self.requests = InFlightTracker()
+        self.peak_in_flight = 0
+        self.total_requests = 0
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._waiting: Dict[str, int] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.netloc.decode("ascii")
+        semaphore = None
+        if self.max_connections_per_host is not None:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = self._semaphores[host] = asyncio.Semaphore(self.max_connections_per_host)
+            self._waiting[host] = self._waiting.get(host, 0) + 1
+            try:
+                await semaphore.acquire()
+            finally:
+                self._waiting[host] -= 1
+
+        self._in_flight[host] = self._in_flight.get(host, 0) + 1
+        self.requests.enter()
+        self.total_requests += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+        def release() -> None:
+            self._in_flight[host] -= 1
+            self.requests.exit()
+            if semaphore is not None:
+                semaphore.release()
+
+        try:
+            response = await self.transport.handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+
+        if response.is_closed:
+            # Fully buffered responses (e.g. from MockTransport) are never closed again.
+            release()
+        else:
+            response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+    def close_sockets(self) -> None:
+        """
+        Close the pooled sockets without awaiting anything, for a pool
+        whose event loop is closed and so can no longer run `aclose()`.
+        Like `get_stats()`, this reads httpcore internals and skips
+        whatever is missing.
+        """
+        pool = getattr(self.transport, "_pool", None)
+        for conn in list(getattr(pool, "connections", None) or ()):
+            stream = getattr(getattr(conn, "_connection", None), "_network_stream", None)
+            sock = stream.get_extra_info("socket") if stream is not None else None
+            # asyncio hands out a TransportSocket view, without close(), of the real socket
+            sock = getattr(sock, "_sock", sock)
+            if sock is not None:
+                sock.close()
+
+    @property
+    def in_flight(self) -> int:
+        return self.requests.count
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of pool occupancy. Connection counts are read from the
+        httpcore pool when the wrapped transport exposes one, else None.
+        Those are httpcore internals, so anything missing is skipped
+        rather than raised.
+        """
+        stats: Dict[str, Any] = {
+            "connections": None,
+            "activeConnections": None,
+            "idleConnections": None,
+            "http2Connections": None,
+            "queuedRequests": None,
+            "inFlightRequests": self.in_flight,
+            "peakInFlightRequests": self.peak_in_flight,
+            "waitingForHostSlot": sum(self._waiting.values()),
+            "totalRequests": self.total_requests,
+            "hosts": {
+                host: {"inFlight": count, "waiting": self._waiting.get(host, 0)}
+                for host, count in self._in_flight.items()
+            },
+        }
+
+        pool = getattr(self.transport, "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is not None:
+            idle = sum(1 for conn in connections if getattr(conn, "is_idle", lambda: False)())
+            stats["connections"] = len(connections)
+            stats["idleConnections"] = idle
+            stats["activeConnections"] = len(connections) - idle
+            stats["http2Connections"] = sum(1 for conn in connections if "HTTP/2" in getattr(conn, "info", str)())
+            pending = getattr(pool, "_requests", None)
+            if pending is not None:
+                stats["queuedRequests"] = sum(1 for req in pending if getattr(req, "connection", None) is None)
+
+        return stats
@@ -1,5 +1,5 @@
 
-from typing import Optional, List, AsyncGenerator
+from typing import Optional, List, AsyncGenerator, Union
 from .client import ExnestAI
 from .models import (
     ExnestMessage,
@@ -16,8 +16,18 @@ class ExnestWrapper:
             client_options["base_url"] = base_url
         self._client = ExnestAI(**client_options)
 
+    async def __aenter__(self) -> "ExnestWrapper":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the underlying client and its connections."""
+        await self._client.aclose()
+
     async def completion(
-        self, model: str, prompt: str, max_tokens: Optional[int] = None
+        self, model: Union[str, List[str]], prompt: str, max_tokens: Optional[int] = None
     ) -> ExnestCompletionResponse:
         opts = {}
         if max_tokens:
@@ -25,14 +35,14 @@ class ExnestWrapper:
         return await self._client.completion(model, prompt, **opts)
 
     async def chat(
-        self, model: str, messages: List[ExnestMessage], max_tokens: Optional[int] = None
+        self, model: Union[str, List[str]], messages: List[ExnestMessage], max_tokens: Optional[int] = None
     ) -> ExnestChatResponse:
         opts = {}
         if max_tokens:
             opts["max_tokens"] = max_tokens
         return await self._client.chat(model, messages, **opts)
 
-    async def response(self, model: str, input_str: str, max_tokens: int = 200) -> ExnestChatResponse:
+    async def response(self, model: Union[str, List[str]], input_str: str, max_tokens: int = 200) -> ExnestChatResponse:
         """Legacy method for simple, single-turn chat."""
         messages = [ExnestMessage(role="user", content=input_str)]
         return await self.chat(model, messages, max_tokens=max_tokens)
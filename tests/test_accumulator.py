@@ -0,0 +1,109 @@
+"""
+Tests for rebuilding chat responses from stream chunks
+"""
+
+import json
+import pytest
+import httpx
+
+from exnestai import compact
+from exnestai.accumulator import StreamAccumulator
+from exnestai.client import ExnestAI
+from exnestai.decoding import decode
+from exnestai.models import ExnestChatResponse, ExnestMessage, ExnestStreamChunk, Usage
+
+MESSAGES = [ExnestMessage(role="user", content="hi")]
+
+
+def _chunk(choices, **extra):
+    return decode(ExnestStreamChunk, {"id": "c1", "object": "chat.completion.chunk", "created": 1, "model": "m",
+                                      "choices": choices, **extra})
+
+
+def test_joins_deltas_per_choice():
+    accumulator = StreamAccumulator()
+    accumulator.add(_chunk([{"index": 0, "delta": {"role": "assistant", "content": "Hel"}},
+                            {"index": 1, "delta": {"role": "assistant", "content": "Bon"}}]))
+    accumulator.add(_chunk([{"index": 0, "delta": {"content": "lo"}}, {"index": 1, "delta": {"content": "jour"}}]))
+    accumulator.add(_chunk([{"index": 0, "delta": {}, "finish_reason": "stop"},
+                            {"index": 1, "delta": {}, "finish_reason": "length"}]))
+    accumulator.add(_chunk([], usage={"prompt_tokens": 3, "completion_tokens": 4, "total_tokens": 7}))
+
+    response = accumulator.response()
+
+    assert isinstance(response, ExnestChatResponse)
+    assert (response.id, response.model, response.created) == ("c1", "m", 1)
+    assert [(c.index, c.message.role, c.message.content, c.finish_reason) for c in response.choices] == [
+        (0, "assistant", "Hello", "stop"),
+        (1, "assistant", "Bonjour", "length"),
+    ]
+    assert response.usage == Usage(prompt_tokens=3, completion_tokens=4, total_tokens=7)
+    assert accumulator.text(1) == "Bonjour"
+
+
+def test_latency_figures():
+    accumulator = StreamAccumulator()
+    assert accumulator.time_to_first_token is None
+
+    accumulator.add(_chunk([{"index": 0, "delta": {"role": "assistant"}}]))
+    assert accumulator.time_to_first_token is None
+    for token in ["a", "b", "c"]:
+        accumulator.add(_chunk([{"index": 0, "delta": {"content": token}}]))
+
+    stats = accumulator.get_stats()
+    assert stats["chunks"] == 4
+    assert stats["timeToFirstToken"] >= 0
+    assert stats["interTokenLatency"]["max"] >= stats["interTokenLatency"]["p50"] >= 0
+    assert stats["duration"] >= stats["timeToFirstToken"]
+
+
+def _client(**kwargs):
+    events = [
+        {"choices": [{"index": 0, "delta": {"role": "assistant", "content": "Hi"}}]},
+        {"choices": [{"index": 0, "delta": {"content": " there"}, "finish_reason": "stop"}]},
+        {"choices": [], "usage": {"prompt_tokens": 1, "completion_tokens": 2, "total_tokens": 3}},
+    ]
+    body = b"".join(
+        b"data: " + json.dumps({"id": "c1", "object": "chat.completion.chunk", "created": 1, "model": "m", **event}).encode()
+        + b"\n\n"
+        for event in events
+    ) + b"data: [DONE]\n\n"
+
+    def handler(request):
+        return httpx.Response(200, content=body, headers={"Content-Type": "text/event-stream"})
+
+    return ExnestAI(api_key="test-key", transport=httpx.MockTransport(handler), **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_stream_collect():
+    client = _client()
+
+    response = await client.stream("m", MESSAGES, collect=True)
+
+    assert response.choices[0].message.content == "Hi there"
+    assert response.choices[0].finish_reason == "stop"
+    assert response.usage.total_tokens == 3
+
+
+@pytest.mark.asyncio
+async def test_stream_collect_with_accumulator_and_compact_models():
+    client = _client(compact_models=True)
+    accumulator = StreamAccumulator()
+
+    response = await client.stream("m", MESSAGES, collect=accumulator)
+
+    assert isinstance(response, compact.ExnestChatResponse)
+    assert isinstance(response.usage, compact.Usage)
+    assert accumulator.get_stats()["chunks"] == 3
+    assert accumulator.time_to_first_token is not None
+
+
+@pytest.mark.asyncio
+async def test_stream_still_yields_chunks():
+    client = _client()
+
+    chunks = [chunk async for chunk in client.stream("m", MESSAGES)]
+
+    assert len(chunks) == 3
+    assert chunks[-1].usage.total_tokens == 3
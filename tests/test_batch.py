@@ -0,0 +1,89 @@
+"""
+Tests for bounded-concurrency batch requests
+"""
+
+import asyncio
+import json
+import pytest
+import httpx
+
+from exnestai.client import ExnestAI
+from exnestai.models import ExnestMessage, ExnestChatResponse, ExnestCompletionResponse
+
+
+def _batch_client(delay_for=lambda body: 0.01):
+    stats = {"active": 0, "peak": 0}
+
+    async def handler(request):
+        body = json.loads(request.content)
+        stats["active"] += 1
+        stats["peak"] = max(stats["peak"], stats["active"])
+        await asyncio.sleep(delay_for(body))
+        stats["active"] -= 1
+        if body.get("max_tokens") == 0:
+            return httpx.Response(400, json={"error": "bad request"})
+        return httpx.Response(200, json={"id": body.get("user"), "model": body["model"]})
+
+    client = ExnestAI(api_key="test-key", retry_delay=1, transport=httpx.MockTransport(handler))
+    return client, stats
+
+
+def _chat_requests(count):
+    return [
+        {"model": "openai:gpt-4o-mini", "messages": [ExnestMessage(role="user", content="hi")], "user": str(i)}
+        for i in range(count)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_chat_many_preserves_order_and_bounds_concurrency():
+    client, stats = _batch_client(delay_for=lambda body: 0.02 - int(body["user"]) * 0.001)
+
+    results = await client.chat_many(_chat_requests(12), concurrency=3)
+
+    assert [result.index for result in results] == list(range(12))
+    assert [result.response.id for result in results] == [str(i) for i in range(12)]
+    assert all(result.ok and isinstance(result.response, ExnestChatResponse) for result in results)
+    assert stats["peak"] == 3
+
+
+@pytest.mark.asyncio
+async def test_chat_many_captures_per_item_errors():
+    client, _ = _batch_client()
+    requests = _chat_requests(3)
+    requests[1]["max_tokens"] = 0
+
+    results = await client.chat_many(requests, concurrency=2)
+
+    assert results[0].ok and results[2].ok
+    assert not results[1].ok
+    assert isinstance(results[1].error, httpx.HTTPStatusError)
+
+
+@pytest.mark.asyncio
+async def test_chat_many_as_completed_yields_in_completion_order():
+    client, _ = _batch_client(delay_for=lambda body: 0.05 if body["user"] == "0" else 0.0)
+
+    indexes = [result.index async for result in client.chat_many_as_completed(_chat_requests(4), concurrency=4)]
+
+    assert sorted(indexes) == [0, 1, 2, 3]
+    assert indexes[-1] == 0
+
+
+@pytest.mark.asyncio
+async def test_completion_many():
+    client, _ = _batch_client()
+    requests = ({"model": "openai:gpt-4o-mini", "prompt": f"p{i}", "user": str(i)} for i in range(5))
+
+    results = await client.completion_many(requests, concurrency=2)
+
+    assert all(isinstance(result.response, ExnestCompletionResponse) for result in results)
+    assert [result.response.id for result in results] == ["0", "1", "2", "3", "4"]
+
+
+@pytest.mark.asyncio
+async def test_invalid_concurrency():
+    client, _ = _batch_client()
+
+    with pytest.raises(ValueError, match="concurrency"):
+        await client.chat_many(_chat_requests(1), concurrency=0)
@@ -0,0 +1,138 @@
+"""
+Tests for fanning one stream out to several consumers
+"""
+
+import asyncio
+import json
+import pytest
+import httpx
+
+from exnestai.client import ExnestAI
+from exnestai.models import ExnestMessage
+from exnestai.streaming import StreamBroadcast, SubscriberDetachedError
+
+MESSAGES = [ExnestMessage(role="user", content="hi")]
+
+
+async def _numbers(count, closed=None):
+    try:
+        for index in range(count):
+            yield index
+            await asyncio.sleep(0)
+    finally:
+        if closed is not None:
+            closed.append(True)
+
+
+async def _collect(subscription, delay=0):
+    items = []
+    async for item in subscription:
+        items.append(item)
+        await asyncio.sleep(delay)
+    return items
+
+
+@pytest.mark.asyncio
+async def test_every_subscriber_gets_every_chunk():
+    broadcast = StreamBroadcast(_numbers(20), max_queue=2)
+    first, second = broadcast.subscribe(), broadcast.subscribe()
+
+    results = await asyncio.gather(_collect(first), _collect(second, delay=0.001))
+
+    assert results == [list(range(20)), list(range(20))]
+    assert broadcast.chunks == 20
+
+
+@pytest.mark.asyncio
+async def test_drop_policy_skips_chunks_for_slow_subscriber():
+    broadcast = StreamBroadcast(_numbers(50))
+    fast = broadcast.subscribe()
+    slow = broadcast.subscribe(max_queue=2, policy="drop")
+
+    fast_items, slow_items = await asyncio.gather(_collect(fast), _collect(slow, delay=0.005))
+
+    assert fast_items == list(range(50))
+    assert slow.dropped > 0
+    assert len(slow_items) + slow.dropped == 50
+    assert slow_items == sorted(slow_items)
+
+
+@pytest.mark.asyncio
+async def test_detach_policy_removes_slow_subscriber():
+    broadcast = StreamBroadcast(_numbers(50))
+    fast = broadcast.subscribe()
+    slow = broadcast.subscribe(max_queue=3, policy="detach")
+
+    async def consume_slow():
+        items = []
+        with pytest.raises(SubscriberDetachedError):
+            async for item in slow:
+                items.append(item)
+                await asyncio.sleep(0.005)
+        return items
+
+    fast_items, slow_items = await asyncio.gather(_collect(fast), consume_slow())
+
+    assert fast_items == list(range(50))
+    assert slow.detached
+    assert slow_items == list(range(len(slow_items)))
+
+
+@pytest.mark.asyncio
+async def test_upstream_closed_when_all_subscribers_leave():
+    closed = []
+    broadcast = StreamBroadcast(_numbers(10_000, closed))
+    subscription = broadcast.subscribe()
+
+    async for item in subscription:
+        if item == 3:
+            break
+    await subscription.aclose()
+
+    assert closed == [True]
+    assert broadcast.chunks < 10_000
+
+
+@pytest.mark.asyncio
+async def test_upstream_errors_reach_every_subscriber():
+    async def failing():
+        yield 1
+        raise httpx.RemoteProtocolError("peer closed connection")
+
+    broadcast = StreamBroadcast(failing())
+    subscriptions = [broadcast.subscribe(), broadcast.subscribe()]
+
+    results = await asyncio.gather(*(_collect(s) for s in subscriptions), return_exceptions=True)
+
+    assert all(isinstance(result, httpx.RemoteProtocolError) for result in results)
+
+
+def test_invalid_policy_is_rejected():
+    broadcast = StreamBroadcast(_numbers(1))
+
+    with pytest.raises(ValueError):
+        broadcast.subscribe(policy="ignore")
+
+
+@pytest.mark.asyncio
+async def test_client_broadcast_makes_one_request():
+    requests = []
+    body = b"".join(
+        b"data: " + json.dumps({"id": "c1", "object": "chat.completion.chunk", "created": 1, "model": "m",
+                                "choices": [{"index": 0, "delta": {"content": token}}]}).encode() + b"\n\n"
+        for token in ["a", "b", "c"]
+    ) + b"data: [DONE]\n\n"
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, content=body)
+
+    client = ExnestAI(api_key="test-key", transport=httpx.MockTransport(handler))
+    broadcast = client.broadcast("m", MESSAGES)
+    subscriptions = [broadcast.subscribe() for _ in range(3)]
+
+    async with broadcast:
+        results = await asyncio.gather(*(_collect(s) for s in subscriptions))
+
+    assert [[chunk.choices[0].delta.content for chunk in items] for items in results] == [["a", "b", "c"]] * 3
+    assert len(requests) == 1
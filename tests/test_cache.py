@@ -0,0 +1,311 @@
+"""
+Tests for the response cache
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import httpx
+
+from exnestai.cache import ResponseCache, SQLiteCache, cache_key
+from exnestai.client import ExnestAI
+from exnestai.hedging import HedgePolicy
+from exnestai.models import ExnestMessage
+
+MESSAGES = [ExnestMessage(role="user", content="Classify: great product")]
+BODY = json.dumps({
+    "id": "chatcmpl-1",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "positive"}}]
+}).encode()
+
+
+def _client(calls, **kwargs):
+    def handler(request):
+        calls.append(json.loads(request.content))
+        return httpx.Response(200, content=BODY)
+
+    return ExnestAI(api_key="test-key", retry_delay=1, transport=httpx.MockTransport(handler), **kwargs)
+
+
+def test_key_is_canonical():
+    url = "https://api.exnest.app/v1/chat/completions"
+
+    assert cache_key(url, {"model": "m", "temperature": 0, "max_tokens": 5}) == \
+        cache_key(url, {"max_tokens": 5, "temperature": 0, "model": "m"})
+    assert cache_key(url, {"model": "m", "temperature": 0}) != cache_key(url, {"model": "n", "temperature": 0})
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = ResponseCache(max_entries=2, max_bytes=10)
+    cache.set("a", b"1234")
+    cache.set("b", b"1234")
+    cache.get("a")
+    cache.set("c", b"1234")  # evicts b, the least recently used
+
+    assert cache.get("b") is None
+    assert cache.get("a") == cache.get("c") == b"1234"
+
+    cache.set("d", b"12345678")  # 8 + 4 bytes exceed the limit: evicts a, then c
+    assert len(cache) == 1 and cache.size == 8
+    cache.set("e", b"x" * 11)  # larger than the whole cache
+    assert cache.get("e") is None
+    assert cache.get_stats()["evictions"] == 3
+
+
+def test_ttl_expiry():
+    cache = ResponseCache(ttl=20)
+    cache.set("a", b"body")
+    assert cache.get("a") == b"body"
+
+    time.sleep(0.03)
+
+    assert cache.get("a") is None
+    assert cache.get_stats()["expirations"] == 1
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_deterministic_requests_are_cached():
+    calls = []
+    client = _client(calls, cache=ResponseCache())
+
+    first = await client.chat("m", MESSAGES, temperature=0)
+    second = await client.chat("m", MESSAGES, temperature=0)
+
+    assert len(calls) == 1
+    assert first.choices[0].message.content == second.choices[0].message.content == "positive"
+    assert second.served_model == "m"
+    assert client.get_cache_stats()["hits"] == 1
+    assert client.get_cache_stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_sampled_requests_are_not_cached_unless_asked():
+    calls = []
+    client = _client(calls, cache=ResponseCache())
+
+    await client.completion("m", "prompt", temperature=0.7)
+    await client.completion("m", "prompt", temperature=0.7)
+    assert len(calls) == 2
+
+    await client.completion("m", "prompt", temperature=0.7, cache=True)
+    await client.completion("m", "prompt", temperature=0.7, cache=True)
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_cache_false_bypasses():
+    calls = []
+    client = _client(calls, cache=ResponseCache())
+
+    await client.chat("m", MESSAGES, temperature=0)
+    await client.chat("m", MESSAGES, temperature=0, cache=False)
+
+    assert len(calls) == 2
+    assert "cache" not in calls[1]
+
+
+@pytest.mark.asyncio
+async def test_raw_responses_share_the_cache():
+    calls = []
+    client = _client(calls, cache=ResponseCache())
+
+    await client.chat("m", MESSAGES, temperature=0)
+
+    assert await client.chat("m", MESSAGES, temperature=0, raw=True) == BODY
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_no_cache_by_default():
+    calls = []
+    client = _client(calls)
+
+    await client.chat("m", MESSAGES, temperature=0)
+    await client.chat("m", MESSAGES, temperature=0)
+
+    assert len(calls) == 2
+    assert client.get_cache_stats() is None
+
+
+def test_in_memory_cache_is_thread_safe():
+    cache = ResponseCache(max_entries=16)
+
+    def work(index):
+        cache.set(f"key-{index}", BODY)
+        return cache.get(f"key-{index % 32}")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(work, range(2000)))
+
+    assert len(cache) == 16 and cache.size == 16 * len(BODY)
+    assert all(result in (None, BODY) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_keeps_the_model_that_served_it():
+    calls = []
+
+    async def handler(request):
+        model = json.loads(request.content)["model"]
+        calls.append(model)
+        if model == "m":
+            await asyncio.sleep(5)
+        return httpx.Response(200, content=BODY)
+
+    client = ExnestAI(
+        api_key="test-key", retries=0, transport=httpx.MockTransport(handler), cache=ResponseCache(),
+        hedging=HedgePolicy(initial_delay=20, min_delay=1, model="backup")
+    )
+
+    first = await asyncio.wait_for(client.chat("m", MESSAGES, temperature=0, hedge=True), 1)
+    second = await client.chat("m", MESSAGES, temperature=0, hedge=True)
+
+    assert first.served_model == second.served_model == "backup"
+    assert calls == ["m", "backup"]
+
+
+@pytest.mark.asyncio
+async def test_closed_client_does_not_serve_from_cache():
+    calls = []
+    client = _client(calls, cache=ResponseCache())
+    await client.chat("m", MESSAGES, temperature=0)
+    await client.aclose()
+
+    with pytest.raises(RuntimeError, match="closed"):
+        await client.chat("m", MESSAGES, temperature=0)
+
+
+def test_sqlite_round_trip_is_compressed(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"))
+    content = BODY * 50
+
+    cache.set("a", content)
+
+    assert cache.get("a") == content
+    assert cache.get("b") is None
+    assert cache.get_stats()["bytes"] < len(content) / 5
+    assert cache.get_stats()["hits"] == cache.get_stats()["misses"] == 1
+
+
+def test_sqlite_survives_restarts_and_is_shared(tmp_path):
+    path = str(tmp_path / "cache.db")
+    writer = SQLiteCache(path)
+    writer.set("a", BODY)
+    writer.close()
+
+    assert SQLiteCache(path).get("a") == BODY
+    assert SQLiteCache(path).get_stats()["entries"] == 1
+
+
+def test_sqlite_keeps_served_model(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"))
+    cache.set("a", BODY, "backup")
+    cache.set("b", BODY)
+
+    assert cache.get_entry("a") == (BODY, "backup")
+    assert cache.get_entry("b") == (BODY, None)
+    assert cache.get_entry("c") is None
+
+
+def test_sqlite_evicts_least_recently_used(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"), max_entries=2, touch_interval=0)
+    cache.set("a", b"1")
+    time.sleep(0.01)
+    cache.set("b", b"2")
+    time.sleep(0.01)
+    cache.get("a")
+    cache.set("c", b"3")  # evicts b, the least recently used
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1" and cache.get("c") == b"3"
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_sqlite_evicts_in_batches_past_the_limits(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"), max_entries=100, touch_interval=0)
+
+    for index in range(150):
+        cache.set(f"key-{index}", BODY)
+
+    # Every 6th insert overflows the cache, which is then cut to 95 entries
+    assert len(cache) == 96
+    assert cache.get_stats()["evictions"] == 54
+    assert cache.get("key-149") == BODY and cache.get("key-0") is None
+
+
+def test_sqlite_totals_track_every_change(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = SQLiteCache(path, ttl=20)
+    cache.set("a", BODY)
+    cache.set("a", BODY * 10)
+    cache.set("b", BODY)
+    cache.delete("b")
+    cache.set("c", BODY)
+    time.sleep(0.03)
+    cache.get("c")
+    cache.set("d", BODY)
+
+    conn = sqlite3.connect(path)
+    assert cache.get_stats()["entries"] == 1
+    assert (len(cache), cache.get_stats()["bytes"]) == \
+        conn.execute("SELECT COUNT(*), SUM(size) FROM responses").fetchone()
+    cache.clear()
+    assert (len(cache), cache.get_stats()["bytes"]) == (0, 0)
+
+
+def test_sqlite_ttl_expiry(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"), ttl=20)
+    cache.set("a", b"body")
+    time.sleep(0.03)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_sqlite_concurrent_threads(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"))
+
+    def work(index):
+        cache.set(f"key-{index}", BODY)
+        return cache.get(f"key-{index % 4}")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(work, range(64)))
+
+    assert len(cache) == 64
+    assert all(result in (None, BODY) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_client_with_sqlite_cache_covers_ebc(tmp_path):
+    calls = []
+    client = _client(calls, cache=SQLiteCache(str(tmp_path / "cache.db")))
+
+    for _ in range(2):
+        await client.delegate(MESSAGES, temperature=0)
+        await client.chat("m", MESSAGES, temperature=0)
+
+    assert len(calls) == 2
+    assert client.get_cache_stats()["hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_client_runs_sqlite_cache_off_the_event_loop(tmp_path):
+    threads = []
+
+    class RecordingCache(SQLiteCache):
+        def get_entry(self, key):
+            threads.append(threading.current_thread())
+            return super().get_entry(key)
+
+    client = _client([], cache=RecordingCache(str(tmp_path / "cache.db")))
+
+    await client.chat("m", MESSAGES, temperature=0)
+
+    assert threads and threading.main_thread() not in threads
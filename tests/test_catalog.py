@@ -0,0 +1,137 @@
+"""
+Tests for the cached model catalog
+"""
+
+import asyncio
+import pytest
+import httpx
+
+from exnestai.catalog import ModelCatalog
+from exnestai.client import ExnestAI
+from exnestai.models import ExnestModel
+
+
+def _model(provider, name):
+    return {
+        "id": f"{provider}:{name}", "name": name, "displayName": name, "description": "",
+        "provider": {"id": provider, "name": provider, "displayName": provider.title()},
+        "pricing": {"inputPrice": "0.15", "outputPrice": "0.60", "currency": "USD", "per": "1M"},
+        "limits": {"maxTokens": 16384, "contextWindow": 128000},
+        "isActive": True, "createdAt": "2024-07-18"
+    }
+
+
+def _client(calls, catalog=True, fail=lambda: False):
+    models = [_model("openai", "gpt-4o-mini"), _model("openai", "gpt-4.1"), _model("google", "gemini-2.5-pro")]
+
+    async def handler(request):
+        calls.append(request.url.path)
+        await asyncio.sleep(0.01)
+        if fail():
+            return httpx.Response(503)
+        if request.url.path == "/v1/models":
+            return httpx.Response(200, json={"data": {"models": models}})
+        return httpx.Response(200, json={"data": _model("openai", "o3")})
+
+    return ExnestAI(api_key="test-key", retries=0, transport=httpx.MockTransport(handler), model_catalog=catalog)
+
+
+@pytest.mark.asyncio
+async def test_lookups_are_served_locally():
+    calls = []
+    client = _client(calls)
+
+    models = await client.get_models()
+    model = await client.get_model("openai:gpt-4.1")
+    by_name = await client.get_model("gemini-2.5-pro")
+    openai = await client.get_models_by_provider("openai")
+
+    assert len(models) == 3
+    assert isinstance(model, ExnestModel) and model.limits.contextWindow == 128000
+    assert by_name.id == "google:gemini-2.5-pro"
+    assert [m.id for m in openai] == ["openai:gpt-4o-mini", "openai:gpt-4.1"]
+    assert await client.get_models_by_provider("anthropic") == []
+    assert calls == ["/v1/models"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_lookups_share_one_load():
+    calls = []
+    client = _client(calls)
+
+    await asyncio.gather(*(client.get_model("openai:gpt-4.1") for _ in range(10)))
+
+    assert calls == ["/v1/models"]
+
+
+@pytest.mark.asyncio
+async def test_unknown_model_falls_back_to_the_api():
+    calls = []
+    client = _client(calls)
+
+    model = await client.get_model("openai:o3")
+
+    assert model.id == "openai:o3"
+    assert calls == ["/v1/models", "/v1/models/openai:o3"]
+
+
+@pytest.mark.asyncio
+async def test_stale_list_is_served_while_refreshing():
+    calls = []
+    catalog = ModelCatalog(ttl=10)
+    client = _client(calls, catalog)
+    await client.get_models()
+    await asyncio.sleep(0.02)
+
+    assert len(await client.get_models()) == 3  # stale, returned without waiting
+    assert catalog.get_stats()["refreshing"]
+
+    await asyncio.sleep(0.02)
+    assert calls == ["/v1/models", "/v1/models"]
+    assert catalog.get_stats()["loads"] == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_keeps_stale_list():
+    calls = []
+    failing = []
+    catalog = ModelCatalog(ttl=10)
+    client = _client(calls, catalog, fail=lambda: bool(failing))
+    await client.get_models()
+    failing.append(True)
+    await asyncio.sleep(0.02)
+
+    await client.get_models()
+    await asyncio.sleep(0.02)
+
+    assert len(await client.get_models()) == 3
+    assert catalog.get_stats()["refreshErrors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_max_stale_waits_for_fresh_list():
+    calls = []
+    catalog = ModelCatalog(ttl=5, max_stale=10)
+    client = _client(calls, catalog)
+    await client.get_models()
+    await asyncio.sleep(0.02)
+
+    await client.get_models()
+
+    assert catalog.get_stats()["loads"] == 2
+    assert not catalog.get_stats()["refreshing"]
+
+
+@pytest.mark.asyncio
+async def test_openai_compatible_and_disabled_catalog_use_the_api():
+    calls = []
+    client = _client(calls)
+    await client.get_models(openai_compatible=True)
+    assert calls == ["/v1/models"]
+    assert client.model_catalog.get_stats()["loads"] == 0
+
+    calls.clear()
+    client = _client(calls, catalog=False)
+    await client.get_models()
+    await client.get_models()
+    assert calls == ["/v1/models", "/v1/models"]
@@ -0,0 +1,123 @@
+"""
+Tests for per-endpoint and per-model circuit breakers
+"""
+
+import asyncio
+import pytest
+import httpx
+
+from exnestai.client import ExnestAI
+from exnestai.circuit import CircuitBreaker, CircuitBreakerConfig, CircuitOpenError
+from exnestai.models import ExnestMessage
+
+
+def _breaker(**kwargs):
+    options = {"minimum_calls": 4, "window_size": 4, "open_duration": 50}
+    options.update(kwargs)
+    return CircuitBreaker(CircuitBreakerConfig(**options))
+
+
+def test_trips_on_failure_rate():
+    breaker = _breaker(failure_rate_threshold=0.5)
+    for failed in (False, True, False):
+        assert breaker.allow()
+        breaker.record(failed, 0.01)
+    assert breaker.state == "closed"
+
+    breaker.record(True, 0.01)
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.get_state()["timesOpened"] == 1
+
+
+def test_trips_on_slow_calls():
+    breaker = _breaker(slow_call_duration=100, slow_call_rate_threshold=0.75)
+    for latency in (0.2, 0.2, 0.01, 0.2):
+        breaker.record(False, latency)
+
+    assert breaker.state == "open"
+
+
+@pytest.mark.asyncio
+async def test_half_open_probe_closes_or_reopens():
+    breaker = _breaker(half_open_probes=1)
+    breaker._open()
+    await asyncio.sleep(0.06)
+
+    assert breaker.get_state()["state"] == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()  # Only one probe at a time
+    breaker.record(True, 0.01)
+    assert breaker.state == "open"
+
+    await asyncio.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(False, 0.01)
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_invalid_config():
+    with pytest.raises(ValueError):
+        CircuitBreakerConfig(minimum_calls=10, window_size=5)
+
+
+def _failing_client(calls, **kwargs):
+    def handler(request):
+        calls.append(request)
+        if b"healthy" in request.content:
+            return httpx.Response(200, json={"model": "healthy"})
+        return httpx.Response(503, json={})
+
+    return ExnestAI(
+        api_key="test-key",
+        retry_delay=1,
+        circuit_breaker=CircuitBreakerConfig(minimum_calls=2, window_size=2, open_duration=60000),
+        transport=httpx.MockTransport(handler),
+        **kwargs
+    )
+
+
+@pytest.mark.asyncio
+async def test_client_fails_fast_while_open():
+    calls = []
+    client = _failing_client(calls)
+    messages = [ExnestMessage(role="user", content="hi")]
+
+    with pytest.raises(CircuitOpenError):
+        await client.chat("openai:gpt-4o-mini", messages)
+    assert len(calls) == 2
+
+    with pytest.raises(CircuitOpenError) as excinfo:
+        await client.chat("openai:gpt-4o-mini", messages)
+    assert len(calls) == 2
+    assert excinfo.value.model == "openai:gpt-4o-mini"
+
+    states = client.get_circuit_states()
+    assert states["/chat/completions"]["openai:gpt-4o-mini"]["state"] == "open"
+
+    response = await client.chat("healthy", messages)
+    assert response.model == "healthy"
+    assert states != client.get_circuit_states()
+    assert client.get_circuit_states()["/chat/completions"]["healthy"]["state"] == "closed"
+
+
+@pytest.mark.asyncio
+async def test_stream_respects_circuit():
+    def handler(request):
+        return httpx.Response(200, text='data: {"id": "1", "object": "chat.completion.chunk", "created": 1, '
+                                         '"model": "m", "choices": []}\n\ndata: [DONE]\n\n')
+
+    client = ExnestAI(
+        api_key="test-key",
+        circuit_breaker=CircuitBreakerConfig(),
+        transport=httpx.MockTransport(handler)
+    )
+    chunks = [chunk async for chunk in client.stream("m", [ExnestMessage(role="user", content="hi")])]
+
+    assert len(chunks) == 1
+    assert client.get_circuit_states()["/chat/completions"]["m"]["calls"] == 1
+
+
+def test_circuit_states_empty_when_disabled():
+    assert ExnestAI(api_key="test-key").get_circuit_states() == {}
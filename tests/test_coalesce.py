@@ -0,0 +1,128 @@
+"""
+Tests for coalescing identical in-flight requests
+"""
+
+import asyncio
+import json
+import pytest
+import httpx
+
+from exnestai.client import ExnestAI
+from exnestai.coalesce import RequestCoalescer
+from exnestai.hedging import HedgePolicy
+from exnestai.models import ExnestMessage
+
+MESSAGES = [ExnestMessage(role="user", content="Summarize the release notes")]
+BODY = json.dumps({
+    "id": "chatcmpl-1",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "Summary"}}]
+}).encode()
+
+
+def _client(calls, status=200, **kwargs):
+    async def handler(request):
+        calls.append(json.loads(request.content))
+        await asyncio.sleep(0.02)
+        return httpx.Response(status, content=BODY)
+
+    return ExnestAI(api_key="test-key", retries=0, transport=httpx.MockTransport(handler), **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_share_one_call():
+    calls = []
+    client = _client(calls, coalesce=True)
+
+    responses = await asyncio.gather(*(client.chat("m", MESSAGES) for _ in range(5)))
+
+    assert len(calls) == 1
+    assert all(response.choices[0].message.content == "Summary" for response in responses)
+    assert len({id(response) for response in responses}) == 5  # each caller gets its own object
+    assert client.get_coalescing_stats() == {"calls": 1, "coalesced": 4, "inFlight": 0}
+
+
+@pytest.mark.asyncio
+async def test_different_requests_are_not_coalesced():
+    calls = []
+    client = _client(calls, coalesce=True)
+
+    await asyncio.gather(client.chat("m", MESSAGES), client.chat("m", MESSAGES, max_tokens=5),
+                         client.completion("m", "prompt"), client.delegate(MESSAGES))
+
+    assert len(calls) == 4
+    assert client.get_coalescing_stats()["coalesced"] == 0
+
+
+@pytest.mark.asyncio
+async def test_requests_sent_differently_are_not_coalesced():
+    calls = []
+    client = _client(calls, coalesce=True)
+    hedge = HedgePolicy(initial_delay=1000)
+
+    await asyncio.gather(client.chat("m", MESSAGES), client.chat("m", MESSAGES, hedge=hedge),
+                         client.chat("m", MESSAGES, hedge=hedge), client.chat(["m", "n"], MESSAGES))
+
+    # The fallback chain gives "m" a single attempt, so it is not the plain call either
+    assert [call["model"] for call in calls] == ["m", "m", "m"]
+    assert client.get_coalescing_stats()["coalesced"] == 1
+
+
+@pytest.mark.asyncio
+async def test_sequential_requests_are_sent_again():
+    calls = []
+    client = _client(calls, coalesce=True)
+
+    await client.chat("m", MESSAGES)
+    await client.chat("m", MESSAGES)
+
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter():
+    calls = []
+    client = _client(calls, status=400, coalesce=True)
+
+    results = await asyncio.gather(*(client.chat("m", MESSAGES) for _ in range(3)), return_exceptions=True)
+
+    assert len(calls) == 1
+    assert all(isinstance(result, httpx.HTTPStatusError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_the_shared_call():
+    calls = []
+    client = _client(calls, coalesce=True)
+
+    first = asyncio.ensure_future(client.chat("m", MESSAGES))
+    second = asyncio.ensure_future(client.chat("m", MESSAGES))
+    await asyncio.sleep(0.005)
+    first.cancel()
+
+    assert (await second).choices[0].message.content == "Summary"
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_off_by_default():
+    calls = []
+    client = _client(calls)
+
+    await asyncio.gather(*(client.chat("m", MESSAGES) for _ in range(3)))
+
+    assert len(calls) == 3
+    assert client.get_coalescing_stats() is None
+
+
+@pytest.mark.asyncio
+async def test_coalescer_directly():
+    coalescer = RequestCoalescer()
+    started = []
+
+    async def fetch():
+        started.append(True)
+        await asyncio.sleep(0.01)
+        return b"body"
+
+    assert await asyncio.gather(coalescer.run("k", fetch), coalescer.run("k", fetch)) == [b"body", b"body"]
+    assert started == [True]
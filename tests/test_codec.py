@@ -0,0 +1,86 @@
+"""
+Tests for the pluggable JSON codec
+"""
+
+import json
+import pytest
+import httpx
+
+from exnestai.client import ExnestAI
+from exnestai.codec import JSONCodec, get_codec, default_codec
+from exnestai.models import ExnestMessage
+
+PAYLOAD = {"model": "m", "messages": [{"role": "user", "content": "héllo"}], "logit_bias": {50256: -100}}
+
+
+@pytest.mark.parametrize("name", ["orjson", "msgspec", "json"])
+def test_backends_round_trip(name):
+    if name != "json":
+        pytest.importorskip(name)
+    codec = get_codec(name)
+
+    encoded = codec.dumps(PAYLOAD)
+
+    assert isinstance(encoded, bytes)
+    assert json.loads(encoded) == {**PAYLOAD, "logit_bias": {"50256": -100}}
+    assert codec.loads(encoded) == codec.loads(encoded.decode())
+    with pytest.raises(ValueError):
+        codec.loads(b'{"broken":')
+
+
+def test_get_codec():
+    assert get_codec() is default_codec()
+    custom = JSONCodec("custom", json.dumps, json.loads)
+    assert get_codec(custom) is custom
+    with pytest.raises(ValueError):
+        get_codec("yaml")
+
+
+def _counting_codec(calls):
+    stdlib = get_codec("json")
+
+    def dumps(obj):
+        calls.append("dumps")
+        return stdlib.dumps(obj)
+
+    def loads(data):
+        calls.append("loads")
+        return stdlib.loads(data)
+
+    return JSONCodec("counting", dumps, loads)
+
+
+@pytest.mark.asyncio
+async def test_client_uses_codec_for_requests_and_responses():
+    calls = []
+
+    def handler(request):
+        assert json.loads(request.content)["messages"] == [{"role": "user", "content": "hi"}]
+        return httpx.Response(200, json={"choices": [{"message": {"role": "assistant", "content": "ok"}}]})
+
+    client = ExnestAI(api_key="test-key", transport=httpx.MockTransport(handler), json_codec=_counting_codec(calls))
+
+    response = await client.chat("m", [ExnestMessage(role="user", content="hi")])
+
+    assert response.choices[0].message.content == "ok"
+    assert calls == ["dumps", "loads"]
+    assert client.get_config()["jsonCodec"] == "counting"
+
+
+@pytest.mark.asyncio
+async def test_stream_chunks_use_codec():
+    calls = []
+    events = b"".join(
+        b"data: " + json.dumps({"choices": [{"delta": {"content": token}}]}).encode() + b"\n\n"
+        for token in ["a", "b"]
+    ) + b"data: [DONE]\n\n"
+
+    def handler(request):
+        return httpx.Response(200, content=events, headers={"Content-Type": "text/event-stream"})
+
+    client = ExnestAI(api_key="test-key", transport=httpx.MockTransport(handler), json_codec=_counting_codec(calls))
+
+    chunks = [chunk async for chunk in client.stream("m", [ExnestMessage(role="user", content="hi")])]
+
+    assert [chunk.choices[0].delta.content for chunk in chunks] == ["a", "b"]
+    assert calls == ["dumps", "loads", "loads"]
@@ -0,0 +1,90 @@
+"""
+Tests for the slotted and frozen model variants
+"""
+
+import dataclasses
+import json
+import pytest
+import httpx
+
+from exnestai import compact, models
+from exnestai.client import ExnestAI
+from exnestai.compact import compact_model
+from exnestai.decoding import decode
+
+MODEL_CLASSES = [
+    cls for cls in vars(models).values()
+    if isinstance(cls, type) and dataclasses.is_dataclass(cls) and cls.__module__ == models.__name__
+]
+
+
+def _required(cls):
+    return [f for f in dataclasses.fields(cls)
+            if f.default is dataclasses.MISSING and f.default_factory is dataclasses.MISSING]
+
+
+def _instance(cls):
+    return cls(**{f.name: None for f in _required(cls)})
+
+
+@pytest.mark.parametrize("cls", MODEL_CLASSES, ids=lambda cls: cls.__name__)
+def test_compact_variant_matches_model(cls):
+    variant = getattr(compact, cls.__name__)
+
+    assert variant is compact_model(cls)
+    assert [(f.name, f.default) for f in dataclasses.fields(variant)] == \
+        [(f.name, f.default) for f in dataclasses.fields(cls)]
+    assert not hasattr(_instance(variant), "__dict__")
+
+
+def test_decodes_into_compact_types():
+    response = decode(compact.ExnestChatResponse, {
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": "Hi"}}],
+        "usage": {"total_tokens": 3}
+    })
+
+    assert isinstance(response.choices[0], compact.ChatChoice)
+    assert isinstance(response.choices[0].message, compact.ExnestMessage)
+    assert isinstance(response.usage, compact.Usage)
+    assert response.object == "chat.completion"
+    assert response == compact.ExnestChatResponse(
+        choices=[compact.ChatChoice(index=0, message=compact.ExnestMessage("assistant", "Hi"))],
+        usage=compact.Usage(prompt_tokens=None, completion_tokens=None, total_tokens=3)
+    )
+
+
+def test_frozen_variant_is_immutable_and_hashable():
+    FrozenUsage = compact_model(models.Usage, frozen=True)
+    usage = FrozenUsage(prompt_tokens=1, completion_tokens=2, total_tokens=3)
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        usage.total_tokens = 4
+    assert hash(usage) == hash(FrozenUsage(1, 2, 3))
+    assert compact_model(models.Usage, frozen=True) is FrozenUsage
+
+
+def test_frozen_variant_nests_frozen_types():
+    FrozenChunk = compact_model(models.ExnestStreamChunk, frozen=True)
+    chunk = decode(FrozenChunk, {"choices": [{"delta": {"content": "x"}}]})
+
+    assert type(chunk.choices[0].delta).__name__ == "FrozenDelta"
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        chunk.choices[0].delta.content = "y"
+
+
+@pytest.mark.asyncio
+async def test_client_returns_compact_models():
+    bodies = []
+
+    def handler(request):
+        bodies.append(json.loads(request.content))
+        return httpx.Response(200, json={"choices": [{"message": {"role": "assistant", "content": "ok"}}]})
+
+    client = ExnestAI(api_key="test-key", transport=httpx.MockTransport(handler), compact_models=True)
+
+    response = await client.chat("openai:gpt-4o-mini", [compact.ExnestMessage(role="user", content="hi")])
+
+    assert isinstance(response, compact.ExnestChatResponse)
+    assert response.served_model == "openai:gpt-4o-mini"
+    assert bodies[0]["messages"] == [{"role": "user", "content": "hi"}]
+    assert client.get_config()["compactModels"] is True
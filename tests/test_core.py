@@ -0,0 +1,92 @@
+"""
+Tests for the request logic shared by the async and sync clients
+"""
+
+import pytest
+import httpx
+
+from exnestai.core import (
+    ebc_body,
+    retry_delay,
+    fallback_chain,
+    should_fail_over,
+    models_from,
+    model_from,
+    StreamDecoder,
+    StreamResume
+)
+from exnestai.models import ExnestMessage, ExnestModel, ExnestStreamChunk, StreamChoice, Delta, EBCDecisionContext
+from exnestai.retry import RetryPolicy
+from exnestai.codec import default_codec
+
+
+def _status_error(status, headers=None):
+    request = httpx.Request("POST", "https://api.exnest.app/v1/chat/completions")
+    response = httpx.Response(status, headers=headers, request=request)
+    return httpx.HTTPStatusError("failed", request=request, response=response)
+
+
+def test_retry_delay_prefers_retry_after_and_keeps_backoff():
+    policy = RetryPolicy(jitter="none", base_delay=100)
+
+    assert retry_delay(_status_error(503), 0, True, policy, None) == (0.1, 0.1)
+    assert retry_delay(_status_error(429, {"Retry-After": "2"}), 1, True, policy, 0.1) == (2, 0.1)
+    with pytest.raises(httpx.HTTPStatusError):
+        retry_delay(_status_error(429, {"Retry-After": "120"}), 0, True, policy, None)
+    with pytest.raises(httpx.HTTPStatusError):
+        retry_delay(_status_error(400), 0, True, policy, None)
+
+
+def test_fallback_chain_gives_all_but_the_last_model_one_attempt():
+    policy = RetryPolicy(max_retries=3)
+
+    chain = fallback_chain(["a", "b", "c"], policy)
+
+    assert [name for name, _ in chain] == ["a", "b", "c"]
+    assert [retry.max_retries for _, retry in chain[:-1]] == [0, 0]
+    assert chain[-1][1] is None
+    assert fallback_chain("a", policy) == [("a", None)]
+    with pytest.raises(ValueError):
+        fallback_chain([], policy)
+    assert should_fail_over(httpx.ReadTimeout("slow"), policy)
+    assert not should_fail_over(_status_error(401), policy)
+
+
+def test_ebc_body_places_context_before_options():
+    context = EBCDecisionContext(decisionType="ranking", criteria=["cost"])
+
+    body = ebc_body([ExnestMessage(role="user", content="Plan")], {"model": "m"}, context)
+
+    assert list(body) == ["messages", "context", "model"]
+    assert body["context"]["criteria"] == ["cost"]
+
+
+def test_model_listing_unwraps_v1_responses():
+    data = {"id": "openai:o3", "name": "o3"}
+
+    assert [m.id for m in models_from({"data": {"models": [data]}}, ExnestModel, False)] == ["openai:o3"]
+    assert models_from({"data": [data]}, ExnestModel, True) == {"data": [data]}
+    assert model_from({"data": data}, ExnestModel, False).name == "o3"
+    assert model_from({"data": data}, ExnestModel, True) == {"data": data}
+
+
+def test_stream_decoder_skips_bad_events_and_stops_at_done():
+    decoder = StreamDecoder(ExnestStreamChunk, default_codec().loads)
+
+    chunks = list(decoder.feed(b'data: {"id": "c1"}\n\ndata: not json\n\ndata: [DONE]\n\ndata: {"id": "c2"}\n\n'))
+
+    assert [chunk.id for _, chunk in chunks] == ["c1"]
+    assert decoder.done
+
+
+def test_stream_resume_continues_after_received_text():
+    body = {"model": "m", "messages": [{"role": "user", "content": "Count"}], "max_tokens": 100}
+    progress = StreamResume(body, resume=True)
+    assert progress.next_body() is body
+
+    progress.record(ExnestStreamChunk("c1", "chat.completion.chunk", 0, "m", [StreamChoice(0, Delta(content="one two "))]))
+
+    continued = progress.next_body()
+    assert continued["messages"][-1] == {"role": "assistant", "content": "one two "}
+    assert continued["max_tokens"] == 98
+    assert not StreamResume({**body, "n": 2}, resume=True).enabled
@@ -0,0 +1,135 @@
+"""
+Tests for decoding API responses into nested model dataclasses
+"""
+
+import dataclasses
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from exnestai import decoding
+from exnestai.decoding import decode, get_decoder
+from exnestai.models import (
+    ExnestChatResponse,
+    ExnestCompletionResponse,
+    ExnestStreamChunk,
+    ExnestModel,
+    ChatChoice,
+    ExnestMessage,
+    Usage,
+    Billing,
+    Error,
+    ExnestErrorDetails
+)
+
+CHAT_RESPONSE = {
+    "id": "chatcmpl-123",
+    "object": "chat.completion",
+    "created": 1677652288,
+    "model": "openai:gpt-4o-mini",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "Hello!"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 9, "completion_tokens": 12, "total_tokens": 21},
+    "exnest": {
+        "billing": {
+            "transaction_id": "tx_1",
+            "actual_cost_usd": "0.0001",
+            "estimated_cost_usd": "0.0002",
+            "refund_amount_usd": "0.0001",
+            "wallet_currency": "USD",
+            "deducted_amount": "0.0001"
+        },
+        "links": {"transaction": "https://exnest.app/tx/1", "apiKey": "https://exnest.app/keys/1"},
+        "processing_time_ms": 420
+    },
+    "system_fingerprint": "fp_unknown_field"
+}
+
+
+def test_decodes_nested_chat_response():
+    response = decode(ExnestChatResponse, CHAT_RESPONSE)
+
+    assert isinstance(response.choices[0], ChatChoice)
+    assert isinstance(response.choices[0].message, ExnestMessage)
+    assert response.choices[0].message.content == "Hello!"
+    assert isinstance(response.usage, Usage)
+    assert response.usage.total_tokens == 21
+    assert isinstance(response.exnest.billing, Billing)
+    assert response.exnest.billing.exchange_rate is None
+    assert response.exnest.links.apiKey == "https://exnest.app/keys/1"
+    assert response.error is None
+
+
+def test_decodes_error_response():
+    response = decode(ExnestChatResponse, {
+        "error": {
+            "message": "Insufficient balance",
+            "type": "billing_error",
+            "code": "insufficient_funds",
+            "exnest": {"transaction_refunded": True}
+        }
+    })
+
+    assert isinstance(response.error, Error)
+    assert isinstance(response.error.exnest, ExnestErrorDetails)
+    assert response.error.exnest.transaction_refunded is True
+    assert response.choices == []
+    assert response.object == "chat.completion"
+
+
+def test_missing_required_fields_default_to_none():
+    chunk = decode(ExnestStreamChunk, {"choices": [{"index": 0, "delta": {"content": "Hi"}}]})
+
+    assert chunk.id is None
+    assert chunk.choices[0].delta.content == "Hi"
+    assert chunk.choices[0].delta.role is None
+
+
+def test_completion_and_model_decoding():
+    completion = decode(ExnestCompletionResponse, {"choices": [{"index": 0, "text": "Paris"}]})
+    model = decode(ExnestModel, {
+        "id": "m1",
+        "name": "gpt-4o-mini",
+        "provider": {"id": "openai", "name": "openai", "displayName": "OpenAI"},
+        "limits": {"maxTokens": 16384, "contextWindow": 128000}
+    })
+
+    assert completion.choices[0].text == "Paris"
+    assert model.provider.displayName == "OpenAI"
+    assert model.limits.contextWindow == 128000
+    assert model.pricing is None
+
+
+def test_decoders_are_cached_and_pass_through_instances():
+    assert get_decoder(ExnestChatResponse) is get_decoder(ExnestChatResponse)
+
+    usage = Usage(prompt_tokens=1, completion_tokens=1, total_tokens=2)
+    assert decode(Usage, usage) is usage
+    assert decode(Usage, None) is None
+
+
+@dataclasses.dataclass
+class _Node:
+    name: str
+    children: Optional[List["_Node"]] = None
+
+
+def test_concurrent_first_decodes_wait_for_compilation(monkeypatch):
+    compile = decoding._compile
+
+    def slow_compile(cls):
+        time.sleep(0.05)  # widen the window in which other threads decode the same type
+        return compile(cls)
+
+    monkeypatch.setattr(decoding, "_compile", slow_compile)
+    data = {"name": "root", "children": [{"name": "leaf"}]}
+    barrier = threading.Barrier(4)
+
+    def first_decode(_):
+        barrier.wait()
+        return decode(_Node, data)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        trees = list(pool.map(first_decode, range(4)))
+
+    assert all(tree.children[0] == _Node("leaf") for tree in trees)
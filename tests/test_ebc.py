@@ -36,7 +36,7 @@ async def test_deep_think(client):
         response = await client.deep_think(messages)
         
         assert isinstance(response, ExnestChatResponse)
-        assert response.choices[0]['message']['content'] == "Deep thought result"
+        assert response.choices[0].message.content == "Deep thought result"
         mock_request.assert_called_once()
         args, kwargs = mock_request.call_args
         assert args[1] == "/ebc/deep-think"
@@ -71,7 +71,7 @@ async def test_structured_decision(client):
         response = await client.structured_decision(messages, context)
         
         assert isinstance(response, ExnestChatResponse)
-        assert response.choices[0]['message']['content'] == "Decision result"
+        assert response.choices[0].message.content == "Decision result"
         mock_request.assert_called_once()
         args, kwargs = mock_request.call_args
         assert args[1] == "/decision-making/session"
@@ -99,7 +99,7 @@ async def test_delegate(client):
         response = await client.delegate(messages)
         
         assert isinstance(response, ExnestChatResponse)
-        assert response.choices[0]['message']['content'] == "Delegation result"
+        assert response.choices[0].message.content == "Delegation result"
         mock_request.assert_called_once()
         args, kwargs = mock_request.call_args
         assert args[1] == "/ebc/delegate"
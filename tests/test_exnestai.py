@@ -38,11 +38,8 @@ class TestExnestWrapper:
         wrapper = ExnestWrapper("test-api-key")
         
         # This should not raise an exception
-        # await wrapper.close() # ExnestWrapper does not have close method, it wraps ExnestAI which has _client but no exposed close in wrapper?
-        # Checking wrapper.py, it has _client. ExnestAI has close? 
-        # ExnestAI in client.py uses httpx.AsyncClient. It doesn't seem to expose close() method in client.py either?
-        # Let's check client.py again.
-        pass
+        await wrapper.aclose()
+        assert wrapper._client._client.is_closed
 
     def test_get_base_url(self):
         """Test getting the base URL"""
@@ -96,14 +93,8 @@ class TestExnestAI:
         client = ExnestAI(api_key="test-api-key")
         
         # This should not raise an exception
-        # await client.close() # ExnestAI does not have close method?
-        # client.py uses httpx.AsyncClient but doesn't expose close.
-        # I should probably add close method to client.py or remove this test.
-        # Given I shouldn't modify client.py unnecessarily, I'll comment it out or check if I can access _client.aclose()
-        if hasattr(client, 'close'):
-            await client.close()
-        elif hasattr(client, '_client'):
-            await client._client.aclose()
+        await client.aclose()
+        assert client._client.is_closed
 
 
 if __name__ == "__main__":
@@ -0,0 +1,93 @@
+"""
+Tests for model fallback chains
+"""
+
+import json
+import pytest
+import httpx
+
+from exnestai.client import ExnestAI
+from exnestai.circuit import CircuitBreakerConfig
+from exnestai.models import ExnestMessage
+
+MESSAGES = [ExnestMessage(role="user", content="hi")]
+
+
+def _client(behaviour, calls, **kwargs):
+    def handler(request):
+        model = json.loads(request.content)["model"]
+        calls.append(model)
+        outcome = behaviour.get(model, 200)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return httpx.Response(outcome, json={"model": model, "choices": []})
+
+    return ExnestAI(api_key="test-key", retry_delay=1, transport=httpx.MockTransport(handler), **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_falls_through_on_retryable_error():
+    calls = []
+    client = _client({"primary": 503}, calls)
+
+    response = await client.chat(["primary", "secondary"], MESSAGES)
+
+    assert response.served_model == "secondary"
+    assert calls == ["primary", "secondary"]
+
+
+@pytest.mark.asyncio
+async def test_falls_through_on_timeout():
+    calls = []
+    client = _client({"primary": httpx.ReadTimeout("timed out")}, calls)
+
+    response = await client.completion(["primary", "secondary"], "prompt")
+
+    assert response.served_model == "secondary"
+
+
+@pytest.mark.asyncio
+async def test_does_not_fall_through_on_client_error():
+    calls = []
+    client = _client({"primary": 400}, calls)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.chat(["primary", "secondary"], MESSAGES)
+    assert calls == ["primary"]
+
+
+@pytest.mark.asyncio
+async def test_last_model_uses_full_retry_policy():
+    calls = []
+    client = _client({"primary": 503, "secondary": 503}, calls, retries=2)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.chat(["primary", "secondary"], MESSAGES)
+    assert calls == ["primary", "secondary", "secondary", "secondary"]
+
+
+@pytest.mark.asyncio
+async def test_skips_models_with_open_circuit():
+    calls = []
+    client = _client(
+        {"primary": 503}, calls,
+        retries=0,
+        circuit_breaker=CircuitBreakerConfig(minimum_calls=1, window_size=1, open_duration=60000)
+    )
+
+    await client.chat(["primary", "secondary"], MESSAGES)
+    response = await client.chat(["primary", "secondary"], MESSAGES)
+
+    assert response.served_model == "secondary"
+    assert calls == ["primary", "secondary", "secondary"]
+
+
+@pytest.mark.asyncio
+async def test_single_model_reports_served_model():
+    client = _client({}, [])
+
+    response = await client.chat("only", MESSAGES)
+    assert response.served_model == "only"
+
+    with pytest.raises(ValueError, match="model"):
+        await client.chat([], MESSAGES)
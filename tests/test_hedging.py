@@ -0,0 +1,139 @@
+"""
+Tests for latency histograms and hedged requests
+"""
+
+import asyncio
+import json
+import pytest
+import httpx
+
+from exnestai.client import ExnestAI
+from exnestai.hedging import HedgePolicy, HedgeBudget
+from exnestai.metrics import LatencyHistogram
+from exnestai.ratelimit import RateLimiter
+from exnestai.models import ExnestMessage
+
+MESSAGES = [ExnestMessage(role="user", content="hi")]
+
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for ms in range(1, 101):
+        histogram.record(ms / 1000)
+
+    assert histogram.percentile(50) == pytest.approx(0.050, rel=0.1)
+    assert histogram.percentile(95) == pytest.approx(0.095, rel=0.1)
+    assert histogram.get_stats()["count"] == 100
+    assert LatencyHistogram().percentile(50) is None
+
+
+def test_histogram_decays_old_samples():
+    histogram = LatencyHistogram(max_samples=100)
+    for _ in range(100):
+        histogram.record(1.0)
+    for _ in range(400):
+        histogram.record(0.01)
+
+    assert histogram.percentile(90) == pytest.approx(0.01, rel=0.1)
+
+
+def test_hedge_delay_uses_histogram():
+    policy = HedgePolicy(percentile=90, min_delay=5, initial_delay=700, min_samples=10)
+    histogram = LatencyHistogram()
+
+    assert policy.get_delay(histogram) == 0.7
+    for _ in range(20):
+        histogram.record(0.2)
+    assert policy.get_delay(histogram) == pytest.approx(0.2, rel=0.1)
+
+
+def test_hedge_budget_caps_ratio():
+    budget = HedgeBudget()
+    spent = 0
+    for _ in range(100):
+        budget.on_request(0.1)
+        spent += budget.try_spend()
+
+    assert spent <= 11
+    assert budget.hedges_denied == 100 - spent
+
+
+def _client(delays, calls, **kwargs):
+    async def handler(request):
+        body = json.loads(request.content)
+        key = (request.url.host, body["model"])
+        calls.append(key)
+        try:
+            await asyncio.sleep(delays.get(key, 0))
+        except asyncio.CancelledError:
+            calls.append(("cancelled",) + key)
+            raise
+        return httpx.Response(200, json={"id": request.url.host, "model": body["model"]})
+
+    return ExnestAI(api_key="test-key", retries=0, transport=httpx.MockTransport(handler), **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged():
+    calls = []
+    client = _client({}, calls)
+
+    response = await client.chat("m", MESSAGES, hedge=HedgePolicy(initial_delay=100))
+
+    assert calls == [("api.exnest.app", "m")]
+    assert response.served_model == "m"
+    assert client.get_latency_stats()["endpoints"]["/chat/completions"]["m"]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_and_cancelled():
+    calls = []
+    policy = HedgePolicy(initial_delay=20, min_delay=1, model="backup", base_url="https://backup.exnest.app/v1")
+    client = _client({("api.exnest.app", "m"): 5}, calls, hedging=policy)
+
+    response = await asyncio.wait_for(client.chat("m", MESSAGES, hedge=True), 1)
+    await asyncio.sleep(0)
+
+    assert response.id == "backup.exnest.app"
+    assert response.served_model == "backup"
+    assert ("cancelled", "api.exnest.app", "m") in calls
+    assert client.get_latency_stats()["hedges"] == {"sent": 1, "denied": 0}
+
+
+@pytest.mark.asyncio
+async def test_hedge_rate_is_capped():
+    calls = []
+    policy = HedgePolicy(initial_delay=1, min_delay=1, max_hedge_ratio=0)
+    client = _client({("api.exnest.app", "m"): 0.02}, calls)
+
+    for _ in range(3):
+        await client.chat("m", MESSAGES, hedge=policy)
+
+    assert client.get_latency_stats()["hedges"] == {"sent": 0, "denied": 3}
+    assert ("api.exnest.app", "m") in calls and len(calls) == 3
+
+
+def test_zero_ratio_budget_never_hedges():
+    budget = HedgeBudget()
+    for _ in range(50):
+        budget.on_request(0)
+        assert not budget.try_spend()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_cancels_both_requests():
+    calls = []
+    policy = HedgePolicy(initial_delay=5, min_delay=1, model="backup")
+    limiter = RateLimiter(tokens_per_minute=100000)
+    client = _client({("api.exnest.app", "m"): 5, ("api.exnest.app", "backup"): 5}, calls, rate_limiter=limiter)
+
+    call = asyncio.ensure_future(client.chat("m", MESSAGES, hedge=policy, max_tokens=1000))
+    await asyncio.sleep(0.05)
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+
+    assert ("cancelled", "api.exnest.app", "m") in calls
+    assert ("cancelled", "api.exnest.app", "backup") in calls
+    assert client._requests.count == 0
+    assert limiter.get_state()["availableTokens"] == pytest.approx(100000, abs=5)  # reservations given back
@@ -0,0 +1,95 @@
+"""
+Tests for client lifecycle: async context manager, draining close and transport hot-swap
+"""
+
+import asyncio
+import time
+import pytest
+import httpx
+
+from exnestai.client import ExnestAI
+
+
+def _gated_transport(gate: asyncio.Event) -> httpx.MockTransport:
+    async def handler(request):
+        await gate.wait()
+        return httpx.Response(200, json={"ok": True})
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.asyncio
+async def test_async_context_manager_closes_client():
+    async with ExnestAI(api_key="test-key") as client:
+        http_client = client._client
+
+    assert http_client.is_closed
+    with pytest.raises(RuntimeError, match="closed"):
+        await client._execute_request("GET", "/models")
+
+
+@pytest.mark.asyncio
+async def test_aclose_drains_in_flight_requests():
+    gate = asyncio.Event()
+    client = ExnestAI(api_key="test-key", retries=0, transport=_gated_transport(gate))
+
+    request = asyncio.ensure_future(client._execute_request("GET", "/models"))
+    await asyncio.sleep(0.01)
+    closing = asyncio.ensure_future(client.aclose(timeout=1000))
+    await asyncio.sleep(0.01)
+
+    assert not closing.done()
+    with pytest.raises(RuntimeError, match="closed"):
+        await client._execute_request("GET", "/models")
+
+    gate.set()
+    assert await request == {"ok": True}
+    await closing
+    assert client._client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_aclose_gives_up_after_deadline():
+    client = ExnestAI(api_key="test-key", retries=0, transport=_gated_transport(asyncio.Event()))
+    request = asyncio.ensure_future(client._execute_request("GET", "/models"))
+    await asyncio.sleep(0.01)
+
+    start = time.monotonic()
+    await client.aclose(timeout=50)
+
+    assert time.monotonic() - start < 0.5
+    assert client._client.is_closed
+    request.cancel()
+
+
+@pytest.mark.asyncio
+async def test_update_config_hot_swaps_transport():
+    gate = asyncio.Event()
+    client = ExnestAI(api_key="test-key", retries=0, transport=_gated_transport(gate))
+    old_client = client._client
+
+    request = asyncio.ensure_future(client._execute_request("GET", "/models"))
+    await asyncio.sleep(0.01)
+    client.update_config(max_connections=5)
+
+    assert client._client is not old_client
+    assert not old_client.is_closed
+
+    gate.set()
+    assert await request == {"ok": True}
+    await asyncio.sleep(0.01)
+    assert old_client.is_closed
+    assert await client._execute_request("GET", "/models") == {"ok": True}
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_update_config_keeps_transport_for_credentials():
+    client = ExnestAI(api_key="test-key")
+    http_client = client._client
+
+    client.update_config(api_key="new-key", retries=1)
+
+    assert client._client is http_client
+    assert client.api_key == "new-key"
+    await client.aclose()
@@ -0,0 +1,210 @@
+"""
+Tests for sharing one client across event loops and forked processes
+"""
+
+import asyncio
+import contextlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from exnestai import client as client_module
+from exnestai.client import ExnestAI
+from exnestai.ratelimit import RateLimiter
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so pooled connections are reused
+
+    def do_GET(self):
+        body = json.dumps({"ok": True}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+    server.server_close()
+
+
+def test_client_created_outside_a_loop_works_in_successive_loops(base_url):
+    client = ExnestAI(api_key="test-key", base_url=base_url, retries=0)
+
+    async def call():
+        return await client._execute_request("GET", "/models"), client._client
+
+    first, first_client = asyncio.run(call())
+    second, second_client = asyncio.run(call())
+
+    assert first == second == {"ok": True}
+    assert first_client is not second_client
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="counts open fds through /proc")
+def test_pools_of_finished_loops_are_released(base_url):
+    client = ExnestAI(api_key="test-key", base_url=base_url, retries=0)
+
+    def open_fds():
+        time.sleep(0.05)  # let the server threads see their connections close
+        return len(os.listdir("/proc/self/fd"))
+
+    asyncio.run(client._execute_request("GET", "/models"))
+    before = open_fds()
+    for _ in range(30):
+        asyncio.run(client._execute_request("GET", "/models"))
+
+    assert len(client._owners) == 1
+    assert open_fds() - before <= 2
+
+
+def test_each_thread_loop_gets_its_own_pool(base_url):
+    client = ExnestAI(api_key="test-key", base_url=base_url, retries=0)
+    results = []
+
+    def worker():
+        async def calls():
+            for _ in range(3):
+                results.append(await client._execute_request("GET", "/models"))
+            return client._client
+
+        results.append(asyncio.run(calls()))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    http_clients = [result for result in results if not isinstance(result, dict)]
+    assert results.count({"ok": True}) == 12
+    assert len({id(http_client) for http_client in http_clients}) == 4
+
+
+@pytest.mark.asyncio
+async def test_same_loop_reuses_its_client():
+    client = ExnestAI(api_key="test-key")
+
+    assert client._client is client._client
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_fork_gets_fresh_connections(monkeypatch):
+    client = ExnestAI(api_key="test-key")
+    parent_client = client._client
+
+    monkeypatch.setattr(client_module.os, "getpid", lambda: client._pid + 1)
+
+    assert client._client is not parent_client
+    assert not parent_client.is_closed  # still the parent's to use and close
+    await client.aclose()
+    await parent_client.aclose()
+
+
+def test_rate_limiter_is_usable_from_several_loops():
+    limiter = RateLimiter()
+
+    async def contend():
+        limiter.block_for(0.01)  # every caller waits out the pause
+        await asyncio.gather(*(limiter.acquire() for _ in range(3)))
+
+    asyncio.run(contend())
+    asyncio.run(contend())
+
+
+def test_only_one_loop_adopts_the_unbound_client():
+    client = ExnestAI(api_key="test-key")
+    unbound = client._client
+    barrier = threading.Barrier(8)
+    adopted = []
+
+    def worker():
+        async def current():
+            barrier.wait()
+            return client._client
+
+        adopted.append(asyncio.run(current()))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(http_client) for http_client in adopted}) == 8
+    assert adopted.count(unbound) == 1
+
+
+@contextlib.contextmanager
+def _loop_in_thread():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        yield loop
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+def _client_on(loop, client):
+    async def current():
+        return client._client
+
+    return asyncio.run_coroutine_threadsafe(current(), loop).result()
+
+
+@pytest.mark.asyncio
+async def test_aclose_closes_clients_of_other_running_loops():
+    client = ExnestAI(api_key="test-key")
+    with _loop_in_thread() as other:
+        other_client = _client_on(other, client)
+        own_client = client._client
+
+        await client.aclose()
+
+        assert own_client.is_closed
+        assert other_client.is_closed
+        assert client._owners == {}
+
+
+@pytest.mark.asyncio
+async def test_hot_swap_retires_every_loops_client():
+    client = ExnestAI(api_key="test-key")
+    with _loop_in_thread() as other:
+        other_client = _client_on(other, client)
+        own_client = client._client
+
+        client.update_config(timeout=5000)
+        await asyncio.sleep(0.05)
+
+        assert own_client.is_closed
+        assert other_client.is_closed
+        assert _client_on(other, client) is not other_client
+        await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_aclose_does_not_build_a_pool():
+    client = ExnestAI(api_key="test-key")
+
+    await client.aclose()
+
+    assert client._owners == {}
+    assert client._client.is_closed
@@ -0,0 +1,146 @@
+"""
+Tests for connection pool configuration and pool statistics
+"""
+
+import asyncio
+import json
+import pytest
+import httpx
+
+from exnestai.client import ExnestAI
+from exnestai.transport import HostLimitedTransport
+
+
+async def _serve_json(reader, writer):
+    """Minimal keep-alive HTTP/1.1 server answering every request with JSON."""
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            if length:
+                await reader.readexactly(length)
+            await asyncio.sleep(0.02)
+            body = json.dumps({"ok": True}).encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                + b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+
+def test_pool_limits_are_applied():
+    client = ExnestAI(
+        api_key="test-key",
+        max_connections=7,
+        max_keepalive_connections=3,
+        keepalive_expiry=2500
+    )
+    pool = client._transport.transport._pool
+
+    assert pool._max_connections == 7
+    assert pool._max_keepalive_connections == 3
+    assert pool._keepalive_expiry == 2.5
+
+    config = client.get_config()
+    assert config["maxConnections"] == 7
+    assert config["maxKeepaliveConnections"] == 3
+    assert config["keepaliveExpiry"] == 2500
+    assert config["maxConnectionsPerHost"] is None
+
+
+def test_invalid_per_host_limit():
+    with pytest.raises(ValueError, match="max_connections_per_host"):
+        ExnestAI(api_key="test-key", max_connections_per_host=0)
+
+
+@pytest.mark.asyncio
+async def test_per_host_limit_caps_concurrency():
+    active = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return httpx.Response(200, json={"ok": True})
+
+    client = ExnestAI(
+        api_key="test-key",
+        retries=0,
+        max_connections_per_host=2,
+        transport=httpx.MockTransport(handler)
+    )
+
+    await asyncio.gather(*[client._execute_request("GET", "/models") for _ in range(10)])
+
+    assert peak == 2
+    stats = client.get_pool_stats()
+    assert stats["inFlightRequests"] == 0
+    assert stats["peakInFlightRequests"] == 2
+    assert stats["totalRequests"] == 10
+    assert stats["limits"]["maxConnectionsPerHost"] == 2
+
+
+@pytest.mark.asyncio
+async def test_pool_stats_report_connections():
+    server = await asyncio.start_server(_serve_json, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    client = ExnestAI(api_key="test-key", base_url=f"http://127.0.0.1:{port}", max_connections=2)
+
+    try:
+        await asyncio.gather(*[client._execute_request("GET", "/models") for _ in range(6)])
+        stats = client.get_pool_stats()
+    finally:
+        await client._client.aclose()
+        server.close()
+        await server.wait_closed()
+
+    assert stats["connections"] == 2
+    assert stats["idleConnections"] == 2
+    assert stats["activeConnections"] == 0
+    assert stats["queuedRequests"] == 0
+    assert stats["peakInFlightRequests"] == 6
+
+
+def test_http2_enables_multiplexed_transport():
+    pytest.importorskip("h2")
+    client = ExnestAI(api_key="test-key", http2=True)
+    pool = client._transport.transport._pool
+
+    assert pool._http2 is True
+    assert client.get_config()["http2"] is True
+    assert client.get_pool_stats()["http2Connections"] == 0
+
+
+def test_http2_requires_h2_package(monkeypatch):
+    import sys
+    monkeypatch.setitem(sys.modules, "h2", None)
+
+    with pytest.raises(ImportError, match="exnest-ai\\[http2\\]"):
+        ExnestAI(api_key="test-key", http2=True)
+
+
+def test_pool_stats_tolerate_changed_httpcore_internals():
+    class Pool:
+        connections = [object(), object()]  # no is_idle() or info(), and no _requests
+
+    inner = httpx.AsyncHTTPTransport()
+    inner._pool = Pool()
+    stats = HostLimitedTransport(inner).get_stats()
+
+    assert stats["connections"] == 2
+    assert stats["idleConnections"] == 0
+    assert stats["http2Connections"] == 0
+    assert stats["queuedRequests"] is None
+
+    inner._pool = object()
+    assert HostLimitedTransport(inner).get_stats()["connections"] is None
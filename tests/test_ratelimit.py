@@ -0,0 +1,183 @@
+"""
+Tests for rate limit header parsing and the shared client-side limiter
+"""
+
+import time
+from email.utils import formatdate
+
+import pytest
+import httpx
+
+from exnestai.client import ExnestAI
+from exnestai.retry import RetryPolicy
+from exnestai.ratelimit import (
+    RateLimiter,
+    parse_duration,
+    parse_retry_after,
+    parse_rate_limit_headers
+)
+
+
+def test_parse_duration():
+    assert parse_duration("1.5") == 1.5
+    assert parse_duration("20ms") == pytest.approx(0.02)
+    assert parse_duration("6m0s") == 360
+    assert parse_duration("1h2m3.5s") == pytest.approx(3723.5)
+    assert parse_duration("soon") is None
+    assert parse_duration(str(time.time() + 30)) == pytest.approx(30, abs=1)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(httpx.Headers({"Retry-After": "2"})) == 2
+    assert parse_retry_after(httpx.Headers({"retry-after-ms": "250", "Retry-After": "1"})) == 0.25
+    assert parse_retry_after(httpx.Headers({})) is None
+
+    date = formatdate(time.time() + 10, usegmt=True)
+    assert parse_retry_after(httpx.Headers({"Retry-After": date})) == pytest.approx(10, abs=1.5)
+
+
+def test_parse_rate_limit_headers():
+    info = parse_rate_limit_headers(httpx.Headers({
+        "x-ratelimit-limit-requests": "60",
+        "x-ratelimit-remaining-requests": "59",
+        "x-ratelimit-reset-requests": "1s",
+        "x-ratelimit-remaining-tokens": "1000",
+        "x-ratelimit-reset-tokens": "6m0s"
+    }))
+
+    assert info.limit_requests == 60
+    assert info.remaining_requests == 59
+    assert info.reset_requests == 1
+    assert info.remaining_tokens == 1000
+    assert info.reset_tokens == 360
+    assert parse_rate_limit_headers(httpx.Headers({"content-type": "application/json"})) is None
+    assert parse_rate_limit_headers(httpx.Headers({"x-ratelimit-remaining": "3"})).remaining_requests == 3
+
+
+@pytest.mark.asyncio
+async def test_limiter_paces_after_quota_is_used():
+    limiter = RateLimiter()
+    limiter.observe_headers(httpx.Headers({
+        "x-ratelimit-remaining-requests": "2",
+        "x-ratelimit-reset-requests": "100ms"
+    }))
+
+    assert await limiter.acquire() == 0
+    assert await limiter.acquire() == 0
+    assert limiter.get_state()["remainingRequests"] == 0
+
+    start = time.monotonic()
+    await limiter.acquire()
+    assert time.monotonic() - start >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_client_honors_retry_after():
+    calls = []
+
+    def handler(request):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            return httpx.Response(429, headers={"Retry-After": "0.1"}, json={})
+        return httpx.Response(200, json={"ok": True})
+
+    client = ExnestAI(api_key="test-key", retry_delay=1, transport=httpx.MockTransport(handler))
+
+    assert await client._execute_request("POST", "/chat/completions", {"model": "m"}) == {"ok": True}
+    assert calls[1] - calls[0] >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_long_retry_after_fails_fast_and_pauses_shared_limiter_up_to_max_retry_after():
+    def handler(request):
+        return httpx.Response(503, headers={"Retry-After": "120"}, json={})
+
+    limiter = RateLimiter()
+    client = ExnestAI(
+        api_key="test-key", rate_limiter=limiter, transport=httpx.MockTransport(handler),
+        retry_policy=RetryPolicy(max_retry_after=30000)
+    )
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await client._execute_request("POST", "/chat/completions", {"model": "m"})
+    assert 29 < limiter.get_state()["blockedFor"] <= 30
+
+
+def test_estimate_reserves_prompt_and_completion_tokens():
+    limiter = RateLimiter(tokens_per_minute=10000, default_completion_tokens=100)
+    body = {"messages": [{"role": "user", "content": "x" * 40}], "max_tokens": 50}
+
+    assert limiter.estimate(body) == 4 + 10 + 50
+    assert limiter.estimate({"prompt": "x" * 8}) == 2 + 100
+    assert limiter.estimate(None) == 0
+
+
+@pytest.mark.asyncio
+async def test_tokens_per_minute_budget_is_enforced():
+    limiter = RateLimiter(tokens_per_minute=600)
+
+    assert await limiter.acquire(600) == 0
+    start = time.monotonic()
+    await limiter.acquire(5)
+    assert time.monotonic() - start >= 0.45
+
+
+@pytest.mark.asyncio
+async def test_waiters_are_served_in_arrival_order():
+    import asyncio
+
+    limiter = RateLimiter(tokens_per_minute=6000)
+    await limiter.acquire(6000)
+    order = []
+
+    async def acquire(name, tokens):
+        await limiter.acquire(tokens)
+        order.append(name)
+
+    large = asyncio.ensure_future(acquire("large", 20))
+    await asyncio.sleep(0)
+    small = asyncio.ensure_future(acquire("small", 1))
+    await asyncio.gather(large, small)
+
+    assert order == ["large", "small"]
+
+
+@pytest.mark.asyncio
+async def test_waiting_caller_does_not_hold_up_others_after_a_pause():
+    import asyncio
+
+    limiter = RateLimiter(requests_per_minute=6000)
+    await limiter.acquire()
+    limiter.block_for(0.05)
+    first = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+
+    # Quota reserved by the first caller is already visible to the next one
+    assert limiter.get_state()["availableRequests"] < 6000 - 1.5
+    start = time.monotonic()
+    await asyncio.gather(first, limiter.acquire())
+    assert time.monotonic() - start < 0.1
+
+
+def test_reconcile_returns_unused_tokens():
+    limiter = RateLimiter(tokens_per_minute=1000)
+    limiter._token_bucket.tokens -= 600
+
+    limiter.reconcile(600, 100)
+    assert limiter.get_state()["availableTokens"] == pytest.approx(900, abs=1)
+
+
+@pytest.mark.asyncio
+async def test_client_reconciles_reservation_with_usage():
+    def handler(request):
+        return httpx.Response(200, json={"usage": {"prompt_tokens": 6, "completion_tokens": 4, "total_tokens": 10}})
+
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=1000)
+    client = ExnestAI(api_key="test-key", rate_limiter=limiter, transport=httpx.MockTransport(handler))
+    body = {"model": "m", "messages": [{"role": "user", "content": "hi"}], "max_tokens": 200}
+
+    await client._execute_request("POST", "/chat/completions", body)
+
+    state = limiter.get_state()
+    assert state["availableTokens"] == pytest.approx(990, abs=1)
+    assert state["availableRequests"] == pytest.approx(59, abs=0.1)
@@ -0,0 +1,153 @@
+"""
+Tests for raw and lazy response modes
+"""
+
+import copy
+import json
+import pickle
+import pytest
+import httpx
+
+from exnestai import compact
+from exnestai.client import ExnestAI
+from exnestai.core import total_tokens
+from exnestai.decoding import LazyResponse, _MISSING
+from exnestai.models import ExnestMessage, ExnestChatResponse, ChatChoice, EBCDecisionContext
+from exnestai.ratelimit import RateLimiter
+
+MESSAGES = [ExnestMessage(role="user", content="hi")]
+BODY = json.dumps({
+    "id": "chatcmpl-1",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "Hello!"}}],
+    "usage": {"prompt_tokens": 4, "completion_tokens": 6, "total_tokens": 10}
+}).encode()
+
+
+def _client(calls=None, status=None, **kwargs):
+    def handler(request):
+        if calls is not None:
+            calls.append(request.url.path)
+        model = json.loads(request.content).get("model")
+        return httpx.Response((status or {}).get(model, 200), content=BODY)
+
+    return ExnestAI(api_key="test-key", retry_delay=1, transport=httpx.MockTransport(handler), **kwargs)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("raw", [True, "bytes"])
+async def test_raw_returns_body_bytes(raw):
+    client = _client()
+
+    assert await client.chat("m", MESSAGES, raw=raw) == BODY
+    assert await client.completion("m", "prompt", raw=raw) == BODY
+
+
+@pytest.mark.asyncio
+async def test_ebc_methods_accept_raw():
+    calls = []
+    client = _client(calls)
+    context = EBCDecisionContext(decisionType="x", criteria=[])
+
+    assert await client.deep_think(MESSAGES, raw=True) == BODY
+    assert await client.structured_decision(MESSAGES, context, raw=True) == BODY
+    lazy = await client.delegate(MESSAGES, raw="lazy")
+
+    assert lazy.choices[0].message.content == "Hello!"
+    assert calls == ["/v1/ebc/deep-think", "/v1/decision-making/session", "/v1/ebc/delegate"]
+
+
+@pytest.mark.asyncio
+async def test_lazy_response_parses_on_first_access():
+    client = _client()
+
+    response = await client.chat("m", MESSAGES, raw="lazy")
+
+    assert isinstance(response, LazyResponse)
+    assert response._data is _MISSING
+    assert response.content == BODY
+    assert response.served_model == "m"
+    assert isinstance(response.choices[0], ChatChoice)
+    assert response.choices is response.choices
+    assert response.usage.total_tokens == 10
+    assert response.object == "chat.completion"
+    assert response.error is None
+    with pytest.raises(AttributeError):
+        response.not_a_field
+
+    model = response.to_model()
+    assert isinstance(model, ExnestChatResponse)
+    assert model.served_model == "m"
+
+
+def test_lazy_null_body_is_parsed_once():
+    calls = []
+
+    def loads(content):
+        calls.append(content)
+        return None
+
+    response = LazyResponse(b"null", ExnestChatResponse, loads=loads)
+
+    assert response.json() is None
+    assert response.json() is None
+    assert response.choices == []
+    assert calls == [b"null"]
+
+
+@pytest.mark.asyncio
+async def test_lazy_response_can_be_copied_and_pickled():
+    client = _client()
+    response = await client.chat("m", MESSAGES, raw="lazy")
+
+    for clone in (copy.copy(response), copy.deepcopy(response), pickle.loads(pickle.dumps(response))):
+        assert clone.content == BODY
+        assert clone.served_model == "m"
+        assert clone.usage.total_tokens == 10
+
+    assert response.choices[0].message.content == "Hello!"
+    assert pickle.loads(pickle.dumps(response)).choices[0].message.content == "Hello!"
+
+
+@pytest.mark.asyncio
+async def test_lazy_response_uses_compact_models():
+    client = _client(compact_models=True)
+
+    response = await client.chat("m", MESSAGES, raw="lazy")
+
+    assert isinstance(response.choices[0], compact.ChatChoice)
+
+
+@pytest.mark.asyncio
+async def test_invalid_raw_mode_is_rejected_before_sending():
+    calls = []
+    client = _client(calls)
+
+    with pytest.raises(ValueError):
+        await client.chat("m", MESSAGES, raw="json")
+    assert calls == []
+
+
+@pytest.mark.asyncio
+async def test_raw_with_fallback():
+    client = _client(status={"primary": 503})
+
+    assert await client.chat(["primary", "secondary"], MESSAGES, raw=True) == BODY
+    lazy = await client.chat(["primary", "secondary"], MESSAGES, raw="lazy")
+    assert lazy.served_model == "secondary"
+
+
+@pytest.mark.asyncio
+async def test_raw_response_settles_rate_limit_tokens():
+    limiter = RateLimiter(tokens_per_minute=1000)
+    client = _client(rate_limiter=limiter)
+
+    await client.chat("m", MESSAGES, raw=True, max_tokens=500)
+
+    assert limiter.get_state()["availableTokens"] == pytest.approx(990, abs=1)
+
+
+def test_total_tokens_reads_top_level_usage():
+    assert total_tokens(BODY) == 10
+    assert total_tokens(b'{"choices": []}') is None
+    escaped = json.dumps({"choices": [{"text": '"usage": {"total_tokens": 99}'}]}).encode()
+    assert total_tokens(escaped) is None
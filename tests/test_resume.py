@@ -0,0 +1,129 @@
+"""
+Tests for stream retries and resumption after a dropped connection
+"""
+
+import json
+import pytest
+import httpx
+
+from exnestai.client import ExnestAI
+from exnestai.models import ExnestMessage
+
+MESSAGES = [ExnestMessage(role="user", content="Tell me a story")]
+
+
+def _event(content, finish_reason=None):
+    chunk = {"id": "c1", "object": "chat.completion.chunk", "created": 1, "model": "m",
+             "choices": [{"index": 0, "delta": {"content": content}, "finish_reason": finish_reason}]}
+    return b"data: " + json.dumps(chunk).encode() + b"\n\n"
+
+
+def _dropping_stream(*events):
+    """Response body that sends `events` and then loses the connection."""
+    async def body():
+        for event in events:
+            yield event
+        raise httpx.RemoteProtocolError("peer closed connection")
+
+    return body()
+
+
+def _client(responses, requests, **kwargs):
+    def handler(request):
+        requests.append(json.loads(request.content))
+        outcome = responses.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return ExnestAI(api_key="test-key", retry_delay=1, transport=httpx.MockTransport(handler), **kwargs)
+
+
+def _contents(chunks):
+    return "".join(chunk.choices[0].delta.content for chunk in chunks)
+
+
+@pytest.mark.asyncio
+async def test_retries_before_first_chunk():
+    requests = []
+    client = _client([
+        httpx.ConnectError("refused"),
+        httpx.Response(503),
+        httpx.Response(200, content=_event("Hi") + b"data: [DONE]\n\n"),
+    ], requests)
+
+    chunks = [chunk async for chunk in client.stream("m", MESSAGES)]
+
+    assert _contents(chunks) == "Hi"
+    assert len(requests) == 3
+
+
+@pytest.mark.asyncio
+async def test_does_not_retry_client_errors():
+    requests = []
+    client = _client([httpx.Response(400)], requests)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        [chunk async for chunk in client.stream("m", MESSAGES)]
+    assert len(requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_mid_stream_drop_raises_without_resume():
+    requests = []
+    client = _client([httpx.Response(200, content=_dropping_stream(_event("Once")))], requests)
+
+    received = []
+    with pytest.raises(httpx.RemoteProtocolError):
+        async for chunk in client.stream("m", MESSAGES):
+            received.append(chunk)
+    assert _contents(received) == "Once"
+    assert len(requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_resumes_with_continuation_request():
+    requests = []
+    client = _client([
+        httpx.Response(200, content=_dropping_stream(_event("Once"), _event(" upon"))),
+        httpx.Response(200, content=_dropping_stream(_event(" a"))),
+        httpx.Response(200, content=_event(" time", "stop") + b"data: [DONE]\n\n"),
+    ], requests)
+
+    response = await client.stream("m", MESSAGES, collect=True, resume=True, max_tokens=100)
+
+    assert response.choices[0].message.content == "Once upon a time"
+    assert response.choices[0].finish_reason == "stop"
+    assert [r["messages"][-1] for r in requests[1:]] == [
+        {"role": "assistant", "content": "Once upon"},
+        {"role": "assistant", "content": "Once upon a"},
+    ]
+    assert requests[0]["max_tokens"] == 100
+    assert requests[2]["max_tokens"] < 100
+
+
+@pytest.mark.asyncio
+async def test_resume_completion_extends_prompt():
+    requests = []
+    client = _client([
+        httpx.Response(200, content=_dropping_stream(_event("1, 2,"))),
+        httpx.Response(200, content=_event(" 3") + b"data: [DONE]\n\n"),
+    ], requests)
+
+    chunks = [chunk async for chunk in client.stream_completion("m", "Count:", resume=True)]
+
+    assert _contents(chunks) == "1, 2, 3"
+    assert requests[1]["prompt"] == "Count:1, 2,"
+
+
+@pytest.mark.asyncio
+async def test_resume_gives_up_after_max_retries():
+    requests = []
+    client = _client([
+        httpx.Response(200, content=_dropping_stream(_event("a"))),
+        httpx.Response(200, content=_dropping_stream(_event("b"))),
+    ], requests, retries=1)
+
+    with pytest.raises(httpx.RemoteProtocolError):
+        [chunk async for chunk in client.stream("m", MESSAGES, resume=True)]
+    assert len(requests) == 2
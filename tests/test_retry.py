@@ -0,0 +1,106 @@
+"""
+Tests for the retry policy and its use by the ExnestAI client
+"""
+
+import pytest
+import httpx
+
+from exnestai.client import ExnestAI
+from exnestai.retry import RetryPolicy
+
+
+def _status_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://api.exnest.app/v1/chat/completions")
+    response = httpx.Response(status, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+def test_exponential_delay_is_capped():
+    policy = RetryPolicy(base_delay=100, max_delay=1000, jitter="none")
+
+    assert [policy.get_delay(n) for n in range(6)] == [0.1, 0.2, 0.4, 0.8, 1.0, 1.0]
+
+
+@pytest.mark.parametrize("jitter", ["full", "equal", "decorrelated"])
+def test_jittered_delays_stay_within_bounds(jitter):
+    policy = RetryPolicy(base_delay=100, max_delay=2000, jitter=jitter)
+    delay = None
+    delays = []
+    for attempt in range(50):
+        delay = policy.get_delay(attempt % 6, delay)
+        delays.append(delay)
+
+    assert all(0 <= d <= 2.0 for d in delays)
+    assert len(set(delays)) > 1
+    if jitter == "decorrelated":
+        assert all(d >= 0.1 for d in delays)
+
+
+def test_invalid_jitter():
+    with pytest.raises(ValueError, match="jitter"):
+        RetryPolicy(jitter="random")
+
+
+def test_status_aware_retry_decisions():
+    policy = RetryPolicy(max_retries=2)
+
+    assert policy.should_retry(_status_error(503), 0)
+    assert policy.should_retry(_status_error(429), 1)
+    assert not policy.should_retry(_status_error(503), 2)
+    for status in (400, 401, 404, 422):
+        assert not policy.should_retry(_status_error(status), 0)
+
+
+def test_non_idempotent_requests():
+    policy = RetryPolicy(retry_non_idempotent=False)
+    request = httpx.Request("POST", "https://api.exnest.app/v1/chat/completions")
+
+    assert not policy.should_retry(_status_error(503), 0, idempotent=False)
+    assert not policy.should_retry(httpx.ReadTimeout("timeout", request=request), 0, idempotent=False)
+    assert policy.should_retry(_status_error(429), 0, idempotent=False)
+    assert policy.should_retry(httpx.ConnectError("refused", request=request), 0, idempotent=False)
+    assert policy.should_retry(_status_error(503), 0, idempotent=True)
+
+
+def _counting_client(statuses, **kwargs):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        status = statuses[min(len(calls), len(statuses)) - 1]
+        return httpx.Response(status, json={"ok": status == 200})
+
+    client = ExnestAI(api_key="test-key", transport=httpx.MockTransport(handler), **kwargs)
+    return client, calls
+
+
+@pytest.mark.asyncio
+async def test_client_does_not_retry_client_errors():
+    client, calls = _counting_client([422], retry_delay=1)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await client._execute_request("POST", "/chat/completions", {"model": "m"})
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_client_retries_transient_errors():
+    client, calls = _counting_client([503, 502, 200], retry_delay=1)
+
+    assert await client._execute_request("POST", "/chat/completions", {"model": "m"}) == {"ok": True}
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_client_uses_custom_policy():
+    policy = RetryPolicy(max_retries=1, base_delay=1, jitter="none")
+    client, calls = _counting_client([500], retry_policy=policy)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await client._execute_request("GET", "/models")
+    assert len(calls) == 2
+    assert client.get_config()["retries"] == 1
+
+    client.update_config(retries=0)
+    assert client.retry_policy.max_retries == 0
+    assert policy.max_retries == 1
@@ -0,0 +1,72 @@
+"""
+Tests for the byte-level SSE parser
+"""
+
+import pytest
+
+from exnestai.sse import SSEParser
+
+
+def _parse(*chunks):
+    parser = SSEParser()
+    return [event for chunk in chunks for event in parser.feed(chunk)]
+
+
+def test_single_data_event():
+    events = _parse(b'data: {"a": 1}\n\n')
+
+    assert len(events) == 1
+    assert events[0].data == b'{"a": 1}'
+    assert events[0].event == "message"
+
+
+def test_multi_line_data_is_joined_with_newlines():
+    events = _parse(b"data: first\ndata:second\ndata\n\n")
+
+    assert events[0].data == b"first\nsecond\n"
+
+
+def test_event_id_retry_and_comments():
+    events = _parse(b": keep-alive\nevent: update\nid: 42\nretry: 1500\ndata: x\n\ndata: y\n\n")
+
+    assert [(e.event, e.id, e.retry, e.data) for e in events] == [
+        ("update", "42", 1500, b"x"),
+        ("message", "42", 1500, b"y"),
+    ]
+
+
+def test_invalid_id_and_retry_are_ignored():
+    parser = SSEParser()
+    parser.feed(b"id: a\0b\nretry: soon\ndata: x\n\n")
+
+    assert parser.last_event_id is None
+    assert parser.retry is None
+
+
+@pytest.mark.parametrize("newline", [b"\n", b"\r", b"\r\n"])
+def test_line_endings(newline):
+    stream = newline.join([b"data: a", b"", b"data: b", b"", b""])
+
+    assert [e.data for e in _parse(stream)] == [b"a", b"b"]
+
+
+def test_events_split_across_chunks():
+    stream = b'data: {"x": 1}\r\n\r\ndata: two\r\ndata: lines\r\n\r\n'
+
+    for size in range(1, len(stream)):
+        chunks = [stream[i:i + size] for i in range(0, len(stream), size)]
+        assert [e.data for e in _parse(*chunks)] == [b'{"x": 1}', b"two\nlines"], size
+
+
+def test_event_without_data_is_not_dispatched():
+    events = _parse(b"event: ping\n\ndata: x\n\n")
+
+    assert len(events) == 1
+    assert events[0].event == "message"
+
+
+def test_leading_bom_and_unterminated_event():
+    events = _parse(b"\xef\xbb\xbfdata: a\n\ndata: partial")
+
+    assert [e.data for e in events] == [b"a"]
+
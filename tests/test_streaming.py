@@ -0,0 +1,151 @@
+"""
+Tests for stream read-ahead and connection release
+"""
+
+import asyncio
+import contextlib
+import json
+import pytest
+import httpx
+
+from exnestai.client import ExnestAI
+from exnestai.models import ExnestMessage
+from exnestai.streaming import ChunkStream
+
+MESSAGES = [ExnestMessage(role="user", content="hi")]
+
+
+def _event(index):
+    chunk = {"id": "c1", "object": "chat.completion.chunk", "created": 1, "model": "m",
+             "choices": [{"index": 0, "delta": {"content": f"t{index}"}}]}
+    return b"data: " + json.dumps(chunk).encode() + b"\n\n"
+
+
+async def _serve_endless_stream(reader, writer):
+    """HTTP/1.1 server streaming SSE events until the client goes away."""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+        for line in head.split(b"\r\n"):
+            if line.lower().startswith(b"content-length:"):
+                await reader.readexactly(int(line.split(b":", 1)[1]))
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nTransfer-Encoding: chunked\r\n\r\n")
+        index = 0
+        while True:
+            event = _event(index)
+            writer.write(b"%x\r\n%s\r\n" % (len(event), event))
+            await writer.drain()
+            index += 1
+            await asyncio.sleep(0.005)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def _released(client):
+    stats = client.get_pool_stats()
+    return stats["inFlightRequests"] == 0 and stats["activeConnections"] == 0
+
+
+@contextlib.asynccontextmanager
+async def _endless_server():
+    server = await asyncio.start_server(_serve_endless_stream, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        yield ExnestAI(api_key="test-key", base_url=f"http://127.0.0.1:{port}/v1")
+    finally:
+        server.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("read_ahead", [0, 4])
+async def test_breaking_out_releases_connection(read_ahead):
+    async with _endless_server() as client:
+        async with client.stream("m", MESSAGES, read_ahead=read_ahead) as stream:
+            async for chunk in stream:
+                assert client.get_pool_stats()["activeConnections"] == 1
+                if chunk.choices[0].delta.content == "t2":
+                    break
+
+        assert _released(client)
+        await client.aclose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("read_ahead", [0, 4])
+async def test_cancelling_consumer_releases_connection(read_ahead):
+    async with _endless_server() as client:
+        received = []
+
+        async def consume():
+            async for chunk in client.stream("m", MESSAGES, read_ahead=read_ahead):
+                received.append(chunk)
+
+        task = asyncio.ensure_future(consume())
+        while len(received) < 3:
+            await asyncio.sleep(0.005)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert _released(client)
+        await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_abandoned_read_ahead_stream_releases_connection():
+    async with _endless_server() as client:
+        stream = client.stream("m", MESSAGES, read_ahead=4)
+        async for chunk in stream:
+            if chunk.choices[0].delta.content == "t2":
+                break
+        await asyncio.sleep(0.05)  # the producer fills the buffer and blocks
+        del stream, chunk
+
+        # Only garbage collection can stop an abandoned stream, and its cleanup runs on the loop
+        for _ in range(100):
+            if _released(client):
+                break
+            await asyncio.sleep(0.01)
+        assert _released(client)
+        await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_read_ahead_is_bounded():
+    async with _endless_server() as client:
+        async with client.stream("m", MESSAGES, read_ahead=3) as stream:
+            first = await stream.__anext__()
+            await asyncio.sleep(0.1)  # slow consumer, the server keeps sending
+            assert stream.buffered == 3
+            second = await stream.__anext__()
+
+        assert [first.choices[0].delta.content, second.choices[0].delta.content] == ["t0", "t1"]
+        assert _released(client)
+        await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_read_ahead_delivers_everything_in_order():
+    body = b"".join(_event(index) for index in range(50)) + b"data: [DONE]\n\n"
+    client = ExnestAI(api_key="test-key", transport=httpx.MockTransport(lambda request: httpx.Response(200, content=body)))
+
+    chunks = [chunk async for chunk in client.stream("m", MESSAGES, read_ahead=8)]
+
+    assert [chunk.choices[0].delta.content for chunk in chunks] == [f"t{index}" for index in range(50)]
+
+
+@pytest.mark.asyncio
+async def test_read_ahead_propagates_errors():
+    client = ExnestAI(api_key="test-key", retries=0, transport=httpx.MockTransport(lambda request: httpx.Response(401)))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        [chunk async for chunk in client.stream("m", MESSAGES, read_ahead=2)]
+
+
+def test_negative_read_ahead_is_rejected():
+    async def source():
+        yield None
+
+    with pytest.raises(ValueError):
+        ChunkStream(source(), read_ahead=-1)
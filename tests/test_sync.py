@@ -0,0 +1,212 @@
+"""
+Tests for the synchronous client
+"""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import httpx
+
+from exnestai.sync import ExnestAISync
+from exnestai.models import ExnestMessage, ExnestChatResponse, ExnestModel, EBCDecisionContext
+
+MESSAGES = [ExnestMessage(role="user", content="hi")]
+
+CHAT_RESPONSE = {
+    "id": "c1", "object": "chat.completion", "created": 1, "model": "m",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "Hello"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+}
+
+MODEL = {
+    "id": "openai:gpt-4o-mini", "name": "gpt-4o-mini", "displayName": "GPT-4o mini", "description": "",
+    "provider": {"id": "openai", "name": "openai", "displayName": "OpenAI"},
+    "pricing": {"inputPrice": "0.15", "outputPrice": "0.60", "currency": "USD", "per": "1M"},
+    "limits": {"maxTokens": 16384, "contextWindow": 128000},
+    "isActive": True, "createdAt": "2024-07-18"
+}
+
+
+def _stream_body(*tokens):
+    return b"".join(
+        b"data: " + json.dumps({"id": "c1", "object": "chat.completion.chunk", "created": 1, "model": "m",
+                                "choices": [{"index": 0, "delta": {"content": token}}]}).encode() + b"\n\n"
+        for token in tokens
+    ) + b"data: [DONE]\n\n"
+
+
+def _client(handler, **kwargs):
+    return ExnestAISync(api_key="test-key", retry_delay=1, transport=httpx.MockTransport(handler), **kwargs)
+
+
+def test_chat():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json=CHAT_RESPONSE)
+
+    with _client(handler) as client:
+        response = client.chat("m", MESSAGES, max_tokens=5)
+
+    assert isinstance(response, ExnestChatResponse)
+    assert response.choices[0].message.content == "Hello"
+    assert response.served_model == "m"
+    assert requests[0].url.path == "/v1/chat/completions"
+    assert json.loads(requests[0].content) == {"model": "m", "messages": [{"role": "user", "content": "hi"}],
+                                               "max_tokens": 5}
+    assert requests[0].headers["Authorization"] == "Bearer test-key"
+
+
+def test_retries_then_succeeds():
+    responses = [httpx.Response(503), httpx.Response(429, headers={"Retry-After": "0"}),
+                 httpx.Response(200, json=CHAT_RESPONSE)]
+    client = _client(lambda request: responses.pop(0))
+
+    assert client.chat("m", MESSAGES).choices[0].message.content == "Hello"
+    assert not responses
+
+
+def test_client_errors_are_raised():
+    client = _client(lambda request: httpx.Response(401))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        client.chat("m", MESSAGES)
+
+
+def test_falls_back_to_next_model():
+    def handler(request):
+        if json.loads(request.content)["model"] == "primary":
+            return httpx.Response(503)
+        return httpx.Response(200, json=CHAT_RESPONSE)
+
+    response = _client(handler).chat(["primary", "backup"], MESSAGES)
+
+    assert response.served_model == "backup"
+
+
+def test_raw_bytes():
+    client = _client(lambda request: httpx.Response(200, json=CHAT_RESPONSE))
+
+    assert json.loads(client.chat("m", MESSAGES, raw=True)) == CHAT_RESPONSE
+
+
+def test_stream_is_a_regular_iterator():
+    client = _client(lambda request: httpx.Response(200, content=_stream_body("a", "b", "c")))
+
+    chunks = list(client.stream("m", MESSAGES))
+
+    assert [chunk.choices[0].delta.content for chunk in chunks] == ["a", "b", "c"]
+
+
+def test_stream_collect():
+    client = _client(lambda request: httpx.Response(200, content=_stream_body("Hel", "lo")))
+
+    response = client.stream("m", MESSAGES, collect=True)
+
+    assert response.choices[0].message.content == "Hello"
+
+
+def test_ebc_methods():
+    paths = []
+
+    def handler(request):
+        paths.append(request.url.path)
+        return httpx.Response(200, json=CHAT_RESPONSE)
+
+    client = _client(handler)
+    client.deep_think(MESSAGES)
+    client.structured_decision(MESSAGES, EBCDecisionContext(decisionType="choice", criteria=["cost"]))
+    client.delegate(MESSAGES)
+
+    assert paths == ["/v1/ebc/deep-think", "/v1/decision-making/session", "/v1/ebc/delegate"]
+
+
+def test_models():
+    def handler(request):
+        if request.url.path == "/v1/models":
+            return httpx.Response(200, json={"data": {"models": [MODEL]}})
+        return httpx.Response(200, json={"data": MODEL})
+
+    client = _client(handler)
+
+    assert [model.id for model in client.get_models()] == ["openai:gpt-4o-mini"]
+    assert isinstance(client.get_model("openai:gpt-4o-mini"), ExnestModel)
+
+
+def test_shared_across_threads():
+    threads = set()
+
+    def handler(request):
+        threads.add(threading.get_ident())
+        return httpx.Response(200, json=CHAT_RESPONSE)
+
+    with _client(handler) as client, ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: client.chat("m", MESSAGES), range(64)))
+
+    assert all(result.choices[0].message.content == "Hello" for result in results)
+    assert len(threads) > 1
+
+
+def test_closed_client_rejects_requests():
+    client = _client(lambda request: httpx.Response(200, json=CHAT_RESPONSE))
+    client.close()
+
+    with pytest.raises(RuntimeError):
+        client.chat("m", MESSAGES)
+
+
+def test_health_check():
+    with _client(lambda request: httpx.Response(200, json=CHAT_RESPONSE)) as client:
+        assert client.test_connection().choices[0].message.content == "Hello"
+        assert client.health_check()["status"] == "healthy"
+
+    with _client(lambda request: httpx.Response(401), retries=0) as client:
+        assert client.test_connection().error.code == "connection_error"
+        assert client.health_check()["status"] == "unhealthy"
+
+
+def test_update_config_swaps_pool_after_in_flight_requests():
+    gate = threading.Event()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            gate.wait(5)
+            body = json.dumps(CHAT_RESPONSE).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = ExnestAISync(api_key="test-key", base_url=f"http://127.0.0.1:{server.server_address[1]}/v1")
+        old = client._client
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pending = pool.submit(client.chat, "m", MESSAGES)
+            while not client._in_flight:
+                gate.wait(0.01)
+
+            client.update_config(timeout=10000)
+
+            assert client._client is not old and not old.is_closed
+            gate.set()
+            assert pending.result().choices[0].message.content == "Hello"
+        assert old.is_closed
+        assert client.chat("m", MESSAGES).choices[0].message.content == "Hello"
+        assert client.get_config()["timeout"] == 10000
+        client.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+